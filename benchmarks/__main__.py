@@ -0,0 +1,79 @@
+"""Command line entry point: python -m benchmarks [--sizes 1k,100k] [--baseline FILE]."""
+import sys
+import argparse
+import tempfile
+from typing import List
+
+from . import report
+from .bench_tools import CASES, run_python, run_js
+
+SUFFIXES = {"k": 10 ** 3, "m": 10 ** 6}
+SUITES = ("python", "js", "proxy")
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower()
+    if value[-1:] in SUFFIXES:
+        return int(float(value[:-1]) * SUFFIXES[value[-1]])
+    return int(value)
+
+
+def parse_sizes(value: str) -> List[int]:
+    try:
+        return sorted(parse_size(v) for v in value.split(",") if v.strip())
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid sizes: {value}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark StringLOM tools and the proxy")
+    parser.add_argument("--sizes", type=parse_sizes, default="1k,10k,100k,1m,10m", help="Input sizes in lines (k/m suffixes)")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Comma-separated suites to run: {', '.join(SUITES)}")
+    parser.add_argument("--tools", default=None, help="Comma-separated case names or tool ids (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case; the median is reported")
+    parser.add_argument("--max-seconds", type=float, default=30.0, help="Skip larger sizes of a case once a run takes longer")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per proxy scenario")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent requests in the proxy scenarios")
+    parser.add_argument("--upstream-latency", type=float, default=0.0, help="Seconds the mock upstream waits per request")
+    parser.add_argument("-o", "--output", default="benchmark-results.json", help="JSON results file")
+    parser.add_argument("--baseline", default=None, help="Results file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent slowdown reported as a regression")
+    parser.add_argument("--list", action="store_true", help="List the tool cases and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, tool_id, params, kind in CASES:
+            print(f"{name:<22} {tool_id:<12} {kind}")
+        return 0
+
+    suites = {s.strip() for s in args.suites.split(",") if s.strip()}
+    unknown = suites - set(SUITES)
+    if unknown:
+        parser.error(f"Unknown suites: {', '.join(sorted(unknown))}")
+    names = [n.strip() for n in args.tools.split(",")] if args.tools else None
+
+    results = []
+    if "python" in suites:
+        results.extend(run_python(args.sizes, names, args.repeat, args.max_seconds))
+    if "js" in suites:
+        with tempfile.TemporaryDirectory(prefix="stringlom-bench-") as work_dir:
+            results.extend(run_js(args.sizes, names, args.repeat, args.max_seconds, work_dir))
+    if "proxy" in suites:
+        from .bench_proxy import run_proxy, run_startup
+        results.extend(run_startup(args.repeat))
+        results.extend(run_proxy(args.requests, args.concurrency, args.upstream_latency))
+
+    report.save(args.output, results)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        rows = report.compare(results, report.load(args.baseline)["results"], args.threshold)
+        print()
+        print(report.format_report(rows, args.threshold))
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
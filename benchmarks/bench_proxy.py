@@ -0,0 +1,181 @@
+"""Proxy benchmarks: /proxy throughput and latency against a local mock upstream.
+
+server.py and the mock upstream run under uvicorn in background threads on free ports.
+Each scenario sends ``requests`` requests with ``concurrency`` in flight and reports
+requests per second with p50/p99 latency. The ``direct`` scenario hits the mock without
+the proxy as a reference point for the proxy overhead. ``proxy-startup`` times a cold
+``python server.py`` from launch to its first answered request, against STARTUP_BUDGET.
+"""
+import os
+import sys
+import time
+import json
+import socket
+import asyncio
+import logging
+import tempfile
+import importlib
+import subprocess
+import threading
+import statistics
+from typing import Dict, Iterator, List
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMPLETION = {"id": "bench", "choices": [{"index": 0, "message": {"role": "assistant", "content": "x" * 512}}]}
+STREAM_CHUNKS = 20
+# Seconds from launching server.py to its first answered request
+STARTUP_BUDGET = 1.0
+
+
+def mock_upstream(latency: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def completions(body: Dict):
+        await asyncio.sleep(latency)
+        if not body.get("stream"):
+            return COMPLETION
+
+        async def events():
+            for i in range(STREAM_CHUNKS):
+                yield f"data: {json.dumps({'choices': [{'delta': {'content': f'token{i} '}}]})}\n\n"
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def import_server(server_args: List[str]):
+    # server.py parses argv and reads ~/config.json at import time
+    home = tempfile.mkdtemp(prefix="stringlom-bench-")
+    saved = os.environ.get("HOME"), sys.argv
+    os.environ["HOME"], sys.argv = home, ["server.py"] + server_args
+    sys.path.insert(0, ROOT)
+    try:
+        sys.modules.pop("server", None)
+        return importlib.import_module("server")
+    finally:
+        sys.path.remove(ROOT)
+        sys.argv = saved[1]
+        if saved[0] is None:
+            os.environ.pop("HOME", None)
+        else:
+            os.environ["HOME"] = saved[0]
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+async def load(url: str, body: Dict, requests: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    queue = iter(range(requests))
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        for _ in queue:
+            start = time.perf_counter()
+            try:
+                async with client.stream("POST", url, json=body) as response:
+                    async for _ in response.aiter_raw():
+                        pass
+                    ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000,
+    }
+
+
+def run_proxy(requests: int = 2000, concurrency: int = 32, latency: float = 0.0,
+              server_args: List[str] = (), log=print) -> Iterator[Dict]:
+    server = import_server(list(server_args))
+    # Per-request httpx logging would dominate the measurements
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    upstream_port, proxy_port = free_port(), free_port()
+    servers = [serve(mock_upstream(latency), upstream_port), serve(server.app, proxy_port)]
+
+    target = f"http://127.0.0.1:{upstream_port}/v1/chat/completions"
+    proxy = httpx.URL(f"http://127.0.0.1:{proxy_port}/{server.API_UUID}/proxy", params={"url": target})
+    scenarios = [
+        ("direct", target, {"stream": False}),
+        ("proxy-json", proxy, {"stream": False}),
+        ("proxy-stream", proxy, {"stream": True}),
+    ]
+    try:
+        for name, url, body in scenarios:
+            body = {"model": "bench", "messages": [{"role": "user", "content": "hi"}], **body}
+            # Warm up connections
+            asyncio.run(load(url, body, concurrency, concurrency))
+            metrics = asyncio.run(load(url, body, requests, concurrency))
+            log(f"proxy   {name:<22} c={concurrency:<4} {metrics['rps']:10.1f} rps  "
+                f"p50 {metrics['p50_ms']:7.2f} ms  p99 {metrics['p99_ms']:7.2f} ms  errors {metrics['errors']}")
+            yield {"suite": "proxy", "name": name, "size": concurrency, **metrics}
+    finally:
+        for s in servers:
+            s.should_exit = True
+
+
+def time_startup(server_args: List[str], timeout: float = 30.0) -> float:
+    """Seconds until a freshly launched server.py answers GET /."""
+    home = tempfile.mkdtemp(prefix="stringlom-bench-")
+    config = os.path.join(home, "config.json")
+    env = {**os.environ, "HOME": home}
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py")] + server_args, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        # The port is saved once the socket listens; connections queue until the app is up
+        while not os.path.exists(config):
+            if process.poll() is not None or time.perf_counter() - start > timeout:
+                raise RuntimeError("server.py did not start")
+            time.sleep(0.005)
+        with open(config) as f:
+            port = json.load(f)["port"]
+        httpx.get(f"http://127.0.0.1:{port}/", timeout=timeout).raise_for_status()
+        return time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def run_startup(repeat: int = 3, workers: int = 1, log=print) -> Iterator[Dict]:
+    seconds = statistics.median(time_startup(["--workers", str(workers)]) for _ in range(repeat))
+    verdict = "ok" if seconds <= STARTUP_BUDGET else "OVER BUDGET"
+    log(f"proxy   {'proxy-startup':<22} w={workers:<4} {seconds * 1000:10.1f} ms  budget {STARTUP_BUDGET * 1000:.0f} ms  {verdict}")
+    yield {"suite": "proxy", "name": "proxy-startup", "size": workers, "seconds": seconds}
@@ -0,0 +1,163 @@
+"""Tool benchmarks: every TOOLS entry over synthetic inputs of growing size.
+
+Two suites share the same cases and inputs:
+- ``python``: the headless ports in stringlom.tools (browser-only tools are skipped);
+- ``js``: src/js/tools.js under Node.js through run_tools.js, when ``node`` is available.
+"""
+import os
+import json
+import time
+import shutil
+import statistics
+import subprocess
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from stringlom import TOOLS, DEFAULTS, BROWSER_ONLY
+
+from .data import GENERATORS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JS_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_tools.js")
+
+# A log-scrubbing style pattern list for the multi-pattern regex mode
+SCRUB_PATTERNS = [
+    "\\w+@example\\.com", "\\b\\d{6,}\\b", "-\\d{3,}", "user(\\d+)", "\\b[A-Z]{3,}\\b",
+    "ё+", "😀|🚀", "(\\w)\\1{2}", "^\\s+", "\\s+$", "\\d+\\.\\d+", "[éèêë]", "token=\\S+",
+    "\\b0x[0-9a-f]+\\b", "password\\S*", "\\b(?:GET|POST)\\b", "\\[\\d+\\]", "\\bid:\\d+", "\\t", "зз",
+]
+FILTER_QUERIES = ["error", "warn", "ё", "😀", "user1", "abc", "xyz", "щ", "🔥", "@example", "00", "99",
+                  "qq", "zz", "ab", "ба", "ок", "é", "mm", "kk"]
+
+# (case name, tool id, params on top of the tool defaults, input kind)
+CASES: List[Tuple[str, str, Dict, str]] = [
+    ("regex", "regex", {"pattern": "\\d+", "replacement": "#"}, "text"),
+    ("regex[only_matched]", "regex", {"pattern": "(\\w+)@(\\w+)", "replacement": "$2", "onlyMatched": True}, "text"),
+    ("regex[20 patterns]", "regex", {"pattern": "\n".join(SCRUB_PATTERNS), "replacement": "[redacted]"}, "text"),
+    ("ai_cleaner", "ai_cleaner", {}, "text"),
+    ("deduplicate", "deduplicate", {}, "text"),
+    ("duplicates", "duplicates", {}, "text"),
+    ("filter", "filter", {"query": "a"}, "text"),
+    ("filter[20 queries]", "filter", {"query": "\n".join(FILTER_QUERIES)}, "text"),
+    ("sort", "sort", {}, "text"),
+    ("sort[numeric]", "sort", {"mode": "numeric"}, "numbers"),
+    ("sort[smart]", "sort", {"mode": "smart", "caseInsensitive": True}, "text"),
+    ("reverse", "reverse", {}, "text"),
+    ("compare", "compare", {"operation": "full"}, "text"),
+    ("shuffle", "shuffle", {"seed": "42"}, "text"),
+    ("case", "case", {"mode": "word"}, "text"),
+    ("wrapper", "wrapper", {"prefix": "'", "suffix": "',"}, "text"),
+    ("trim", "trim", {}, "text"),
+    ("add_line", "add_line", {"startLine": "BEGIN", "betweenLines": "--", "endLine": "END"}, "text"),
+    ("debug_view", "debug_view", {}, "text"),
+    ("csv", "csv", {"template": "$2 - $1"}, "csv"),
+    ("json_format", "json_format", {}, "json"),
+    ("json_path", "json_path", {"query": "$..name"}, "json"),
+    ("json_path[lines]", "json_path", {"query": "$.tags[*]", "inputMode": "lines"}, "ndjson"),
+    ("join", "join", {}, "text"),
+    ("split", "split", {"delimiter": " "}, "text"),
+    ("encode", "encode", {}, "text"),
+    ("encode[b64decode]", "encode", {"mode": "b64decode"}, "base64"),
+    ("hash", "hash", {"algorithm": "md5"}, "text"),
+    ("hash[sha256]", "hash", {"algorithm": "sha256"}, "text"),
+    ("to_hex", "to_hex", {}, "text"),
+    ("from_hex", "from_hex", {}, "hex"),
+    ("template", "template", {"tpl": "{% for line in lines %}{{ line | upper }}\n{% endfor %}"}, "text"),
+    ("js_function", "js_function", {"code": "return line.length;"}, "text"),
+]
+
+# Cases that need more than the block input
+EXTRA_INPUT = {"compare": ("list2", "text", 7)}
+
+
+def case_params(name: str, tool_id: str, params: Dict, size: int, inputs: Dict) -> Dict:
+    params = dict(params)
+    if name in EXTRA_INPUT:
+        key, kind, seed = EXTRA_INPUT[name]
+        params[key] = "\n".join(inputs_for(inputs, kind, size // 2, seed))
+    return params
+
+
+def inputs_for(cache: Dict, kind: str, size: int, seed: int = 0) -> List[str]:
+    key = (kind, size, seed)
+    if key not in cache:
+        cache[key] = GENERATORS[kind](size, seed)
+    return cache[key]
+
+
+def select_cases(names: Optional[List[str]]) -> List[Tuple[str, str, Dict, str]]:
+    if not names:
+        return CASES
+    return [case for case in CASES if case[0] in names or case[1] in names]
+
+
+def _timed(fn, repeat: int) -> List[float]:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def result(suite: str, name: str, size: int, runs: List[float]) -> Dict:
+    seconds = statistics.median(runs)
+    return {
+        "suite": suite,
+        "name": name,
+        "size": size,
+        "seconds": seconds,
+        "runs": runs,
+        "lines_per_sec": size / seconds if seconds else None,
+    }
+
+
+def run_python(sizes: List[int], names: Optional[List[str]] = None, repeat: int = 3,
+               max_seconds: float = 60.0, log=print) -> Iterator[Dict]:
+    inputs: Dict = {}
+    for name, tool_id, params, kind in select_cases(names):
+        if tool_id in BROWSER_ONLY:
+            continue
+        for size in sizes:
+            lines = inputs_for(inputs, kind, size)
+            full = {**DEFAULTS[tool_id], **case_params(name, tool_id, params, size, inputs)}
+            runs = _timed(lambda: TOOLS[tool_id](lines, full), repeat)
+            entry = result("python", name, size, runs)
+            log(f"python  {name:<22} {size:>10,} lines  {entry['seconds'] * 1000:10.1f} ms")
+            yield entry
+            # Larger inputs only take longer
+            if entry["seconds"] > max_seconds:
+                break
+
+
+def run_js(sizes: List[int], names: Optional[List[str]] = None, repeat: int = 3, max_seconds: float = 60.0,
+           work_dir: str = ".", log=print) -> Iterator[Dict]:
+    node = shutil.which("node")
+    if node is None:
+        log("node not found: skipping the js suite")
+        return
+
+    inputs: Dict = {}
+    for name, tool_id, params, kind in select_cases(names):
+        for size in sizes:
+            path = os.path.join(work_dir, f"{kind}-{size}.txt")
+            if not os.path.exists(path):
+                with open(path, "w", encoding="utf-8", newline="") as f:
+                    f.write("\n".join(inputs_for(inputs, kind, size)))
+            spec = {"tool": tool_id, "params": case_params(name, tool_id, params, size, inputs),
+                    "input": path, "repeat": repeat}
+            proc = subprocess.run(
+                [node, "--max-old-space-size=16384", JS_RUNNER], input=json.dumps(spec),
+                capture_output=True, text=True, cwd=ROOT
+            )
+            try:
+                out = json.loads(proc.stdout)
+            except ValueError:
+                out = {"error": (proc.stderr or proc.stdout).strip().splitlines()[-1:] or ["no output"]}
+            if "error" in out:
+                log(f"js      {name:<22} {size:>10,} lines  skipped: {out['error']}")
+                break
+            entry = result("js", name, size, out["runs"])
+            log(f"js      {name:<22} {size:>10,} lines  {entry['seconds'] * 1000:10.1f} ms")
+            yield entry
+            if entry["seconds"] > max_seconds:
+                break
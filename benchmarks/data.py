@@ -0,0 +1,104 @@
+"""Deterministic synthetic inputs for the tool benchmarks.
+
+Lines are built from a fixed vocabulary mixing ASCII, Cyrillic, CJK, accented letters
+(precomposed and combining), emoji, numbers and e-mail addresses. Line lengths follow a
+long-tailed distribution, and about a quarter of the lines repeat earlier ones so that
+dedup/duplicates/compare have work to do.
+"""
+import json
+import random
+import base64
+from typing import Callable, Dict, List
+
+ALPHABETS = [
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789",
+    "абвгдеёжзийклмнопрстуфхцчшщъыьэюяАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ",
+    "".join(chr(c) for c in range(0x4E00, 0x4E00 + 300)),
+    "éèêëàâäôöûüçñÉÀÇ" + "e\u0301a\u0300o\u0308",
+    "😀😂🤣😍🎉🚀👍🔥💡✨",
+]
+# Share of vocabulary words drawn from each alphabet
+ALPHABET_WEIGHTS = [70, 15, 5, 7, 3]
+
+VOCABULARY_SIZE = 20000
+MEAN_WORDS = 6
+MAX_WORDS = 60
+REPEAT_SHARE = 0.25
+
+
+def vocabulary(seed: int = 0) -> List[str]:
+    rnd = random.Random(seed)
+    words = []
+    for _ in range(VOCABULARY_SIZE):
+        kind = rnd.random()
+        if kind < 0.1:
+            words.append(str(rnd.randrange(-10 ** 6, 10 ** 6)))
+        elif kind < 0.13:
+            words.append(f"user{rnd.randrange(10 ** 5)}@example.com")
+        else:
+            alphabet = rnd.choices(ALPHABETS, ALPHABET_WEIGHTS)[0]
+            words.append("".join(rnd.choices(alphabet, k=rnd.randint(1, 12))))
+    return words
+
+
+def text_lines(count: int, seed: int = 0) -> List[str]:
+    rnd = random.Random(seed)
+    words = vocabulary(seed)
+    lines: List[str] = []
+    for _ in range(count):
+        if lines and rnd.random() < REPEAT_SHARE:
+            lines.append(lines[rnd.randrange(len(lines))])
+            continue
+        n = min(int(rnd.expovariate(1 / MEAN_WORDS)), MAX_WORDS)
+        line = " ".join(rnd.choices(words, k=n))
+        # Some padding for trim/deduplicate
+        if rnd.random() < 0.1:
+            line = " " * rnd.randint(1, 3) + line + "\t" * rnd.randint(0, 1)
+        lines.append(line)
+    return lines
+
+
+def number_lines(count: int, seed: int = 0) -> List[str]:
+    rnd = random.Random(seed)
+    return [str(rnd.randrange(-10 ** 9, 10 ** 9)) if rnd.random() < 0.8 else f"{rnd.random() * 1000:.3f}"
+            for _ in range(count)]
+
+
+def csv_lines(count: int, seed: int = 0) -> List[str]:
+    rnd = random.Random(seed)
+    words = vocabulary(seed)
+    return [";".join(rnd.choices(words, k=rnd.randint(2, 6))) for _ in range(count)]
+
+
+def ndjson_lines(count: int, seed: int = 0) -> List[str]:
+    rnd = random.Random(seed)
+    words = vocabulary(seed)
+    return [json.dumps({"id": i, "name": rnd.choice(words), "tags": rnd.choices(words, k=rnd.randint(0, 4)),
+                        "score": rnd.random()}, ensure_ascii=False)
+            for i in range(count)]
+
+
+def json_lines(count: int, seed: int = 0) -> List[str]:
+    """A pretty-printed JSON array of about ``count`` lines (json_format / json_path combined mode)."""
+    # Each object takes 8 lines with indent=2
+    objects = [json.loads(line) for line in ndjson_lines(max(count // 8, 1), seed)]
+    return json.dumps(objects, ensure_ascii=False, indent=2).split("\n")
+
+
+def hex_lines(count: int, seed: int = 0) -> List[str]:
+    return [line.encode("utf-8", "surrogatepass").hex(" ").upper() for line in text_lines(count, seed)]
+
+
+def base64_lines(count: int, seed: int = 0) -> List[str]:
+    return [base64.b64encode(line.encode("utf-8")).decode("ascii") for line in text_lines(count, seed)]
+
+
+GENERATORS: Dict[str, Callable[[int, int], List[str]]] = {
+    "text": text_lines,
+    "numbers": number_lines,
+    "csv": csv_lines,
+    "ndjson": ndjson_lines,
+    "json": json_lines,
+    "hex": hex_lines,
+    "base64": base64_lines,
+}
@@ -0,0 +1,81 @@
+"""Benchmark results files and regression reports against a stored baseline."""
+import sys
+import json
+import time
+import shutil
+import platform
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+# Metric -> True if higher is better
+METRICS = {"seconds": False, "rps": True, "p50_ms": False, "p99_ms": False}
+
+Key = Tuple[str, str, int]
+
+
+def _command(*cmd: str) -> Optional[str]:
+    if shutil.which(cmd[0]) is None:
+        return None
+    try:
+        return subprocess.run(cmd, capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def metadata() -> Dict:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "node": _command("node", "--version"),
+        "git": _command("git", "rev-parse", "--short", "HEAD"),
+    }
+
+
+def save(path: str, results: List[Dict]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": metadata(), "results": results}, f, indent=2)
+
+
+def load(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def key(entry: Dict) -> Key:
+    return entry["suite"], entry["name"], entry["size"]
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float) -> List[Dict]:
+    """Returns one row per metric shared with the baseline; ``regression`` is set when
+    the metric got worse by more than ``threshold`` percent."""
+    previous = {key(entry): entry for entry in baseline}
+    rows = []
+    for entry in results:
+        base = previous.get(key(entry))
+        if base is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = base.get(metric), entry.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            worse = -change if higher_is_better else change
+            rows.append({
+                "suite": entry["suite"], "name": entry["name"], "size": entry["size"], "metric": metric,
+                "baseline": old, "current": new, "change": change, "regression": worse > threshold,
+            })
+    return rows
+
+
+def format_report(rows: List[Dict], threshold: float) -> str:
+    if not rows:
+        return "No results in common with the baseline."
+    out = [f"{'suite':<7} {'name':<22} {'size':>10} {'metric':<8} {'baseline':>12} {'current':>12} {'change':>9}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        out.append(f"{row['suite']:<7} {row['name']:<22} {row['size']:>10,} {row['metric']:<8} "
+                   f"{row['baseline']:>12.4g} {row['current']:>12.4g} {row['change']:>+8.1f}%{flag}")
+    regressions = sum(row["regression"] for row in rows)
+    out.append(f"\n{regressions} regression(s) over {threshold:g}% in {len(rows)} comparison(s).")
+    return "\n".join(out)
@@ -0,0 +1,51 @@
+// Times one tool from src/js/tools.js under Node.js.
+// Reads {tool, params, input, repeat} as JSON on stdin and prints {runs} (seconds) or {error}.
+const fs = require('fs');
+const path = require('path');
+
+global.window = global;
+const LANG_EN = require(path.join(__dirname, '..', 'src', 'js', 'lang-en.js'));
+global.i18n = { locale: 'en', t: key => LANG_EN[key] || key };
+
+// CDN libraries of the page, when installed locally
+const LIBRARIES = { CryptoJS: 'crypto-js', jsonpath: 'jsonpath', nunjucks: 'nunjucks' };
+for (const [name, pkg] of Object.entries(LIBRARIES)) {
+    try {
+        global[name] = require(pkg);
+    } catch (e) {
+        // Tools check for the global themselves
+    }
+}
+
+const TOOLS = require(path.join(__dirname, '..', 'src', 'js', 'tools.js'));
+
+function main(spec) {
+    const tool = TOOLS.find(t => t.id === spec.tool);
+    if (!tool) return { error: `Unknown tool: ${spec.tool}` };
+    if (tool.async) return { error: 'async tools are not benchmarked' };
+    const params = {};
+    tool.params.forEach(p => { params[p.id] = p.value; });
+    Object.assign(params, spec.params);
+
+    const text = fs.readFileSync(spec.input, 'utf8');
+    const runs = [];
+    for (let i = 0; i < (spec.repeat || 1); i++) {
+        const lines = text.split('\n');
+        const start = process.hrtime.bigint();
+        let res;
+        try {
+            res = tool.process(lines, params);
+        } catch (e) {
+            return { error: e.message };
+        }
+        runs.push(Number(process.hrtime.bigint() - start) / 1e9);
+        if (res.error) return { error: String(res.result[0]) };
+    }
+    return { runs };
+}
+
+let input = '';
+process.stdin.on('data', chunk => { input += chunk; });
+process.stdin.on('end', () => {
+    process.stdout.write(JSON.stringify(main(JSON.parse(input))));
+});
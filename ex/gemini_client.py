@@ -1,7 +1,8 @@
 import os
+import asyncio
 import logging
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence
 from config import Config
 from gemini_transport import GeminiTransport
 from fields_schema import get_field_names
@@ -18,11 +19,20 @@ logger = logging.getLogger(__name__)
 class GeminiClient:
     FIELDS = get_field_names()  # Получаем список полей из централизованной схемы
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, config_path: Optional[str] = None, max_concurrency: int = 4):
         self.logger = logging.getLogger(__name__)
         self.logger.info("Initializing GeminiClient")
         
         self.config = config
+        # Prompt templates are read from config once and kept until the config file changes on disk;
+        # without a file to watch they are read from config on every call
+        self.config_path = config_path
+        if not config_path:
+            self.logger.info("No config_path given: prompt templates are read from config on every call")
+        self.config_mtime = None
+        self.templates: Dict[str, str] = {}
+        self.max_concurrency = max_concurrency
+        self._call_limit: Optional[tuple] = None
         self.gemini_config = config.get_gemini_config()
         
         # Initialize transport layer
@@ -38,12 +48,34 @@ class GeminiClient:
         """Deprecated: Proxy is now handled in GeminiTransport"""
         pass
 
-    def extract_fields(self, user_input: str, context: str = "") -> Dict[str, Any]:
-        self.logger.info("extract_fields method called")
-        
+    def _template(self, key: str, default: str) -> str:
+        if not self.config_path:
+            return self.config.get(key, default)
+        try:
+            mtime = os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            self.templates.clear()
+            self.config_mtime = None
+            return self.config.get(key, default)
+        if mtime != self.config_mtime:
+            self.templates.clear()
+            self.config_mtime = mtime
+        if key not in self.templates:
+            self.templates[key] = self.config.get(key, default)
+        return self.templates[key]
+
+    async def _generate_async(self, prompt: str) -> str:
+        # GeminiTransport is blocking; each call runs in a worker thread, at most max_concurrency at once
+        loop = asyncio.get_running_loop()
+        if self._call_limit is None or self._call_limit[0] is not loop:
+            self._call_limit = (loop, asyncio.Semaphore(self.max_concurrency))
+        async with self._call_limit[1]:
+            return await asyncio.to_thread(self.transport.generate_content, prompt)
+
+    def _extract_prompt(self, user_input: str, context: str) -> str:
         fields_list = ", ".join(self.FIELDS)
         # Load prompt template from config (reloadable). Use a fallback identical to previous hardcoded prompt.
-        prompt_template = self.config.get(
+        prompt_template = self._template(
             'gemini.extract_prompt',
             """You are a Jira ticket creation assistant. Extract information from the user's description.
 
@@ -70,49 +102,77 @@ Example format:
     Remember: Return ONLY the JSON object, no other text."""
         )
 
-        prompt = prompt_template.format(
+        return prompt_template.format(
             user_input=user_input,
             context=context,
             cfg_context=self.config.get_context(),
             fields_list=fields_list
         )
 
+    def _parse_fields(self, response_text: str) -> Dict[str, Any]:
+        self.logger.debug(f"Response:\n{response_text}")
+        response_text = response_text.strip()
+        
+        # Clean up response if it contains markdown code blocks
+        if response_text.startswith('```json'):
+            response_text = response_text[7:]
+        if response_text.startswith('```'):
+            response_text = response_text[3:]
+        if response_text.endswith('```'):
+            response_text = response_text[:-3]
+        
+        response_text = response_text.strip()
+        extracted = json.loads(response_text)
+        
+        # Ensure all fields are present
+        for field in self.FIELDS:
+            if field not in extracted:
+                extracted[field] = None
+        
+        self.logger.info("Fields extracted successfully")
+        return extracted
+
+    def _empty_fields(self) -> Dict[str, Any]:
+        return {field: None for field in self.FIELDS}
+
+    def _call(self, name: str, prompt: str, parse, fallback):
+        """One model call: ``parse(response)``, or ``fallback()`` if the call or the parsing fails."""
+        self.logger.debug(f"Prompt:\n{prompt}")
         try:
-            self.logger.debug(f"Prompt:\n{prompt}")
-            self.logger.debug("Calling Gemini API for field extraction")
-            response_text = self.transport.generate_content(prompt)
-            self.logger.debug(f"Response:\n{response_text}")
-            response_text = response_text.strip()
-            
-            # Clean up response if it contains markdown code blocks
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.startswith('```'):
-                response_text = response_text[3:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            
-            response_text = response_text.strip()
-            extracted = json.loads(response_text)
-            
-            # Ensure all fields are present
-            for field in self.FIELDS:
-                if field not in extracted:
-                    extracted[field] = None
-            
-            self.logger.info("Fields extracted successfully")
-            return extracted
+            return parse(self.transport.generate_content(prompt))
         except json.JSONDecodeError as e:
-            self.logger.error(f"JSON parsing error in extract_fields: {e}", exc_info=True)
-            return {field: None for field in self.FIELDS}
+            self.logger.error(f"JSON parsing error in {name}: {e}", exc_info=True)
         except Exception as e:
-            self.logger.error(f"Error in extract_fields method: {e}", exc_info=True)
-            return {field: None for field in self.FIELDS}
+            self.logger.error(f"Error in {name} method: {e}", exc_info=True)
+        return fallback()
 
-    def generate_summary(self, fields: Dict[str, Any]) -> str:
-        self.logger.info("generate_summary method called")
+    async def _call_async(self, name: str, prompt: str, parse, fallback):
+        """_call with the model call run through _generate_async."""
+        self.logger.debug(f"Prompt:\n{prompt}")
+        try:
+            return parse(await self._generate_async(prompt))
+        except json.JSONDecodeError as e:
+            self.logger.error(f"JSON parsing error in {name}: {e}", exc_info=True)
+        except Exception as e:
+            self.logger.error(f"Error in {name} method: {e}", exc_info=True)
+        return fallback()
+
+    def _parse_text(self, response_text: str) -> str:
+        self.logger.debug(f"Response:\n{response_text}")
+        return response_text.strip()
+
+    def extract_fields(self, user_input: str, context: str = "") -> Dict[str, Any]:
+        self.logger.info("extract_fields method called")
+        return self._call("extract_fields", self._extract_prompt(user_input, context), self._parse_fields, self._empty_fields)
+
+    async def extract_fields_async(self, user_input: str, context: str = "") -> Dict[str, Any]:
+        self.logger.info("extract_fields_async method called")
+        return await self._call_async("extract_fields_async", self._extract_prompt(user_input, context),
+                                      self._parse_fields, self._empty_fields)
+
+    def _summary_prompt(self, fields: Dict[str, Any]) -> str:
         # Load prompt template from config (reloadable)
-        prompt_template = self.config.get(
+        prompt_template = self._template(
             'gemini.summary_prompt',
             """Based on the following extracted information, generate a clear and concise Jira ticket summary (title).
 
@@ -123,27 +183,25 @@ Environment: {environment}
 Generate ONLY the summary text, nothing else. Keep it under 120 characters."""
         )
 
-        prompt = prompt_template.format(
+        return prompt_template.format(
             issue_type=fields.get('Issue Type'),
             description=fields.get('Description'),
             environment=fields.get('Environment')
         )
 
-        try:
-            self.logger.debug(f"Prompt:\n{prompt}")
-            self.logger.debug("Calling Gemini API for summary generation")
-            response_text = self.transport.generate_content(prompt)
-            self.logger.debug(f"Response:\n{response_text}")
-            self.logger.info("Summary generated successfully")
-            return response_text.strip()
-        except Exception as e:
-            self.logger.error(f"Error in generate_summary method: {e}", exc_info=True)
-            return fields.get('Summary') or "New Issue"
+    def generate_summary(self, fields: Dict[str, Any]) -> str:
+        self.logger.info("generate_summary method called")
+        return self._call("generate_summary", self._summary_prompt(fields), self._parse_text,
+                          lambda: fields.get('Summary') or "New Issue")
 
-    def generate_description(self, fields: Dict[str, Any], user_input: str) -> str:
-        self.logger.info("generate_description method called")
+    async def generate_summary_async(self, fields: Dict[str, Any]) -> str:
+        self.logger.info("generate_summary_async method called")
+        return await self._call_async("generate_summary_async", self._summary_prompt(fields), self._parse_text,
+                                      lambda: fields.get('Summary') or "New Issue")
+
+    def _description_prompt(self, fields: Dict[str, Any], user_input: str) -> str:
         # Load prompt template from config at runtime (reloads if config.yaml changes)
-        prompt_template = self.config.get(
+        prompt_template = self._template(
             'gemini.description_prompt',
             """Улучши и оптимизируй следующее описание для заявки Jira.
 
@@ -163,25 +221,23 @@ Generate ONLY the summary text, nothing else. Keep it under 120 characters."""
         )
 
         # Format the template with runtime values
-        prompt = prompt_template.format(user_input=user_input, fields=fields)
+        return prompt_template.format(user_input=user_input, fields=fields)
 
-        try:
-            self.logger.debug(f"Prompt:\n{prompt}")
-            self.logger.debug("Calling Gemini API for description generation")
-            response_text = self.transport.generate_content(prompt)
-            self.logger.debug(f"Response:\n{response_text}")
-            self.logger.info("Description generated successfully")
-            return response_text.strip()
-        except Exception as e:
-            self.logger.error(f"Error in generate_description method: {e}", exc_info=True)
-            return user_input
+    def generate_description(self, fields: Dict[str, Any], user_input: str) -> str:
+        self.logger.info("generate_description method called")
+        return self._call("generate_description", self._description_prompt(fields, user_input), self._parse_text,
+                          lambda: user_input)
 
-    def ask_clarification(self, missing_fields: list, user_input: str) -> str:
-        self.logger.info(f"ask_clarification method called for fields: {missing_fields}")
+    async def generate_description_async(self, fields: Dict[str, Any], user_input: str) -> str:
+        self.logger.info("generate_description_async method called")
+        return await self._call_async("generate_description_async", self._description_prompt(fields, user_input),
+                                      self._parse_text, lambda: user_input)
+
+    def _clarification_prompt(self, missing_fields: list, user_input: str) -> str:
         fields_str = ", ".join(missing_fields)
 
         # Load prompt template from config (reloadable)
-        prompt_template = self.config.get(
+        prompt_template = self._template(
             'gemini.clarification_prompt',
             """The user is creating a Jira ticket. Based on their description, we still need clarification on:
 {missing_fields}
@@ -191,16 +247,45 @@ Original description: {user_input}
 Ask for clarification on the missing fields in a friendly and concise way. Be specific about what information you need."""
         )
 
-        prompt = prompt_template.format(missing_fields=fields_str, user_input=user_input)
+        return prompt_template.format(missing_fields=fields_str, user_input=user_input)
 
-        try:
-            self.logger.debug(f"Prompt:\n{prompt}")
-            self.logger.debug("Calling Gemini API for clarification")
-            response_text = self.transport.generate_content(prompt)
-            self.logger.debug(f"Response:\n{response_text}")
-            self.logger.info("Clarification generated successfully")
-            return response_text.strip()
-        except Exception as e:
-            self.logger.error(f"Error in ask_clarification method: {e}", exc_info=True)
-            fields_str = ", ".join(missing_fields)
-            return f"Please provide information for: {fields_str}"
+    def ask_clarification(self, missing_fields: list, user_input: str) -> str:
+        self.logger.info(f"ask_clarification method called for fields: {missing_fields}")
+        return self._call("ask_clarification", self._clarification_prompt(missing_fields, user_input), self._parse_text,
+                          lambda: f"Please provide information for: {', '.join(missing_fields)}")
+
+    async def ask_clarification_async(self, missing_fields: list, user_input: str) -> str:
+        self.logger.info(f"ask_clarification_async method called for fields: {missing_fields}")
+        return await self._call_async("ask_clarification_async", self._clarification_prompt(missing_fields, user_input),
+                                      self._parse_text, lambda: f"Please provide information for: {', '.join(missing_fields)}")
+
+    async def process_async(self, user_input: str, context: str = "",
+                            required_fields: Sequence[str] = ()) -> Dict[str, Any]:
+        """Extracts fields, then writes the summary, description and, if any of
+        required_fields is still empty, a clarification question concurrently."""
+        fields = await self.extract_fields_async(user_input, context)
+        missing = [field for field in required_fields if not fields.get(field)]
+        calls = [self.generate_summary_async(fields), self.generate_description_async(fields, user_input)]
+        if missing:
+            calls.append(self.ask_clarification_async(missing, user_input))
+        summary, description, *clarification = await asyncio.gather(*calls)
+        return {
+            "fields": fields,
+            "summary": summary,
+            "description": description,
+            "missing_fields": missing,
+            "clarification": clarification[0] if clarification else None
+        }
+
+    async def process_batch(self, user_inputs: Sequence[str], context: str = "",
+                            required_fields: Sequence[str] = (), concurrency: int = 4) -> List[Dict[str, Any]]:
+        """process_async for many inputs, at most ``concurrency`` at a time, results in input order.
+        Model calls across all items are still capped by max_concurrency."""
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one(user_input: str) -> Dict[str, Any]:
+            async with limit:
+                return await self.process_async(user_input, context, required_fields)
+
+        self.logger.info(f"process_batch called for {len(user_inputs)} inputs")
+        return await asyncio.gather(*(one(user_input) for user_input in user_inputs))
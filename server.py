@@ -1,4 +1,9 @@
+import time
+# Measured from here, before the heavy imports, for the startup time logged once serving
+STARTED = time.perf_counter()
+
 import os
+import re
 import json
 import uuid
 import socket
@@ -8,21 +13,62 @@ import hashlib
 import base64
 import sys
 import argparse
+import importlib.util
+import sqlite3
+import threading
+import random
+import signal
+import tempfile
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from urllib.parse import urlencode
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+from email.utils import parsedate_to_datetime
 
-import uvicorn
-import requests
+import httpx
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response, JSONResponse, StreamingResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # --- Arguments & Logging ---
 parser = argparse.ArgumentParser()
 parser.add_argument("--debug", action="store_true", help="Enable debug logging")
 parser.add_argument("--ignore-ssl-errors", action="store_true", help="Ignore SSL certificate errors")
-args = parser.parse_args()
+parser.add_argument("--max-connections", type=int, default=100, help="Max pooled upstream connections in total")
+parser.add_argument("--max-connections-per-host", type=int, default=20, help="Max concurrent upstream requests per host")
+parser.add_argument("--max-keepalive", type=int, default=20, help="Max idle keep-alive connections kept in the pool")
+parser.add_argument("--keepalive-expiry", type=float, default=30.0, help="Seconds an idle keep-alive connection is kept")
+parser.add_argument("--connect-timeout", type=float, default=10.0, help="Upstream connect timeout in seconds")
+parser.add_argument("--timeout", type=float, default=60.0, help="Upstream read/write timeout in seconds")
+parser.add_argument("--no-http2", action="store_true", help="Disable HTTP/2 for upstream connections")
+parser.add_argument("--cache", action="store_true", help="Cache identical chat completion responses on disk")
+parser.add_argument("--cache-path", default="~/.stringlom_cache.sqlite", help="SQLite file for the response cache")
+parser.add_argument("--cache-max-mb", type=float, default=256, help="Max total size of cached responses (MB)")
+parser.add_argument("--cache-max-entries", type=int, default=100000, help="Max number of cached responses")
+parser.add_argument("--cache-ttl", type=float, default=7 * 24 * 3600, help="Seconds a cached response stays valid")
+parser.add_argument("--datasets-dir", default=None, help="Directory of datasets that /chain/run compare blocks can name")
+parser.add_argument("--rpm", type=int, default=0, help="Max upstream requests per minute per host, split evenly across --workers, at least 1 each (0: learn from 429s and rate-limit headers)")
+parser.add_argument("--tpm", type=int, default=0, help="Max upstream tokens per minute per host, split evenly across --workers, at least 1 each (0: learn from rate-limit headers)")
+parser.add_argument("--max-retries", type=int, default=4, help="Retries of an upstream request after a 429, 5xx or connection error")
+parser.add_argument("--retry-base-delay", type=float, default=0.5, help="First retry delay in seconds without Retry-After; doubles per attempt, with jitter")
+parser.add_argument("--retry-max-delay", type=float, default=60.0, help="Longest delay to wait before a retry, including Retry-After")
+parser.add_argument("--breaker-threshold", type=int, default=5, help="Consecutive 5xx or connection errors that open a host's circuit")
+parser.add_argument("--breaker-cooldown", type=float, default=30.0, help="Seconds an open circuit rejects requests before letting one probe through")
+parser.add_argument("--trace-log", default=None, help="Append one JSON line per request (timings, upstream, tokens) to this file")
+parser.add_argument("--oauth-store", default="~/.stringlom_oauth.json", help="File where the proxy keeps Qwen OAuth tokens to refresh and attach them")
+parser.add_argument("--get-cache-ttl", type=float, default=30.0, help="Seconds a successful proxied GET (e.g. /models) is answered from memory (0: off)")
+parser.add_argument("--workers", type=int, default=1, help="Worker processes forked to share the listening socket (POSIX only); each learns rate limits and serves /metrics for itself alone")
+parser.add_argument("--eval-workers", type=int, default=0, help="Sandbox processes evaluating /chain/evaluate candidates in parallel (0: one per CPU)")
+parser.add_argument("--eval-timeout", type=float, default=10.0, help="Longest time in seconds a /chain/evaluate candidate may run")
+parser.add_argument("--eval-memory-mb", type=float, default=256, help="Address-space limit of each sandbox process (MB)")
+parser.add_argument("--results-dir", default=None, help="Directory for uploaded sources and paged chain results (default: a private temp directory)")
+parser.add_argument("--results-max-mb", type=float, default=2048, help="Max total size of kept sources and results (MB); the oldest are removed first")
+parser.add_argument("--batch-concurrency", type=int, default=4, help="Default parallel upstream calls per /llm/batch request")
+# Imported by another program (an ASGI server, tests), argv is not ours to reject
+args = parser.parse_args() if __name__ == "__main__" else parser.parse_known_args()[0]
 
 log_level = logging.DEBUG if args.debug else logging.INFO
 logging.basicConfig(level=log_level, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -31,44 +77,667 @@ logger = logging.getLogger(__name__)
 # --- SSL Configuration ---
 if args.ignore_ssl_errors:
     logger.warning("SSL certificate verification is DISABLED - this is insecure!")
-    # Disable SSL warnings when verification is off
-    import urllib3
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 HOST = "127.0.0.1"
 CONFIG_FILE = os.path.expanduser("~/config.json")
 
-def get_free_port():
-    for port in range(20000, 30001):
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            try:
-                s.bind((HOST, port))
-                return port
-            except socket.error:
-                continue
-    raise RuntimeError("No free ports in range 20000-30000")
-
-def load_or_create_config():
+def load_config():
+    """The saved port (None if none yet) and UUID; nothing is written until the server binds."""
     if os.path.exists(CONFIG_FILE):
         try:
             with open(CONFIG_FILE, 'r') as f:
                 config = json.load(f)
-                return config['port'], config['uuid']
+                return config.get('port'), config['uuid']
         except Exception as e:
             logger.error(f"Error loading config: {e}")
+    return None, str(uuid.uuid4())
 
-    port = get_free_port()
-    api_uuid = str(uuid.uuid4())
-    config = {'port': port, 'uuid': api_uuid}
+def save_config(port: int, api_uuid: str):
+    tmp = f"{CONFIG_FILE}.{os.getpid()}.tmp"
     try:
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(config, f, indent=4)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'port': port, 'uuid': api_uuid}, f, indent=4)
+        os.replace(tmp, CONFIG_FILE)
     except Exception as e:
         logger.error(f"Error saving config: {e}")
-    return port, api_uuid
 
-PORT, API_UUID = load_or_create_config()
-BASE_URL = f"http://{HOST}:{PORT}/{API_UUID}"
+def bind_socket(port: Optional[int]) -> socket.socket:
+    """Listens on the saved port, or on one the OS assigns when it is unset or taken."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.bind((HOST, port or 0))
+    except OSError:
+        logger.warning(f"Port {port} is in use, letting the OS pick another")
+        sock.bind((HOST, 0))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+PORT, API_UUID = load_config()
+
+def base_url() -> str:
+    return f"http://{HOST}:{PORT}/{API_UUID}"
+
+# --- Response Cache ---
+class ResponseCache:
+    """On-disk LRU cache of chat completion responses keyed by the normalized request."""
+
+    def __init__(self, path: str, max_bytes: int, max_entries: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.expanduser(path), check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, body BLOB NOT NULL, size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self.total_bytes, self.entries = self.conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM responses").fetchone()
+
+    @staticmethod
+    def make_key(target_url: str, body: Any) -> Optional[str]:
+        # Only non-streaming chat completions are cacheable
+        if not isinstance(body, dict) or not isinstance(body.get("messages"), list) or body.get("stream"):
+            return None
+        # Every field but "stream" can change the reply (max_tokens, tools, seed, stop, ...)
+        params = {k: v for k, v in body.items() if k != "stream"}
+        normalized = json.dumps({"url": target_url.strip().rstrip("/"), "body": params},
+                                sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT body, size, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            body, size, created = row
+            if now - created > self.ttl:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.total_bytes -= size
+                self.entries -= 1
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(body)
+
+    def put(self, key: str, data: Any):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        if len(body) > self.max_bytes:
+            return
+        now = time.time()
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if old:
+                self.total_bytes -= old[0]
+                self.entries -= 1
+            self.conn.execute("INSERT OR REPLACE INTO responses (key, body, size, created, accessed) VALUES (?, ?, ?, ?, ?)", (key, body, len(body), now, now))
+            self.total_bytes += len(body)
+            self.entries += 1
+            self.evict(now)
+
+    def evict(self, now: float):
+        expired = self.conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM responses WHERE created < ?", (now - self.ttl,)).fetchone()
+        if expired[1]:
+            self.conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            self.total_bytes -= expired[0]
+            self.entries -= expired[1]
+            self.evictions += expired[1]
+        # Least recently used entries go first
+        while self.entries > self.max_entries or self.total_bytes > self.max_bytes:
+            rows = self.conn.execute("SELECT key, size FROM responses ORDER BY accessed LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self.entries <= self.max_entries and self.total_bytes <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.total_bytes -= size
+                self.entries -= 1
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": self.entries,
+            "bytes": self.total_bytes
+        }
+
+    def close(self):
+        self.conn.close()
+
+class UpstreamError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+# --- Metrics & Tracing ---
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+METRICS_HELP = {
+    "stringlom_requests_total": ("counter", "Requests served by the proxy"),
+    "stringlom_request_duration_seconds": ("histogram", "Time from receiving a request to sending the last response byte"),
+    "stringlom_requests_in_flight": ("gauge", "Requests being served"),
+    "stringlom_request_bytes_total": ("counter", "Request body bytes received from clients"),
+    "stringlom_response_bytes_total": ("counter", "Response body bytes sent to clients"),
+    "stringlom_upstream_requests_total": ("counter", "Upstream attempts by response status ('error' for connection errors)"),
+    "stringlom_upstream_duration_seconds": ("histogram", "Time from sending an upstream request to its response headers"),
+    "stringlom_upstream_queue_seconds": ("histogram", "Time an upstream request waited for rate limits and host slots"),
+    "stringlom_upstream_retries_total": ("counter", "Upstream retries by the status that caused them"),
+    "stringlom_upstream_tokens_total": ("counter", "Tokens reported in upstream usage fields"),
+    "stringlom_cache_requests_total": ("counter", "Response cache lookups"),
+    "stringlom_coalesced_requests_total": ("counter", "Requests answered by an identical request's upstream call"),
+    "stringlom_cache_entries": ("gauge", "Responses in the cache"),
+    "stringlom_cache_bytes": ("gauge", "Size of the cached responses"),
+    "stringlom_upstream_rpm_limit": ("gauge", "Requests/minute the limiter currently allows a host (absent while unlimited)"),
+    "stringlom_upstream_circuit_open": ("gauge", "1 while a host's circuit breaker rejects requests"),
+}
+# The trace of the request being handled; filled in by the middleware and the upstream send path
+current_trace: ContextVar[Optional[Dict]] = ContextVar("current_trace", default=None)
+
+def _label_key(labels: Optional[Dict]) -> Tuple:
+    return tuple(sorted((labels or {}).items()))
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(key: Tuple) -> str:
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in key) + "}" if key else ""
+
+class Metrics:
+    """Counters, gauges and histograms rendered in the Prometheus text format.
+
+    Kept per process: with --workers, a scrape sees only the worker that accepted it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values: Dict[str, Dict[Tuple, float]] = {}
+        self.histograms: Dict[str, Dict[Tuple, List[float]]] = {} # buckets..., sum, count
+
+    def inc(self, name: str, labels: Optional[Dict] = None, value: float = 1.0):
+        key = _label_key(labels)
+        with self.lock:
+            series = self.values.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, labels: Optional[Dict], value: Optional[float]):
+        key = _label_key(labels)
+        with self.lock:
+            series = self.values.setdefault(name, {})
+            if value is None:
+                series.pop(key, None)
+            else:
+                series[key] = value
+
+    def observe(self, name: str, labels: Optional[Dict], value: float):
+        key = _label_key(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            counts = series.get(key)
+            if counts is None:
+                counts = series[key] = [0.0] * (len(LATENCY_BUCKETS) + 2)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def render(self) -> str:
+        lines = []
+        with self.lock:
+            for name, (kind, text) in METRICS_HELP.items():
+                series = self.histograms.get(name) if kind == "histogram" else self.values.get(name)
+                if not series:
+                    continue
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(series.items()):
+                    if kind != "histogram":
+                        lines.append(f"{name}{_format_labels(key)} {value:g}")
+                        continue
+                    bounds = [f"{bound:g}" for bound in LATENCY_BUCKETS] + ["+Inf"]
+                    for bound, count in zip(bounds, value[:len(LATENCY_BUCKETS)] + [value[-1]]):
+                        lines.append(f"{name}_bucket{_format_labels(key + (('le', bound),))} {count:g}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {value[-2]:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {value[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+class TraceLog:
+    """One JSON object per served request, appended to --trace-log."""
+
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.file = open(os.path.expanduser(path), "a", encoding="utf-8", buffering=1)
+
+    def write(self, trace: Dict):
+        line = json.dumps(trace, ensure_ascii=False, separators=(",", ":"))
+        with self.lock:
+            self.file.write(line + "\n")
+
+    def close(self):
+        self.file.close()
+
+def upstream_labels(target_url: str, body: Any) -> Dict:
+    model = body.get("model") if isinstance(body, dict) else None
+    return {"host": urlparse(target_url).netloc, "model": model or ""}
+
+# --- Rate Limiting & Retries ---
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Raised before any of the request reached the upstream, so a retry cannot run it twice
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Seconds of a bucket's rate that may be spent at once
+BURST_SECONDS = 10
+
+class CircuitOpenError(Exception):
+    def __init__(self, netloc: str, retry_after: float):
+        super().__init__(f"Upstream {netloc} is failing; requests are paused for {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """Refills ``rate`` units per second; a rate of None means no limit."""
+
+    def __init__(self, rate: Optional[float] = None):
+        self.rate = rate
+        self.tokens = self.capacity()
+        self.updated = time.monotonic()
+
+    def capacity(self) -> float:
+        return max((self.rate or 0) * BURST_SECONDS, 1.0)
+
+    def set_rate(self, rate: Optional[float]):
+        self.refill()
+        self.rate = rate
+        self.tokens = min(self.tokens, self.capacity())
+
+    def refill(self):
+        now = time.monotonic()
+        if self.rate is not None:
+            self.tokens = min(self.capacity(), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Takes ``amount`` now, going into debt if needed; returns the seconds until it is covered."""
+        if self.rate is None:
+            return 0.0
+        self.refill()
+        self.tokens -= amount
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+class UpstreamLimiter:
+    """Request and token budgets of one upstream host, plus its circuit breaker.
+
+    Without a configured --rpm the request rate is unlimited until the first 429; from then on
+    it is halved on every 429 and raised by one request per minute on every success (AIMD),
+    never above a limit the host announces in x-ratelimit-limit-* headers.
+    """
+
+    def __init__(self, netloc: str):
+        self.netloc = netloc
+        self.max_rpm: Optional[float] = args.rpm or None
+        self.max_tpm: Optional[float] = args.tpm or None
+        self.rpm = self.max_rpm
+        self.requests = TokenBucket(self.rpm / 60 if self.rpm else None)
+        self.tokens = TokenBucket(self.max_tpm / 60 if self.max_tpm else None)
+        self.paused_until = 0.0
+        self.sent: deque = deque()  # send times within the last minute
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+
+    async def acquire(self, tokens: int) -> bool:
+        """Waits for the budgets; True if this request is the half-open circuit's probe.
+
+        The probe must end in record() or, if it is never sent, in release_probe().
+        """
+        now = time.monotonic()
+        probe = False
+        if self.failures >= args.breaker_threshold:
+            # Half-open after the cooldown: one probe request decides whether the circuit closes
+            if now < self.open_until or self.probing:
+                raise CircuitOpenError(self.netloc, max(self.open_until - now, 1.0))
+            self.probing = probe = True
+        delay = max(self.paused_until - now, self.requests.reserve(1), self.tokens.reserve(tokens))
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Cancelled while waiting (the client went away): let another request probe
+                self.release_probe(probe)
+                raise
+        now = time.monotonic()
+        self.sent.append(now)
+        while self.sent and self.sent[0] < now - 60:
+            self.sent.popleft()
+        return probe
+
+    def release_probe(self, probe: bool):
+        if probe:
+            self.probing = False
+
+    def set_rpm(self, rpm: Optional[float]):
+        if rpm is not None and self.max_rpm is not None:
+            rpm = min(rpm, self.max_rpm)
+        self.rpm = rpm
+        self.requests.set_rate(rpm / 60 if rpm else None)
+
+    def learn(self, headers: httpx.Headers):
+        for name, attr, bucket in (("x-ratelimit-limit-requests", "max_rpm", self.requests), ("x-ratelimit-limit-tokens", "max_tpm", self.tokens)):
+            try:
+                limit = float(headers[name])
+            except (KeyError, ValueError):
+                continue
+            if limit > 0 and (getattr(self, attr) is None or limit < getattr(self, attr)):
+                setattr(self, attr, limit)
+                if attr == "max_tpm":
+                    bucket.set_rate(limit / 60)
+                elif self.rpm is None or self.rpm > limit:
+                    self.set_rpm(limit)
+
+    def record(self, status_code: Optional[int], headers: Optional[httpx.Headers] = None, retry_after: Optional[float] = None):
+        """Updates the budgets and the breaker from one response; status None is a connection error."""
+        if headers is not None:
+            self.learn(headers)
+        if status_code is None or status_code >= 500:
+            self.failures += 1
+            self.probing = False
+            if self.failures >= args.breaker_threshold:
+                self.open_until = time.monotonic() + args.breaker_cooldown
+                logger.warning(f"Circuit for {self.netloc} opened after {self.failures} failures")
+            return
+        if self.failures >= args.breaker_threshold:
+            logger.info(f"Circuit for {self.netloc} closed")
+        self.failures = 0
+        self.probing = False
+        if status_code == 429:
+            self.set_rpm(max((self.rpm or self.observed_rpm()) / 2, 1))
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        elif self.rpm is not None and status_code < 400:
+            self.set_rpm(self.rpm + 1)
+
+    def observed_rpm(self) -> float:
+        if not self.sent:
+            return 1.0
+        span = min(max(time.monotonic() - self.sent[0], 1.0), 60.0)
+        return len(self.sent) * 60 / span
+
+    def record_usage(self, estimated: int, used: Optional[int]):
+        # Settle the estimate reserved before sending with the tokens the response reports
+        if used is not None:
+            self.tokens.reserve(used - estimated)
+
+def estimate_tokens(body: Any) -> int:
+    """Rough prompt size (about four characters per token) reserved from the tokens/minute budget."""
+    if not isinstance(body, dict) or not isinstance(body.get("messages"), list):
+        return 0
+    return len(json.dumps(body["messages"], ensure_ascii=False)) // 4 + int(body.get("max_tokens") or 0)
+
+def retry_after_seconds(headers: httpx.Headers) -> Optional[float]:
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int) -> float:
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(args.retry_base_delay * 2 ** attempt, args.retry_max_delay))
+
+# --- OAuth ---
+# Tokens are refreshed when they have less than this many seconds left
+REFRESH_MARGIN = 300
+OAUTH_HEADERS = {
+    "Accept": "application/json",
+    "User-Agent": "vscode-qwen-copilot/0.2.0"
+}
+
+class PKCEStore:
+    """Code verifiers of pending device authorizations, dropped when their device code expires."""
+
+    def __init__(self, ttl: float = 900, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict() # device_code -> (verifier, expiry)
+
+    def prune(self):
+        now = time.monotonic()
+        for device_code in [key for key, (_, expiry) in self.entries.items() if expiry <= now]:
+            del self.entries[device_code]
+
+    def put(self, device_code: str, verifier: str, ttl: Optional[float] = None):
+        self.prune()
+        self.entries[device_code] = (verifier, time.monotonic() + (ttl or self.ttl))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, device_code: str) -> Optional[str]:
+        self.prune()
+        entry = self.entries.get(device_code)
+        return entry[0] if entry else None
+
+    def pop(self, device_code: str):
+        self.entries.pop(device_code, None)
+
+    def __len__(self) -> int:
+        self.prune()
+        return len(self.entries)
+
+class OAuthTokens:
+    """Qwen OAuth credentials kept by the proxy and refreshed shortly before they expire."""
+
+    def __init__(self, path: str, token_url: str, client_id: str):
+        self.path = os.path.expanduser(path)
+        self.token_url = token_url
+        self.client_id = client_id
+        self.lock = asyncio.Lock()
+        self.issued: deque = deque(maxlen=16) # earlier access tokens that browsers may still send
+        self.creds: Dict = {}
+        self.mtime = None
+        self.sync()
+
+    def sync(self):
+        """Picks up tokens another worker process saved since they were last read."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self.mtime:
+                return
+            with open(self.path) as f:
+                creds = json.load(f)
+        except (OSError, ValueError):
+            return
+        if self.creds.get("access_token") and self.creds["access_token"] != creds.get("access_token"):
+            self.issued.append(self.creds["access_token"])
+        self.creds, self.mtime = creds, mtime
+
+    @property
+    def authorized(self) -> bool:
+        return bool(self.creds.get("access_token"))
+
+    def resource_host(self) -> str:
+        url = self.creds.get("resource_url") or ""
+        return urlparse(url if "://" in url else f"https://{url}").netloc
+
+    def owns(self, token: str) -> bool:
+        return token == self.creds.get("access_token") or token in self.issued
+
+    def update(self, data: Dict):
+        if self.creds.get("access_token") and self.creds["access_token"] != data["access_token"]:
+            self.issued.append(self.creds["access_token"])
+        self.creds = {
+            "access_token": data["access_token"],
+            "refresh_token": data.get("refresh_token") or self.creds.get("refresh_token"),
+            "expires_at": time.time() + float(data.get("expires_in") or 3600),
+            "resource_url": data.get("resource_url") or self.creds.get("resource_url")
+        }
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.creds, f)
+            self.mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            logger.error(f"Error saving OAuth tokens: {e}")
+
+    def status(self) -> Dict:
+        return {
+            "authorized": self.authorized,
+            "expires_at": self.creds.get("expires_at"),
+            "resource_url": self.creds.get("resource_url")
+        }
+
+    def needs_refresh(self) -> bool:
+        return bool(self.creds.get("refresh_token")) and self.creds.get("expires_at", 0) - time.time() < REFRESH_MARGIN
+
+    async def access_token(self, client: httpx.AsyncClient) -> str:
+        if self.needs_refresh():
+            # Concurrent requests wait for one refresh instead of each sending their own
+            async with self.lock:
+                if self.needs_refresh():
+                    await self.refresh(client)
+        return self.creds["access_token"]
+
+    async def refresh(self, client: httpx.AsyncClient):
+        payload = {"grant_type": "refresh_token", "client_id": self.client_id, "refresh_token": self.creds["refresh_token"]}
+        try:
+            r = await client.post(self.token_url, data=payload, headers=OAUTH_HEADERS)
+            data = r.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"OAuth token refresh failed: {e}")
+            return
+        if r.status_code == 200 and isinstance(data, dict) and data.get("access_token"):
+            self.update(data)
+            logger.debug("OAuth token refreshed")
+        else:
+            logger.warning(f"OAuth token refresh rejected ({r.status_code}): {data}")
+            # Another worker may have rotated the refresh token first
+            self.sync()
+
+# --- Request Coalescing ---
+# Most GET responses kept for --get-cache-ttl
+RECENT_GETS = 256
+
+class StreamTee:
+    """Relays one upstream stream to every request that shares it.
+
+    Readers pull: the next chunk is read from upstream only when the fastest reader needs it.
+    Requests can join until the first chunk arrives; after that ``detach`` makes identical
+    requests start their own call. A chunk is dropped once every reader is past it, so only
+    the gap between the slowest and the fastest reader is held in memory.
+    The upstream response is closed once no reader is left and no request is still waiting to become one.
+    """
+
+    def __init__(self, response: httpx.Response, host_limit: asyncio.Semaphore, headers: Dict, detach, has_waiters):
+        self.response = response
+        self.status_code = response.status_code
+        self.headers = headers
+        self.host_limit = host_limit
+        self.detach = detach
+        self.has_waiters = has_waiters
+        self.upstream = response.aiter_bytes()
+        self.chunks: List[bytes] = []
+        self.base = 0 # index in the stream of chunks[0]
+        self.positions: Dict[object, int] = {} # reader -> index of its next chunk
+        self.finished = False
+        self.fetching = False
+        self.changed = asyncio.Event()
+        self.readers = 0
+        self.closing = None
+
+    async def fetch(self):
+        self.fetching = True
+        try:
+            self.chunks.append(await self.upstream.__anext__())
+            if self.base + len(self.chunks) == 1:
+                self.detach()
+        except StopAsyncIteration:
+            await self.close()
+        except Exception as e:
+            logger.error(f"Proxy stream error: {str(e)}")
+            await self.close()
+        finally:
+            self.fetching = False
+            changed, self.changed = self.changed, asyncio.Event()
+            changed.set()
+
+    async def close(self):
+        if not self.finished:
+            self.finished = True
+            # Released first: the close below may be interrupted by the client going away
+            self.detach()
+            self.host_limit.release()
+            await self.response.aclose()
+
+    def join(self) -> object:
+        """Adds a reader starting at the first chunk."""
+        reader = object()
+        self.readers += 1
+        self.positions[reader] = 0
+        return reader
+
+    def trim(self):
+        # A request still waiting on the flight will start from the first chunk
+        if self.has_waiters():
+            return
+        consumed = min(self.positions.values(), default=self.base + len(self.chunks)) - self.base
+        if consumed > 0:
+            del self.chunks[:consumed]
+            self.base += consumed
+
+    def leave(self, reader: object):
+        """Ends one reader (started or not); the last one out closes the stream."""
+        self.readers -= 1
+        self.positions.pop(reader, None)
+        self.trim()
+        if not self.readers and not self.has_waiters() and not self.finished and self.closing is None:
+            # A task of its own, so a cancelled request cannot interrupt it
+            self.closing = asyncio.ensure_future(self.close())
+
+    async def read(self, reader: object):
+        while True:
+            i = self.positions[reader]
+            if i < self.base + len(self.chunks):
+                chunk = self.chunks[i - self.base]
+                self.positions[reader] = i + 1
+                self.trim()
+                yield chunk
+            elif self.finished:
+                return
+            elif self.fetching:
+                await self.changed.wait()
+            else:
+                await self.fetch()
+
+
+class TeeResponse(StreamingResponse):
+    """One request's pass over a StreamTee, counted as a reader from creation until it is sent or dropped."""
+
+    def __init__(self, tee: StreamTee):
+        self.tee = tee
+        self.reader = tee.join()
+        super().__init__(tee.read(self.reader), status_code=tee.status_code, headers=tee.headers)
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.tee.leave(self.reader)
 
 # --- Providers (Strategy Pattern) ---
 class BaseProvider(ABC):
@@ -77,48 +746,263 @@ class BaseProvider(ABC):
         pass
 
     @abstractmethod
-    async def proxy_request(self, target_url: str, method: str, headers: Dict, body: Any) -> JSONResponse:
+    async def proxy_request(self, target_url: str, method: str, headers: Dict, body: Any) -> Response:
         pass
 
 class QwenProvider(BaseProvider):
     def get_name(self) -> str:
         return "qwen"
 
-    def __init__(self):
+    def __init__(self, cache: Optional[ResponseCache] = None):
         self.oauth_base = "https://chat.qwen.ai"
         self.device_code_url = f"{self.oauth_base}/api/v1/oauth2/device/code"
         self.token_url = f"{self.oauth_base}/api/v1/oauth2/token"
         self.client_id = "f0304373b74a44d2b584a3fb70ca9e56"
         self.scope = "openid profile email model.completion"
-        self.pkce_store = {} # device_code -> verifier
+        self.pkce_store = PKCEStore()
+        self.tokens = OAuthTokens(args.oauth_store, self.token_url, self.client_id)
         self.verify_ssl = not args.ignore_ssl_errors  # Use global args flag
+        self.client: Optional[httpx.AsyncClient] = None
+        self.starting = asyncio.Lock()
+        self.http2 = False
+        self.host_limits: Dict[str, asyncio.Semaphore] = {} # netloc -> semaphore
+        self.limiters: Dict[str, UpstreamLimiter] = {} # netloc -> limiter
+        self.flights: Dict[str, asyncio.Future] = {} # request key -> shared upstream call
+        self.waiting: Dict[asyncio.Future, int] = {} # flight -> requests awaiting its result
+        self.recent_gets: "OrderedDict[str, Tuple[float, int, Any, Dict]]" = OrderedDict() # request key -> (expiry, status, content, headers)
+        self.cache = cache
 
-    async def proxy_request(self, target_url: str, method: str, headers: Dict, body: Any) -> JSONResponse:
-        logger.debug(f"Proxying {method} to {target_url}")
+    def create_client(self) -> httpx.AsyncClient:
+        # HTTP/2 needs the optional 'h2' package; fall back to keep-alive HTTP/1.1 without it
+        self.http2 = not args.no_http2 and importlib.util.find_spec("h2") is not None
+        return httpx.AsyncClient(
+            http2=self.http2,
+            verify=self.verify_ssl,
+            follow_redirects=True,
+            timeout=httpx.Timeout(args.timeout, connect=args.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=args.max_connections,
+                max_keepalive_connections=args.max_keepalive,
+                keepalive_expiry=args.keepalive_expiry
+            )
+        )
+
+    async def start(self):
+        if self.client is None:
+            async with self.starting:
+                if self.client is None:
+                    # Loading the CA bundle takes a few hundred ms; keep it off the event loop
+                    self.client = await asyncio.to_thread(self.create_client)
+                    logger.debug(f"Upstream client opened (http2={self.http2})")
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def host_limit(self, netloc: str) -> asyncio.Semaphore:
+        if netloc not in self.host_limits:
+            self.host_limits[netloc] = asyncio.Semaphore(args.max_connections_per_host)
+        return self.host_limits[netloc]
+
+    def limiter(self, netloc: str) -> UpstreamLimiter:
+        if netloc not in self.limiters:
+            self.limiters[netloc] = UpstreamLimiter(netloc)
+        return self.limiters[netloc]
+
+    async def send(self, method: str, target_url: str, headers: Dict, body: Any) -> httpx.Response:
+        """Sends a request within the host's budgets, retrying 429s, 5xx and transport errors.
+
+        Transport errors of non-idempotent methods are retried only when the request
+        was never sent (UNSENT_ERRORS): a completion that timed out may still be billed.
+
+        Returns the unread streaming response with the host slot still held; the caller
+        closes the response and releases host_limit(netloc).
+        """
+        netloc = urlparse(target_url).netloc
+        limiter = self.limiter(netloc)
+        host_limit = self.host_limit(netloc)
+        estimated = estimate_tokens(body)
+        labels = upstream_labels(target_url, body)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.update(upstream=netloc, model=labels["model"], queue_ms=0.0, upstream_ms=0.0, retries=0)
+        attempt = 0
+        while True:
+            queued = time.perf_counter()
+            probe = await limiter.acquire(estimated)
+            try:
+                await host_limit.acquire()
+            except BaseException:
+                limiter.release_probe(probe)
+                raise
+            sent = time.perf_counter()
+            metrics.observe("stringlom_upstream_queue_seconds", {"host": netloc}, sent - queued)
+            try:
+                request = self.client.build_request(method=method, url=target_url, headers=headers, json=body)
+                response = await self.client.send(request, stream=True)
+            except httpx.TransportError as e:
+                host_limit.release()
+                limiter.record(None)
+                metrics.inc("stringlom_upstream_requests_total", {**labels, "status": "error"})
+                if attempt >= args.max_retries or not (method.upper() in IDEMPOTENT_METHODS or isinstance(e, UNSENT_ERRORS)):
+                    raise
+                metrics.inc("stringlom_upstream_retries_total", {**labels, "reason": "error"})
+                delay = backoff_delay(attempt)
+            except BaseException:
+                host_limit.release()
+                limiter.release_probe(probe)
+                raise
+            else:
+                received = time.perf_counter()
+                metrics.observe("stringlom_upstream_duration_seconds", {"host": netloc}, received - sent)
+                metrics.inc("stringlom_upstream_requests_total", {**labels, "status": str(response.status_code)})
+                if trace is not None:
+                    trace["queue_ms"] += (sent - queued) * 1000
+                    trace["upstream_ms"] += (received - sent) * 1000
+                    trace["upstream_status"] = response.status_code
+                retry_after = retry_after_seconds(response.headers)
+                limiter.record(response.status_code, response.headers, retry_after)
+                if (response.status_code not in RETRY_STATUSES or attempt >= args.max_retries
+                        or (retry_after or 0) > args.retry_max_delay):
+                    return response
+                metrics.inc("stringlom_upstream_retries_total", {**labels, "reason": str(response.status_code)})
+                await response.aclose()
+                host_limit.release()
+                delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            attempt += 1
+            if trace is not None:
+                trace["retries"] = attempt
+            logger.debug(f"Retrying {method} {target_url} in {delay:.2f}s (attempt {attempt})")
+            await asyncio.sleep(delay)
 
+    def record_usage(self, target_url: str, body: Any, data: Any):
+        if not isinstance(data, dict) or not isinstance(data.get("usage"), dict):
+            return
+        usage = data["usage"]
+        self.limiter(urlparse(target_url).netloc).record_usage(estimate_tokens(body), usage.get("total_tokens"))
+        labels = upstream_labels(target_url, body)
+        for kind in ("prompt", "completion"):
+            count = usage.get(f"{kind}_tokens")
+            if isinstance(count, (int, float)):
+                metrics.inc("stringlom_upstream_tokens_total", {**labels, "kind": kind}, count)
+        trace = current_trace.get()
+        if trace is not None:
+            trace["usage"] = usage
+
+    def record_cache(self, target_url: str, body: Any, hit: bool):
+        metrics.inc("stringlom_cache_requests_total", {**upstream_labels(target_url, body), "result": "hit" if hit else "miss"})
+        trace = current_trace.get()
+        if trace is not None:
+            trace["cache"] = "hit" if hit else "miss"
+
+    async def authorize(self, target_url: str, headers: Dict) -> Dict:
+        """Attaches the proxy's current OAuth token in place of none or one it issued earlier."""
+        self.tokens.sync()
+        if not self.tokens.authorized:
+            return headers
+        key = next((k for k in headers if k.lower() == "authorization"), None)
+        sent = headers[key] if key else ""
+        bearer = sent[6:].strip() if sent[:6].lower() == "bearer" else None
+        if key and bearer is None:
+            return headers
+        if bearer and not self.tokens.owns(bearer):
+            return headers
+        if not bearer and urlparse(target_url).netloc != self.tokens.resource_host():
+            return headers
+        await self.start()
+        headers = {k: v for k, v in headers.items() if k != key}
+        headers["Authorization"] = f"Bearer {await self.tokens.access_token(self.client)}"
+        return headers
+
+    def filter_headers(self, target_url: str, headers: Dict) -> Dict:
         filtered_headers = {k: v for k, v in headers.items() if k.lower() not in ['host', 'origin', 'referer', 'content-length', 'cookie', 'connection']}
 
-        from urllib.parse import urlparse
         parsed_url = urlparse(target_url)
         filtered_headers['Host'] = parsed_url.netloc
 
         if 'user-agent' not in [k.lower() for k in filtered_headers.keys()]:
             filtered_headers['User-Agent'] = 'vscode-qwen-copilot/0.2.0'
+        return filtered_headers
+
+    async def proxy_request(self, target_url: str, method: str, headers: Dict, body: Any) -> Response:
+        logger.debug(f"Proxying {method} to {target_url}")
+
+        filtered_headers = self.filter_headers(target_url, headers)
+
+        cache_key = self.cache.make_key(target_url, body) if self.cache and method == "POST" else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            self.record_cache(target_url, body, cached is not None)
+            if cached is not None:
+                logger.debug(f"Cache hit for {target_url}")
+                return JSONResponse(content=cached, headers={"X-Cache": "HIT"})
 
+        # Normally opened by the app lifespan; open lazily if used outside of it
+        await self.start()
+        filtered_headers = await self.authorize(target_url, filtered_headers)
+        key = self.flight_key(method, target_url, filtered_headers, body)
+        if method == "GET":
+            hit = self.recent_gets.get(key)
+            if hit is not None and hit[0] > time.monotonic():
+                _, status_code, data, resp_headers = hit
+                return JSONResponse(content=data, status_code=status_code, headers={**resp_headers, "X-Cache": "HIT"})
+
+        # Identical concurrent requests share one upstream call; shielded so one client leaving does not cancel it for the rest
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(self.forward(method, target_url, filtered_headers, body, cache_key, key))
+            self.flights[key] = flight
+            flight.add_done_callback(partial(self.landed, key))
+        else:
+            metrics.inc("stringlom_coalesced_requests_total", upstream_labels(target_url, body))
+            trace = current_trace.get()
+            if trace is not None:
+                trace["coalesced"] = True
+        self.waiting[flight] = self.waiting.get(flight, 0) + 1
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: requests.request(
-                    method=method,
-                    url=target_url,
-                    headers=filtered_headers,
-                    json=body,
-                    timeout=60,
-                    verify=self.verify_ssl,
-                    allow_redirects=True
-                )
-            )
+            result = await asyncio.shield(flight)
+            if isinstance(result, StreamTee):
+                # A reader before it stops being a waiter, so the stream cannot close in between
+                return TeeResponse(result)
+        finally:
+            self.leave_flight(flight)
+        status_code, data, resp_headers = result
+        return JSONResponse(content=data, status_code=status_code, headers=resp_headers)
+
+    @staticmethod
+    def flight_key(method: str, target_url: str, headers: Dict, body: Any) -> str:
+        auth = next((v for k, v in headers.items() if k.lower() == "authorization"), "")
+        normalized = json.dumps([method, target_url, auth, body], sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def leave_flight(self, flight: asyncio.Future):
+        left = self.waiting[flight] - 1
+        if left:
+            self.waiting[flight] = left
+            return
+        del self.waiting[flight]
+        # The last waiter may have left before reading (client gone): then nobody would ever close the stream
+        flight.add_done_callback(self.abandoned)
+
+    def abandoned(self, flight: asyncio.Future):
+        result = None if flight.cancelled() or flight.exception() else flight.result()
+        if isinstance(result, StreamTee) and not result.readers and flight not in self.waiting and not result.finished:
+            if result.closing is None:
+                result.closing = asyncio.ensure_future(result.close())
+
+    def landed(self, key: str, flight: asyncio.Future):
+        # A stream stays joinable until its first chunk arrives; StreamTee removes it then
+        result = None if flight.cancelled() or flight.exception() else flight.result()
+        if not (isinstance(result, StreamTee) and not result.finished) and self.flights.get(key) is flight:
+            del self.flights[key]
+
+    async def forward(self, method: str, target_url: str, headers: Dict, body: Any, cache_key: Optional[str], key: str):
+        """The upstream call of a flight: a StreamTee, or (status, content, headers) of a buffered response."""
+        parsed_url = urlparse(target_url)
+        try:
+            host_limit = self.host_limit(parsed_url.netloc)
+            response = await self.send(method, target_url, headers, body)
 
             resp_headers = dict(response.headers)
             # Remove all potentially conflicting headers
@@ -126,14 +1010,155 @@ class QwenProvider(BaseProvider):
                 if h.lower() in ['content-encoding', 'transfer-encoding', 'content-length', 'connection', 'access-control-allow-origin', 'access-control-allow-credentials', 'access-control-allow-methods', 'access-control-allow-headers']:
                     resp_headers.pop(h, None)
 
+            if self.is_streaming(response):
+                # The host slot and the upstream connection are held until the last chunk is relayed
+                flight = self.flights.get(key)
+                return StreamTee(response, host_limit, resp_headers, lambda: self.flights.get(key) is flight and self.flights.pop(key),
+                                 lambda: flight in self.waiting)
+
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+                host_limit.release()
+
             try:
                 data = response.json()
             except:
                 data = response.text
-            return JSONResponse(content=data, status_code=response.status_code, headers=resp_headers)
+            else:
+                self.record_usage(target_url, body, data)
+                if cache_key and response.status_code == 200:
+                    self.cache.put(cache_key, data)
+            if method == "GET" and response.status_code == 200 and args.get_cache_ttl > 0:
+                self.recent_gets[key] = (time.monotonic() + args.get_cache_ttl, response.status_code, data, resp_headers)
+                self.recent_gets.move_to_end(key)
+                while len(self.recent_gets) > RECENT_GETS:
+                    self.recent_gets.popitem(last=False)
+            return response.status_code, data, resp_headers
+        except CircuitOpenError as e:
+            return 503, {"error": str(e)}, {"Retry-After": str(int(e.retry_after))}
         except Exception as e:
             logger.error(f"Proxy error: {str(e)}")
-            return JSONResponse(content={"error": str(e)}, status_code=502)
+            return 502, {"error": str(e)}, {}
+
+    @staticmethod
+    def is_streaming(response: httpx.Response) -> bool:
+        content_type = response.headers.get('content-type', '').lower()
+        if content_type.startswith('text/event-stream'):
+            return True
+        # Chunked JSON is still buffered and re-wrapped like any other JSON body
+        chunked = 'chunked' in response.headers.get('transfer-encoding', '').lower()
+        return chunked and 'json' not in content_type
+
+    async def complete(self, target_url: str, headers: Dict, payload: Dict) -> Dict:
+        """Sends one non-streaming chat completion and returns its parsed JSON body."""
+        cache_key = self.cache.make_key(target_url, payload) if self.cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            self.record_cache(target_url, payload, cached is not None)
+            if cached is not None:
+                return cached
+
+        filtered_headers = self.filter_headers(target_url, headers)
+        netloc = urlparse(target_url).netloc
+        await self.start()
+        filtered_headers = await self.authorize(target_url, filtered_headers)
+        try:
+            response = await self.send("POST", target_url, filtered_headers, payload)
+        except CircuitOpenError as e:
+            raise UpstreamError(503, str(e))
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+            self.host_limit(netloc).release()
+        try:
+            data = response.json()
+        except ValueError:
+            data = {"error": {"message": response.text or f"HTTP {response.status_code}"}}
+        self.record_usage(target_url, payload, data)
+        if response.status_code >= 400:
+            error = data.get("error") if isinstance(data, dict) else None
+            message = error.get("message") if isinstance(error, dict) else error
+            raise UpstreamError(response.status_code, message or f"HTTP {response.status_code}")
+        if cache_key:
+            self.cache.put(cache_key, data)
+        return data
+
+    async def batch_complete(self, target_url: str, headers: Dict, body: Dict) -> JSONResponse:
+        lines = body.get("lines") or []
+        try:
+            batch_size = max(int(body.get("batchSize") or 1), 1)
+            concurrency = min(max(int(body.get("concurrency") or args.batch_concurrency), 1), args.max_connections_per_host)
+        except (TypeError, ValueError, OverflowError):
+            return JSONResponse(content={"error": {"message": "batchSize and concurrency must be numbers"}}, status_code=400)
+        from stringlom.jsutil import js_replacement
+        template = body.get("promptTemplate") or "{{ line }}"
+        placeholder = re.compile(re.escape("{{ line }}"))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        def prompt(line: str) -> str:
+            # String.prototype.replace: the first '{{ line }}' only, with $&, $`, $' and $$ in the line expanded
+            return placeholder.sub(js_replacement(line, 0), template, count=1)
+
+        async def run_batch(index: int, batch: List[str]) -> Dict:
+            # Same prompt layout as llmClient.process
+            payload = {
+                "model": body.get("model"),
+                "messages": [
+                    {"role": "system", "content": body.get("systemPrompt", "")},
+                    {"role": "user", "content": "\n".join(prompt(line) for line in batch)}
+                ],
+                "stream": False
+            }
+            async with semaphore:
+                try:
+                    data = await self.complete(target_url, headers, payload)
+                except UpstreamError as e:
+                    return {"index": index, "status": e.status_code, "error": e.message, "result": [], "usage": None}
+                except Exception as e:
+                    logger.error(f"Batch {index} error: {str(e)}")
+                    return {"index": index, "status": 502, "error": str(e), "result": [], "usage": None}
+            reply = ((data.get("choices") or [{}])[0].get("message") or {}).get("content") or ""
+            return {"index": index, "status": 200, "error": None, "result": reply.split("\n"), "usage": data.get("usage")}
+
+        batches = await asyncio.gather(*(
+            run_batch(index, lines[start:start + batch_size])
+            for index, start in enumerate(range(0, len(lines), batch_size))
+        ))
+
+        usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        for batch in batches:
+            if batch["usage"]:
+                usage["prompt_tokens"] += batch["usage"].get("prompt_tokens") or 0
+                usage["completion_tokens"] += batch["usage"].get("completion_tokens") or 0
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        content = {
+            "result": [line for batch in batches for line in batch["result"]],
+            "batches": batches,
+            "usage": usage
+        }
+        failed = next((batch for batch in batches if batch["error"]), None)
+        if failed:
+            # The upstream status stays in the body: a 404 here would read as a missing route to the page
+            content["error"] = {"message": f"Batch {failed['index'] + 1}: {failed['error']}", "status": failed["status"]}
+            return JSONResponse(content=content, status_code=502)
+        return JSONResponse(content=content)
+
+    async def oauth_post(self, url: str, payload: Dict) -> Tuple[int, Any]:
+        """Posts an OAuth form without blocking the event loop; returns (status, JSON body)."""
+        await self.start()
+        try:
+            r = await self.client.post(url, data=payload, headers=OAUTH_HEADERS)
+        except httpx.HTTPError as e:
+            logger.error(f"OAuth error: {str(e)}")
+            return 502, {"error": str(e)}
+        try:
+            return r.status_code, r.json()
+        except ValueError:
+            return r.status_code, {"error": "Invalid response from provider", "text": r.text}
 
     async def get_device_code(self, challenge: str, verifier: str):
         payload = {
@@ -142,46 +1167,159 @@ class QwenProvider(BaseProvider):
             "code_challenge": challenge,
             "code_challenge_method": "S256"
         }
-        headers = {
-            "Accept": "application/json",
-            "Content-Type": "application/x-www-form-urlencoded",
-            "User-Agent": "vscode-qwen-copilot/0.2.0"
-        }
-        r = requests.post(self.device_code_url, data=urlencode(payload), headers=headers, verify=self.verify_ssl)
-        try:
-            data = r.json()
-            if r.status_code == 200 and 'device_code' in data:
-                self.pkce_store[data['device_code']] = verifier
-            return JSONResponse(content=data, status_code=r.status_code)
-        except:
-            return JSONResponse(content={"error": "Invalid response from provider", "text": r.text}, status_code=r.status_code)
+        status_code, data = await self.oauth_post(self.device_code_url, payload)
+        if status_code == 200 and isinstance(data, dict) and 'device_code' in data:
+            self.pkce_store.put(data['device_code'], verifier, data.get('expires_in'))
+        return JSONResponse(content=data, status_code=status_code)
 
     async def poll_token(self, device_code: str, code_verifier: str = None):
-        verifier = code_verifier or self.pkce_store.get(device_code, "")
+        verifier = code_verifier or self.pkce_store.get(device_code) or ""
         payload = {
             "grant_type": "urn:ietf:params:oauth:grant-type:device_code",
             "client_id": self.client_id,
             "device_code": device_code,
             "code_verifier": verifier
         }
-        headers = {
-            "Accept": "application/json",
-            "Content-Type": "application/x-www-form-urlencoded",
-            "User-Agent": "vscode-qwen-copilot/0.2.0"
-        }
-        r = requests.post(self.token_url, data=urlencode(payload), headers=headers, verify=self.verify_ssl)
+        status_code, data = await self.oauth_post(self.token_url, payload)
+        if isinstance(data, dict) and 'access_token' in data:
+            self.pkce_store.pop(device_code)
+            # Kept server-side so the proxy can refresh the token and attach it to upstream requests
+            self.tokens.update(data)
+        return JSONResponse(content=data, status_code=status_code)
+
+# --- Paged Texts ---
+# Uploaded sources and /chain/run results are files with a line-offset index, so the UI
+# pages through them instead of holding the whole text. Any worker can serve any of them.
+TEXT_ID_LENGTH = 32
+PAGE_LIMIT = 5000
+
+def texts_dir() -> str:
+    path = os.path.expanduser(args.results_dir) if args.results_dir else os.path.join(tempfile.gettempdir(), f"stringlom-{API_UUID}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+def text_path(text_id: str) -> str:
+    return os.path.join(texts_dir(), f"{text_id}.txt")
+
+def text_files(text_id: str) -> List[str]:
+    path = text_path(text_id)
+    return [path, path + ".idx", os.path.join(texts_dir(), f"{text_id}.json")]
+
+def save_text_meta(text_id: str, meta: Dict):
+    path = text_files(text_id)[2]
+    with open(path + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(path + ".tmp", path)
+
+def load_text_meta(text_id: Any, kind: str) -> Optional[Dict]:
+    if not isinstance(text_id, str) or len(text_id) != TEXT_ID_LENGTH or text_id.strip("0123456789abcdef"):
+        return None
+    try:
+        with open(text_files(text_id)[2]) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("kind") == kind else None
+
+def remove_text(text_id: str):
+    for path in text_files(text_id):
         try:
-            data = r.json()
-            if 'access_token' in data:
-                self.pkce_store.pop(device_code, None)
-            return JSONResponse(content=data, status_code=r.status_code)
-        except:
-            return JSONResponse(content={"error": "Invalid response from provider", "text": r.text}, status_code=r.status_code)
+            os.remove(path)
+        except OSError:
+            pass
+
+def evict_texts(keep: str):
+    """Removes the oldest texts until the rest fit into --results-max-mb.
+
+    Results go before sources, since a result can be run again from its source;
+    ``keep`` and the source it was made from always stay.
+    """
+    kept = {keep}
+    entries = []
+    for name in os.listdir(texts_dir()):
+        if not name.endswith(".json"):
+            continue
+        text_id = name[:-len(".json")]
+        try:
+            with open(text_files(text_id)[2]) as f:
+                meta = json.load(f)
+            stats = [os.stat(path) for path in text_files(text_id) if os.path.exists(path)]
+        except (OSError, ValueError):
+            continue
+        if text_id == keep and meta.get("source"):
+            kept.add(meta["source"])
+        entries.append((meta.get("kind") != "result", max(st.st_mtime for st in stats), sum(st.st_size for st in stats), text_id))
+    total = sum(entry[2] for entry in entries)
+    budget = args.results_max_mb * 1024 * 1024
+    for _, _, size, text_id in sorted(entries):
+        if total <= budget:
+            break
+        if text_id not in kept:
+            remove_text(text_id)
+            total -= size
+
+def run_paged(chain: Dict, source_id: str) -> Dict:
+    """Streams the source file through the chain into an indexed result file."""
+    from stringlom.chain import final_delimiter
+    from stringlom.lineindex import IndexWriter
+    from stringlom.stream import stream_records
+    result_id = uuid.uuid4().hex
+    delimiter = final_delimiter(chain["settings"])
+    try:
+        with open(text_path(source_id), encoding="utf-8", errors="replace", newline="") as source, \
+                IndexWriter(text_path(result_id), delimiter) as out:
+            run = stream_records(chain, source, out.append, temp_dir=texts_dir())
+    except BaseException:
+        remove_text(result_id)
+        raise
+    if run["error"]:
+        remove_text(result_id)
+        return {"result": None, "lines": 0, "blocks": run["blocks"], "error": True}
+    save_text_meta(result_id, {"kind": "result", "delimiter": delimiter, "lines": run["lines"], "bytes": out.size, "source": source_id})
+    evict_texts(result_id)
+    return {"result": result_id, "lines": run["lines"], "blocks": run["blocks"], "error": False}
+
+def read_page(text_id: str, meta: Dict, offset: int, limit: int) -> Dict:
+    from stringlom.lineindex import IndexedText
+    with IndexedText(text_path(text_id), meta["delimiter"]) as text:
+        return {"offset": offset, "total": len(text), "lines": text.window(offset, max(0, min(limit, PAGE_LIMIT)))}
+
+def search_text(text_id: str, meta: Dict, query: str, start: int, limit: int) -> Dict:
+    from stringlom.lineindex import IndexedText
+    with IndexedText(text_path(text_id), meta["delimiter"]) as text:
+        matches, next_start = text.search(query, start, max(1, min(limit, PAGE_LIMIT)))
+    return {"matches": matches, "next": next_start}
 
 # --- FastAPI App ---
-app = FastAPI()
+response_cache = ResponseCache(args.cache_path, int(args.cache_max_mb * 1024 * 1024), args.cache_max_entries, args.cache_ttl) if args.cache else None
+qwen_provider = QwenProvider(cache=response_cache)
+metrics = Metrics()
+trace_log = TraceLog(args.trace_log) if args.trace_log else None
+sandbox_pool = None # started by the first /chain/evaluate
 
-qwen_provider = QwenProvider()
+def get_sandbox_pool():
+    global sandbox_pool
+    if sandbox_pool is None:
+        from stringlom.sandbox import SandboxPool
+        sandbox_pool = SandboxPool(args.eval_workers or os.cpu_count() or 1, args.eval_memory_mb, args.datasets_dir)
+    return sandbox_pool
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serve right away; the first upstream request waits for the pool if it is not up yet
+    warmup = asyncio.create_task(qwen_provider.start())
+    logger.info(f"Worker {os.getpid()} ready in {(time.perf_counter() - STARTED) * 1000:.0f} ms")
+    yield
+    await warmup
+    if sandbox_pool:
+        sandbox_pool.close()
+    await qwen_provider.aclose()
+    if response_cache:
+        response_cache.close()
+    if trace_log:
+        trace_log.close()
+
+app = FastAPI(lifespan=lifespan)
 
 @app.middleware("http")
 async def security_middleware(request: Request, call_next):
@@ -202,6 +1340,62 @@ async def security_middleware(request: Request, call_next):
 
     return await call_next(request)
 
+def route_label(path: str) -> str:
+    # Route templates only, so unknown paths (and ids in paths) cannot grow the label set
+    if path == "/":
+        return path
+    for r in app.routes:
+        regex = getattr(r, "path_regex", None)
+        if regex is not None and regex.match(path):
+            return r.path[len(API_UUID) + 1:] if r.path.startswith(f"/{API_UUID}/") else r.path
+    return "other"
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    started = time.perf_counter()
+    route = route_label(request.url.path)
+    trace = {"id": uuid.uuid4().hex[:16], "ts": time.time(), "method": request.method, "route": route}
+    current_trace.set(trace)
+    try:
+        bytes_in = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        bytes_in = 0
+    metrics.inc("stringlom_requests_in_flight", {"route": route})
+    metrics.inc("stringlom_request_bytes_total", {"route": route}, bytes_in)
+
+    def finish(status: int, bytes_out: int):
+        elapsed = time.perf_counter() - started
+        metrics.inc("stringlom_requests_in_flight", {"route": route}, -1)
+        metrics.inc("stringlom_requests_total", {"route": route, "method": request.method, "status": str(status)})
+        metrics.observe("stringlom_request_duration_seconds", {"route": route}, elapsed)
+        metrics.inc("stringlom_response_bytes_total", {"route": route}, bytes_out)
+        if trace_log:
+            trace.update(status=status, total_ms=round(elapsed * 1000, 3), bytes_in=bytes_in, bytes_out=bytes_out)
+            for key in ("queue_ms", "upstream_ms"):
+                if key in trace:
+                    trace[key] = round(trace[key], 3)
+            trace_log.write(trace)
+
+    try:
+        response = await call_next(request)
+    except BaseException:
+        finish(500, 0)
+        raise
+
+    async def observed(body):
+        # Finished when the last byte is sent, so streamed responses count their whole duration
+        sent = 0
+        try:
+            async for chunk in body:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            finish(response.status_code, sent)
+
+    response.body_iterator = observed(response.body_iterator)
+    response.headers["X-Request-Id"] = trace["id"]
+    return response
+
 # Important: add CORSMiddleware after other middlewares to ensure it's processed properly
 app.add_middleware(
     CORSMiddleware,
@@ -213,7 +1407,7 @@ app.add_middleware(
 
 @app.get("/")
 async def root():
-    return {"status": "ok", "base_url": BASE_URL}
+    return {"status": "ok", "base_url": base_url()}
 
 @app.post(f"/{API_UUID}/auth/device_code")
 async def device_code(body: Dict):
@@ -225,6 +1419,111 @@ async def device_code(body: Dict):
 async def poll(body: Dict):
     return await qwen_provider.poll_token(body.get("device_code"), body.get("code_verifier"))
 
+@app.get(f"/{API_UUID}/auth/status")
+async def auth_status():
+    return qwen_provider.tokens.status()
+
+@app.get(f"/{API_UUID}/cache/stats")
+async def cache_stats():
+    if not qwen_provider.cache:
+        return {"enabled": False}
+    return {"enabled": True, **qwen_provider.cache.stats()}
+
+@app.get(f"/{API_UUID}/metrics")
+async def metrics_endpoint():
+    if response_cache:
+        stats = response_cache.stats()
+        metrics.set("stringlom_cache_entries", None, stats["entries"])
+        metrics.set("stringlom_cache_bytes", None, stats["bytes"])
+    now = time.monotonic()
+    for netloc, limiter in qwen_provider.limiters.items():
+        metrics.set("stringlom_upstream_rpm_limit", {"host": netloc}, limiter.rpm)
+        is_open = limiter.failures >= args.breaker_threshold and (now < limiter.open_until or limiter.probing)
+        metrics.set("stringlom_upstream_circuit_open", {"host": netloc}, 1 if is_open else 0)
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.post(f"/{API_UUID}/llm/batch")
+async def llm_batch(request: Request):
+    body = await request.json()
+    target_url = body.get("url")
+    if not target_url: raise HTTPException(status_code=400, detail="Missing url")
+    return await qwen_provider.batch_complete(target_url, dict(request.headers), body)
+
+@app.post(f"/{API_UUID}/chain/run")
+async def chain_run(body: Dict):
+    # Imported on first use; the proxy alone never needs the tools
+    from stringlom import ChainError, datasets, load_chain, run_chain, format_output
+    # Chains sent to /chain/run may name datasets, never arbitrary file paths
+    datasets.configure(args.datasets_dir, allow_paths=False)
+    try:
+        chain = load_chain(body.get("chain"))
+    except ChainError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    if body.get("source") is not None:
+        # A source uploaded to /source: the result stays on disk and is read through /result
+        if load_text_meta(body["source"], "source") is None:
+            return JSONResponse(content={"error": "Unknown source"}, status_code=404)
+        return await asyncio.to_thread(run_paged, chain, body["source"])
+    run = await asyncio.to_thread(run_chain, chain, body.get("text") or "")
+    return {"output": format_output(chain, run["result"]), "lines": len(run["result"]), "blocks": run["blocks"], "error": run["error"]}
+
+@app.post(f"/{API_UUID}/chain/evaluate")
+async def chain_evaluate(body: Dict):
+    candidates = body.get("candidates")
+    if not isinstance(candidates, list) or not candidates:
+        return JSONResponse(content={"error": "Missing candidates"}, status_code=400)
+    try:
+        timeout = min(float(body.get("timeout") or args.eval_timeout), args.eval_timeout)
+    except (TypeError, ValueError):
+        return JSONResponse(content={"error": "Invalid timeout"}, status_code=400)
+    if not timeout > 0:
+        return JSONResponse(content={"error": "Timeout must be positive"}, status_code=400)
+    inputs = body.get("inputs") if isinstance(body.get("inputs"), list) else None
+    results = await asyncio.to_thread(get_sandbox_pool().evaluate_many, candidates, inputs, timeout)
+    return {"results": results}
+
+@app.post(f"/{API_UUID}/source")
+async def source_upload(request: Request):
+    from stringlom.lineindex import build_index
+    text_id = uuid.uuid4().hex
+    size = 0
+    with open(text_path(text_id), "wb") as f:
+        async for chunk in request.stream():
+            f.write(chunk)
+            size += len(chunk)
+    lines = await asyncio.to_thread(build_index, text_path(text_id))
+    meta = {"kind": "source", "delimiter": "\n", "lines": lines, "bytes": size}
+    save_text_meta(text_id, meta)
+    evict_texts(text_id)
+    return {"id": text_id, **meta}
+
+@app.get(f"/{API_UUID}/source/{{text_id}}")
+async def source_page(text_id: str, offset: int = 0, limit: int = 200):
+    meta = load_text_meta(text_id, "source")
+    if meta is None:
+        return JSONResponse(content={"error": "Unknown source"}, status_code=404)
+    return await asyncio.to_thread(read_page, text_id, meta, offset, limit)
+
+@app.get(f"/{API_UUID}/result/{{text_id}}")
+async def result_page(text_id: str, offset: int = 0, limit: int = 200):
+    meta = load_text_meta(text_id, "result")
+    if meta is None:
+        return JSONResponse(content={"error": "Unknown result"}, status_code=404)
+    return await asyncio.to_thread(read_page, text_id, meta, offset, limit)
+
+@app.get(f"/{API_UUID}/result/{{text_id}}/search")
+async def result_search(text_id: str, q: str = "", start: int = 0, limit: int = 100):
+    meta = load_text_meta(text_id, "result")
+    if meta is None:
+        return JSONResponse(content={"error": "Unknown result"}, status_code=404)
+    return await asyncio.to_thread(search_text, text_id, meta, q, start, limit)
+
+@app.get(f"/{API_UUID}/result/{{text_id}}/download")
+async def result_download(text_id: str, name: str = "result"):
+    if load_text_meta(text_id, "result") is None:
+        return JSONResponse(content={"error": "Unknown result"}, status_code=404)
+    return FileResponse(text_path(text_id), media_type="text/plain; charset=utf-8", filename=f"{name}.txt")
+
 @app.api_route(f"/{API_UUID}/proxy", methods=["GET", "POST", "PUT", "DELETE"])
 async def proxy(request: Request):
     target_url = request.query_params.get("url")
@@ -234,7 +1533,77 @@ async def proxy(request: Request):
     body = await request.json() if method in ["POST", "PUT"] else None
     return await qwen_provider.proxy_request(target_url, method, headers, body)
 
+def serve(sock: socket.socket):
+    import uvicorn
+    uvicorn.Server(uvicorn.Config(app, log_level="warning")).run(sockets=[sock])
+
+def fork_worker(sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    global response_cache, trace_log
+    # SQLite connections and buffered files must not be shared with the parent
+    if response_cache:
+        response_cache = qwen_provider.cache = ResponseCache(args.cache_path, int(args.cache_max_mb * 1024 * 1024), args.cache_max_entries, args.cache_ttl)
+    if trace_log:
+        trace_log = TraceLog(args.trace_log)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    try:
+        serve(sock)
+    finally:
+        os._exit(0)
+
+def split_budgets(count: int):
+    """Gives each of ``count`` workers its share of --rpm and --tpm, since every worker paces its own requests."""
+    for flag in ("rpm", "tpm"):
+        total = getattr(args, flag)
+        if not total:
+            continue
+        share = total / count
+        if share < 1:
+            logger.warning(f"--{flag} {total} split across {count} workers is below 1 per worker; "
+                           f"each worker gets 1, so up to {count} per minute in total")
+            share = 1
+        setattr(args, flag, share)
+
+def run_workers(sock: socket.socket, count: int):
+    """Forks ``count`` workers accepting on one socket and replaces any that die."""
+    # The parent never serves, so its cache connection and trace file are only handed down
+    split_budgets(count)
+    workers = {fork_worker(sock) for _ in range(count)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        workers.discard(pid)
+        if not stopping:
+            logger.warning(f"Worker {pid} exited ({status}), starting another")
+            workers.add(fork_worker(sock))
+
 if __name__ == "__main__":
+    # Imported before forking so the workers share it
+    import uvicorn
+    sock = bind_socket(PORT)
+    PORT = sock.getsockname()[1]
+    save_config(PORT, API_UUID)
     print(f"\n🚀 StringLOM Proxy started!")
-    print(f"🔗 Base URL: {BASE_URL}\n")
-    uvicorn.run(app, host=HOST, port=PORT, log_level="warning")
+    print(f"🔗 Base URL: {base_url()}\n")
+    if args.workers > 1 and hasattr(os, "fork"):
+        run_workers(sock, args.workers)
+    else:
+        serve(sock)
@@ -43,6 +43,10 @@ class CustomBlockAIAgent extends OptimizedAIAgent {
                             "params": { "type": "object" }
                         }
                     }
+                },
+                "alternatives": {
+                    "type": "array",
+                    "items": { "type": "array", "items": { "type": "object" } }
                 }
             },
             "required": ["test_cases", "logic_structure"]
@@ -143,13 +147,9 @@ Remember, the "new_block" is optional. Only use it when required.`;
             // If we are here, new_block is either null or successfully verified and registered
             // Proceed with main chain execution and verification
             const test_cases = generation_result.test_cases || [];
-            const logic_structure = generation_result.logic_structure || generation_result.blocks || [];
             
             this.on_step_update('execution_start', 'Executing generated logic with test cases...');
-            const execution_output = await this.provider.executeLocalLogic(
-                logic_structure,
-                test_cases
-            );
+            const { structure: logic_structure, execution_output } = await this.provider.executeGeneration(generation_result);
 
             const verification_prompt = this.create_verification_prompt(
                 user_task,
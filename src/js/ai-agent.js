@@ -3,7 +3,64 @@ class AIAgentProvider {
         this.llmClient = llmClient;
     }
 
+    // Runs the candidates in the proxy's sandboxed workers, all in one request so they are evaluated
+    // in parallel, off the page's thread and under time and memory limits. Returns one result per
+    // candidate, null where it must run locally: there is no proxy, it predates /chain/evaluate, or
+    // the chain uses blocks only the browser has (AI custom blocks).
+    async evaluateOnServer(candidates) {
+        const none = candidates.map(() => null);
+        const baseUrl = this.llmClient?.settings?.baseUrl;
+        if (!baseUrl || !candidates.length) return none;
+        const payload = candidates.map(({ structure, testData }) => {
+            const blocks = (Array.isArray(structure) ? structure : (structure.blocks || []))
+                .map(b => ({ type: b.type, params: b.params || b.data || {} }));
+            if (blocks[0]?.type !== 'source') blocks.unshift({ type: 'source', params: {} });
+            return { chain: { blocks }, inputs: testData };
+        });
+
+        try {
+            const response = await fetch(`${baseUrl}/chain/evaluate`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ candidates: payload })
+            });
+            if (!response.ok) return none;
+            const results = (await response.json()).results || [];
+            return none.map((_, i) => results[i] && results[i].status !== 'invalid' ? results[i] : null);
+        } catch (e) {
+            return none;
+        }
+    }
+
+    // Results of [{ structure, testData }] in order: from the proxy where it can run them, else locally
+    async executeCandidates(candidates) {
+        const evaluated = await this.evaluateOnServer(candidates);
+        return Promise.all(candidates.map(async ({ structure, testData }, i) => {
+            if (evaluated[i]) {
+                console.log("--- Chain Evaluation Result (proxy) ---", evaluated[i]);
+                return evaluated[i];
+            }
+            return this.runLocally(structure, testData);
+        }));
+    }
+
     async executeLocalLogic(structure, testData) {
+        const [result] = await this.executeCandidates([{ structure, testData }]);
+        return result;
+    }
+
+    // Evaluates the generated chain and its alternatives together; the first that runs without an
+    // error (else the generated chain) is the one to verify
+    async executeGeneration(generation_result) {
+        const testData = generation_result.test_cases || [];
+        const structures = [generation_result.logic_structure || generation_result.blocks || []]
+            .concat((generation_result.alternatives || []).filter(Array.isArray).slice(0, 2));
+        const results = await this.executeCandidates(structures.map(structure => ({ structure, testData })));
+        const chosen = Math.max(results.findIndex(r => r && r.status === 'ok'), 0);
+        return { structure: structures[chosen], execution_output: results[chosen] };
+    }
+
+    async runLocally(structure, testData) {
         // Here we simulate the pipeline execution with test data
         // For security and simplicity, we just use the existing tools
         
@@ -63,6 +120,10 @@ class OptimizedAIAgent {
                             "params": { "type": "object" }
                         }
                     }
+                },
+                "alternatives": {
+                    "type": "array",
+                    "items": { "type": "array", "items": { "type": "object" } }
                 }
             },
             "required": ["test_cases", "logic_structure"]
@@ -138,12 +199,7 @@ class OptimizedAIAgent {
             // STEP 2: Execution
             this.on_step_update('execution_start', 'Executing generated logic with test cases...');
             const test_cases = generation_result.test_cases || [];
-            const logic_structure = generation_result.logic_structure || generation_result.blocks || [];
-            
-            const execution_output = await this.provider.executeLocalLogic(
-                logic_structure,
-                test_cases
-            );
+            const { structure: logic_structure, execution_output } = await this.provider.executeGeneration(generation_result);
 
             // STEP 3: Verification
             this.on_step_update('verification_start', 'Verifying execution results...');
@@ -227,7 +283,8 @@ IMPORTANT RULES:
     }
   ]
 }
-3. The chain must typically start with a "source" block to receive input data, unless it's a completely empty chain. Keep {"type": "source", "params": {}} as the first element.`;
+3. The chain must typically start with a "source" block to receive input data, unless it's a completely empty chain. Keep {"type": "source", "params": {}} as the first element.
+4. Optionally add "alternatives": up to 2 other chains (arrays like "logic_structure") that could also solve the task. They run together with "logic_structure" on the same test cases; the first one that runs without errors is verified.`;
     }
 
     create_start_prompt(user_task, current_chain) {
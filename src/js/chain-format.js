@@ -0,0 +1,70 @@
+// Versioned binary chain encoding for share links; stringlom/chainformat.py reads and writes the same bytes.
+// Layout: version byte + raw deflate of JSON [[[type, params(, 1 if manualRun)], ...], [finalDelimiter, finalCustomDelimiter]]
+const ChainFormat = {
+    VERSION: 1,
+
+    isSupported() {
+        return typeof CompressionStream !== 'undefined' && typeof DecompressionStream !== 'undefined';
+    },
+
+    // A small version byte encodes as "A"; the older base64 JSON links start with "ey" or "W"
+    isBinary(value) {
+        return value.startsWith('A');
+    },
+
+    toCompact(config) {
+        const blocks = Array.isArray(config) ? config : (config.blocks || []);
+        const settings = Array.isArray(config) ? {} : (config.settings || {});
+        return [
+            blocks.map(b => b.manualRun ? [b.type, b.params || {}, 1] : [b.type, b.params || {}]),
+            [settings.finalDelimiter ?? '\\n', settings.finalCustomDelimiter ?? '']
+        ];
+    },
+
+    fromCompact(data) {
+        const [blocks, [finalDelimiter, finalCustomDelimiter]] = data;
+        return {
+            blocks: blocks.map(([type, params, manualRun]) => ({ type, params, manualRun: manualRun === 1 })),
+            settings: { finalDelimiter, finalCustomDelimiter }
+        };
+    },
+
+    async pipe(bytes, stream) {
+        const out = new Blob([bytes]).stream().pipeThrough(stream);
+        return new Uint8Array(await new Response(out).arrayBuffer());
+    },
+
+    async encode(config) {
+        const json = new TextEncoder().encode(JSON.stringify(this.toCompact(config)));
+        const deflated = await this.pipe(json, new CompressionStream('deflate-raw'));
+        const bytes = new Uint8Array(deflated.length + 1);
+        bytes[0] = this.VERSION;
+        bytes.set(deflated, 1);
+        return bytes;
+    },
+
+    async decode(bytes) {
+        if (!bytes.length) throw new Error('Empty chain data');
+        if (bytes[0] !== this.VERSION) throw new Error(`Unsupported chain format version ${bytes[0]}`);
+        const json = await this.pipe(bytes.subarray(1), new DecompressionStream('deflate-raw'));
+        return this.fromCompact(JSON.parse(new TextDecoder('utf-8', { fatal: true }).decode(json)));
+    },
+
+    async toLinkValue(config) {
+        const bytes = await this.encode(config);
+        let binary = '';
+        for (let i = 0; i < bytes.length; i += 0x8000) {
+            binary += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+        }
+        return btoa(binary).replace(/\+/g, '-').replace(/\//g, '_').replace(/=+$/, '');
+    },
+
+    async fromLinkValue(value) {
+        const binary = atob(value.replace(/-/g, '+').replace(/_/g, '/'));
+        return this.decode(Uint8Array.from(binary, c => c.charCodeAt(0)));
+    }
+};
+
+if (typeof module !== 'undefined' && module.exports) {
+    module.exports = ChainFormat;
+}
@@ -47,6 +47,12 @@ var LANG_EN = {
     final_result: "Final Result",
     download_final: "Download result",
     copy_final: "Copy result",
+    final_search_placeholder: "Search in result...",
+    search_prev: "Previous match",
+    search_next: "Next match",
+    search_no_matches: "No matches",
+    source_upload_error: "Could not upload the file to the proxy: ",
+    source_clear_file: "Remove file",
     output_delimiter: "Output Delimiter",
     newline: "New Line",
     comma: "Comma",
@@ -84,6 +90,12 @@ var LANG_EN = {
     source_placeholder: "Enter text here (or drag file here)...",
     line_delimiter: "Line Delimiter",
     lines_count: "Lines:",
+    block_cache: "Cache:",
+    block_cache_hit: "hit",
+    block_cache_miss: "miss",
+    block_cache_hits: "Cache hits:",
+    block_cache_misses: "misses:",
+    block_cache_entries: "entries:",
     add_without_closing: "Add without closing",
     created: "Created",
     saved: "Saved",
@@ -110,7 +122,7 @@ var LANG_EN = {
     // Tools
     tool_regex_title: "Search and Replace (Regex)",
     tool_regex_desc: "Replace using regular expression",
-    tool_regex_pattern: "Regular Expression",
+    tool_regex_pattern: "Regular Expression (one per line)",
     tool_regex_replacement: "Replace with ($1, $2...)",
     tool_regex_case: "Case insensitive",
     tool_regex_only_matched: "Only matched",
@@ -143,6 +155,9 @@ var LANG_EN = {
     tool_compare_common: "Only common",
     tool_compare_diff: "Only differences (A-B)",
     tool_compare_all: "All with marks",
+    tool_compare_dataset: "Dataset (instead of the list)",
+    tool_compare_dataset_placeholder: "Dataset name or file, e.g. customers",
+    tool_compare_dataset_runner: "Datasets are compared by the Python runner: use python -m stringlom or the server's chain runner",
 
     tool_duplicates_title: "Find Duplicates",
     tool_duplicates_desc: "Shows only repeating lines",
@@ -151,7 +166,7 @@ var LANG_EN = {
 
     tool_filter_title: "Line Filter",
     tool_filter_desc: "Keep/Remove lines by condition",
-    tool_filter_query: "Search text",
+    tool_filter_query: "Search text (one per line)",
     tool_filter_contains: "Contains",
     tool_filter_not_contains: "Does not contain",
     tool_filter_starts: "Starts with",
@@ -234,6 +249,13 @@ var LANG_EN = {
     tool_shuffle_title: "Random Shuffle",
     tool_shuffle_desc: "Shuffles lines in random order",
     tool_shuffle_seed: "Seed (number)",
+    tool_shuffle_mode: "Mode",
+    tool_shuffle_mode_shuffle: "Shuffle all lines",
+    tool_shuffle_mode_sample: "Random sample",
+    tool_shuffle_mode_stratified: "Sample per key",
+    tool_shuffle_size: "Sample size (N lines or P%)",
+    tool_shuffle_key: "Key regex (first group or whole match)",
+    tool_shuffle_invalid_size: "Invalid sample size: ",
 
     tool_to_hex_title: "To HEX",
     tool_to_hex_desc: "Convert text to hexadecimal code",
@@ -280,6 +302,7 @@ var LANG_EN = {
     tool_llm_prompt_tpl: "User Prompt Template",
     tool_llm_batch_processing: "Batch processing",
     tool_llm_batch_size: "Batch size (lines)",
+    tool_llm_stream: "Stream the response",
     tool_llm_manual_run: "Manual Execution",
     tool_llm_run_btn: "Run AI Processing",
     tool_llm_running: "AI is thinking...",
@@ -301,13 +324,13 @@ var LANG_EN = {
     llm_proxy_placeholder: "http://127.0.0.1:20000/uuid...",
     run_chain: "Execute",
 
-    tool_regex_long_desc: "Search and replace operations are performed based on regular expressions that allow finding complex character sequences. The input field for the pattern accepts standard syntax to identify required fragments in each line. The case-insensitive option helps find matches regardless of whether letters are written as uppercase or lowercase. If data modification is required, a replacement string field is used where capture group references can be applied. The only matched mode is useful when extracting specific identifiers from system logs. The tool processes input data line by line, applying specified rules to each element of the list. When processing logs, you can isolate only timestamps or error codes, cutting off unnecessary information. Disabling the replacement mode turns the block into a content search tool. Correct template composition ensures precise data isolation in complex string structures. In case of a syntax error in the expression, the system will display a notification to adjust the rules. Approach flexibility allows solving tasks ranging from simple typo correction to data structure restructuring. Global search flags are applied for text work, ensuring processing of all occurrences. The work result is passed to the next link in the chain for further transformations. Using group references in the replacement string enables changing the order of elements within a line. This simplifies reformatting network address lists or changing date formats in reports. Processing is performed entirely on the user side, which is important when working with confidential configuration files.",
+    tool_regex_long_desc: "Search and replace operations are performed based on regular expressions that allow finding complex character sequences. The input field for the pattern accepts standard syntax to identify required fragments in each line. The case-insensitive option helps find matches regardless of whether letters are written as uppercase or lowercase. If data modification is required, a replacement string field is used where capture group references can be applied. The only matched mode is useful when extracting specific identifiers from system logs. The tool processes input data line by line, applying specified rules to each element of the list. When processing logs, you can isolate only timestamps or error codes, cutting off unnecessary information. Disabling the replacement mode turns the block into a content search tool. Correct template composition ensures precise data isolation in complex string structures. In case of a syntax error in the expression, the system will display a notification to adjust the rules. Approach flexibility allows solving tasks ranging from simple typo correction to data structure restructuring. Global search flags are applied for text work, ensuring processing of all occurrences. The work result is passed to the next link in the chain for further transformations. Using group references in the replacement string enables changing the order of elements within a line. This simplifies reformatting network address lists or changing date formats in reports. Processing is performed entirely on the user side, which is important when working with confidential configuration files. Several expressions can be entered one per line: they are applied in a single pass over the text, and where several match at the same position the one listed first wins.",
     tool_deduplicate_long_desc: "Removing duplicates ensures data cleanliness by excluding repeating elements from the overall list. The algorithm compares each line with already processed ones and keeps only the first occurrence of a unique value. The preliminary edge cleaning checkbox allows ignoring extra spaces when comparing lines. This is critical when processing email lists or usernames where accidental indents might prevent duplicate detection. The tool effectively handles cleaning large datasets obtained from various sources. After completion, the system provides statistics on the number of removed elements and the final list size. The sequence of unique lines is preserved exactly as they were encountered in the source file. This allows using the tool for preparing clean mailing lists or databases. When analyzing access logs, removing repeats helps isolate unique visitor IP addresses. In the case of working with program code, the block helps get rid of redundant imports or repeating settings. The trimming option guarantees that lines with identical text but different space counts will be considered identical. The cleaning result is ready for further sorting or export to other formats. Absence of hidden characters after processing increases the reliability of subsequent pipeline stages. Working with the list in browser memory ensures high speed even with a significant number of records. Each unique record remains in a single copy to ensure output data compactness. Using this tool is key to the correct operation of all analytical systems of the enterprise.",
     tool_sort_long_desc: "Sorting organizes the list of lines according to selected criteria and comparison rules. Several modes are available, including text order, numeric comparison, and a smart algorithm. Text mode is suitable for regular lists where word letter sequence is important. Numeric sorting correctly handles values by treating them as numbers rather than a set of characters. Smart mode allows correctly ranking strings containing both text and numbers, such as version numbers or filenames. Direction selection allows arranging elements in ascending or descending order. The case sensitivity toggle determines whether uppercase letters will take priority over lowercase when determining order. This is useful when preparing lists of function names or variables in source code. Processing ignores empty lines to improve final result readability. Using local settings guarantees correct behavior for different languages and alphabets. When working with logs, sorting helps line up events in chronological order or by criticality level. In address lists, you can quickly find required records grouped alphabetically. The tool creates a new ordered data array without changing the structure of the lines themselves. High algorithm performance allows processing thousands of records almost instantly. After applying parameters, the list is passed further down the chain for possible filtering or formatting.",
     tool_reverse_long_desc: "List reversal changes the sequence of all lines to the exact opposite without changing their internal content. The first element becomes the last, and the last takes the place at the very beginning of the list. The tool has no additional configuration parameters, ensuring its simple and predictable operation. This action is often applied after sorting when an inverse data sequence is required. When analyzing logs sorted in forward order, reversal allows seeing the most recent entries at the top. The block effectively works with any types of textual information, from identifier lists to code snippets. The entire data array is processed as a whole, preserving the integrity of each individual line. This is useful when needing to change data processing logic in the pipeline. In a transformation chain, reversal can serve as a preparatory step for extracting specific fragments. The conversion result is immediately displayed and ready for transfer to the next block. The operation is performed in a single pass, which guarantees minimal computational resource costs. Absence of settings excludes configuration errors when using the tool. This action is a classic tool for list manipulation in system administration tasks. Saving the final result allows fixing the modified order for further use. Applying this tool is a standard step in preparing data for visual monitoring dashboards.",
     tool_compare_long_desc: "List comparison allows identifying differences or common elements between the main text and an additional set of lines. The second input field is intended for pasting the list against which the comparison will be made. The delimiter setting determines exactly how data in the second list will be split for correct comparison. The user can choose a mode to display only common elements present in both sets. Also available is a difference output mode showing lines present in the first list but absent in the second. For full analysis, a mode for displaying all lines with marks about their presence in each list is provided. This is indispensable when synchronizing databases or checking allowed address lists. The tool automatically cleans line edges of extra spaces to improve matching precision. When processing configuration files, you can quickly find missing or redundant parameters. The result is output as a new list matching the selected filtering criterion. Comparison of large data volumes occurs quickly due to the use of efficient search algorithms. Statistics at the bottom of the block show the number of resulting lines. The tool helps control data integrity when moving information between different systems. Using special prefixes in the show-all-lines mode allows visually distinguishing added and removed records. Automating the matching process eliminates human error when checking long compliance lists.",
     tool_duplicates_long_desc: "Duplicate search focuses user attention only on those lines that occur in the text more than once. Unlike duplicate removal, this tool hides unique values, leaving only repeating data. The option to show repetition counts adds a numeric value in parentheses to each found line. This allows quickly assessing the scale of redundancy in the processed data array. The tool is useful when auditing security logs to identify suspiciously frequent events. In inventory lists, searching for repeats helps find entry errors or duplicate product records. Processing is performed with automatic edge space removal to exclude false differences. If no duplicates are found, the system will output a corresponding information message. The search result is a compact list of only problematic elements. This simplifies manual verification and subsequent data cleaning in source systems. The tool works quickly even on lists containing tens of thousands of records. Obtained data can be copied or passed further down the pipeline for additional processing. Using this block is an important stage in the data quality assurance process in corporate systems. Identifying repeating user identifiers helps prevent database conflicts. Analysis results can be used to optimize data storage volume in corporate repositories.",
-    tool_filter_long_desc: "Line filtering allows keeping or removing text fragments based on a given condition and keyword. The text to be checked for presence in each line of the list is entered into the query input field. Several operation modes are available, including searching by occurrence, excluding matches, as well as checking the beginning or end of a line. Contains mode keeps only those lines where the specified character sequence is present. The exclude option works inversely, removing all records matching the condition and leaving the rest. Checking the beginning of a line is useful for isolating specific log types starting with a date stamp or importance level. Ends-with mode helps find files with specific extensions or records ending with special markers. The tool does not consider character case during comparison, which simplifies search setup. This is an efficient way to quickly reduce the processed data volume to the required minimum. When analyzing network reports, filtering helps isolate traffic from specific IP addresses. In the process of list cleaning, you can easily remove lines containing unwanted marks or comments. Filtering results are immediately ready for further transformations in the block chain. Statistics display the number of matches and the number of lines removed from the list. The tool provides high flexibility when working with unstructured text arrays. Applying filters significantly speeds up the process of finding a needle in a haystack when working with raw data.",
+    tool_filter_long_desc: "Line filtering allows keeping or removing text fragments based on a given condition and keyword. The text to be checked for presence in each line of the list is entered into the query input field. Several operation modes are available, including searching by occurrence, excluding matches, as well as checking the beginning or end of a line. Contains mode keeps only those lines where the specified character sequence is present. The exclude option works inversely, removing all records matching the condition and leaving the rest. Checking the beginning of a line is useful for isolating specific log types starting with a date stamp or importance level. Ends-with mode helps find files with specific extensions or records ending with special markers. The tool does not consider character case during comparison, which simplifies search setup. This is an efficient way to quickly reduce the processed data volume to the required minimum. When analyzing network reports, filtering helps isolate traffic from specific IP addresses. In the process of list cleaning, you can easily remove lines containing unwanted marks or comments. Filtering results are immediately ready for further transformations in the block chain. Statistics display the number of matches and the number of lines removed from the list. The tool provides high flexibility when working with unstructured text arrays. Applying filters significantly speeds up the process of finding a needle in a haystack when working with raw data. Several queries can be entered one per line, and a line passes the filter when it matches any of them.",
     tool_csv_long_desc: "CSV data parsing is designed to transform structured tabular lines into an arbitrary text format according to a given template. The delimiter selection field allows specifying the character used to separate columns, such as a semicolon or comma. The template field defines the future line structure, where column sequence numbers are denoted by special characters with digits. The skip header option allows ignoring the first line of the file if it contains column names. The tool automatically splits each incoming line into components and substitutes them into specified template locations. This is convenient for generating SQL queries, configuration files, or formatted reports from database exports. When processing a user list, you can turn a table with names and emails into a set of commands for creating accounts. Each column is cleaned of extra spaces before substitution to ensure a neat result. If a column number not present in the source line is specified in the template, an empty string will be substituted in its place. The tool effectively works with large exports in CSV format, providing instant results. Transformed data is saved as a list of lines ready for further processing by other blocks. Template configuration flexibility allows implementing complex formatting rules without writing code. Using this block significantly speeds up routine data migration tasks between systems. The tool is indispensable when working with bank statements or payment registries. Each output line can be supplemented with static text to explain the data structure.",
     tool_case_long_desc: "Letter case modification allows quickly bringing text data to a single writing standard. Several transformation modes are available, including converting all characters to uppercase or lowercase. The sentence case mode automatically corrects text, making the first letter after a period large. The each word case option makes the first letter of every word uppercase, which is useful for titles or names. The tool correctly handles Cyrillic and Latin alphabets, considering alphabet specifics. When processing variable lists in program code, bringing them to a single case helps avoid naming errors. In databases, normalizing user name case ensures uniformity and simplifies subsequent searching. The block processes each line independently, preserving the original list structure. This is a quick way to fix careless data entry in web forms or during import from different sources. Using lowercase is often required when preparing data for subsequent comparison or duplicate searching. The tool does not add or remove characters, changing only their typeface. The work result is visible instantly and can be passed to subsequent pipeline links. Setup simplicity makes this block indispensable when preparing text reports. High processing speed guarantees absence of delays even when working with very long lists. Correct case is important for the professional appearance of documentation and technical correspondence.",
     tool_wrapper_long_desc: "Line wrapping adds arbitrary text to the beginning and end of each line in the processed list. Text that should appear before the original line content is entered into the prefix field. The suffix field is intended for characters that will be added at the very end. The tool is useful for turning a regular word list into a set of array elements for program code. You can easily add quotes around each line and a comma at the end for use in JSON or JavaScript configuration files. When forming SQL queries, the wrapper helps add required command parts around identifiers. The block works with all incoming lines without exception, preserving their order. This significantly speeds up the process of preparing data for insertion into other systems or documents. If one of the fields is left empty, addition will be performed only on one side. The tool does not change the original text inside the line, acting only on its boundaries. When processing file paths, you can quickly add a root directory to all records. The formatting result is passed further down the chain for possible joining or filtering. Operation simplicity and clarity make this block one of the most frequently used during data assembly. Wrapping saves time by eliminating the need to manually edit each line in a text editor. Wrapping allows quickly turning plain text into elements of structured program code.",
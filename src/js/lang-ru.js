@@ -47,6 +47,12 @@ var LANG_RU = {
     final_result: "Финальный результат",
     download_final: "Скачать результат",
     copy_final: "Копировать результат",
+    final_search_placeholder: "Поиск в результате...",
+    search_prev: "Предыдущее совпадение",
+    search_next: "Следующее совпадение",
+    search_no_matches: "Нет совпадений",
+    source_upload_error: "Не удалось загрузить файл на прокси: ",
+    source_clear_file: "Убрать файл",
     output_delimiter: "Разделитель при выводе",
     newline: "Новая строка",
     comma: "Запятая",
@@ -84,6 +90,12 @@ var LANG_RU = {
     source_placeholder: "Введите текст здесь (или перетащите файл сюда)...",
     line_delimiter: "Разделитель строк",
     lines_count: "Строк:",
+    block_cache: "Кэш:",
+    block_cache_hit: "попадание",
+    block_cache_miss: "промах",
+    block_cache_hits: "Попаданий в кэш:",
+    block_cache_misses: "промахов:",
+    block_cache_entries: "записей:",
     add_without_closing: "Добавить без закрытия",
     created: "Создано",
     saved: "Сохранено",
@@ -110,7 +122,7 @@ var LANG_RU = {
     // Tools
     tool_regex_title: "Поиск и замена (Regex)",
     tool_regex_desc: "Замена по регулярному выражению",
-    tool_regex_pattern: "Регулярное выражение",
+    tool_regex_pattern: "Регулярное выражение (по одному на строку)",
     tool_regex_replacement: "Заменить на ($1, $2...)",
     tool_regex_case: "Без учета регистра",
     tool_regex_only_matched: "Оставить только совпадения",
@@ -143,6 +155,9 @@ var LANG_RU = {
     tool_compare_common: "Только общие",
     tool_compare_diff: "Только различия (A-B)",
     tool_compare_all: "Все с пометками",
+    tool_compare_dataset: "Набор данных (вместо списка)",
+    tool_compare_dataset_placeholder: "Имя набора или файл, например customers",
+    tool_compare_dataset_runner: "Наборы данных сравнивает Python-раннер: используйте python -m stringlom или запуск цепочки на сервере",
 
     tool_duplicates_title: "Найти дубликаты",
     tool_duplicates_desc: "Показывает только повторяющиеся строки",
@@ -151,7 +166,7 @@ var LANG_RU = {
 
     tool_filter_title: "Фильтр строк",
     tool_filter_desc: "Оставить/Удалить строки по условию",
-    tool_filter_query: "Текст поиска",
+    tool_filter_query: "Текст поиска (по одному на строку)",
     tool_filter_contains: "Содержит",
     tool_filter_not_contains: "Не содержит",
     tool_filter_starts: "Начинается с",
@@ -234,6 +249,13 @@ var LANG_RU = {
     tool_shuffle_title: "Случайная сортировка",
     tool_shuffle_desc: "Перемешивает строки в случайном порядке",
     tool_shuffle_seed: "Seed (число)",
+    tool_shuffle_mode: "Режим",
+    tool_shuffle_mode_shuffle: "Перемешать все строки",
+    tool_shuffle_mode_sample: "Случайная выборка",
+    tool_shuffle_mode_stratified: "Выборка по ключу",
+    tool_shuffle_size: "Размер выборки (N строк или P%)",
+    tool_shuffle_key: "Regex ключа (первая группа или всё совпадение)",
+    tool_shuffle_invalid_size: "Некорректный размер выборки: ",
 
     tool_to_hex_title: "В HEX (To Hex)",
     tool_to_hex_desc: "Преобразование текста в шестнадцатеричный код",
@@ -280,6 +302,7 @@ var LANG_RU = {
     tool_llm_prompt_tpl: "Шаблон пользовательского промпта",
     tool_llm_batch_processing: "Пакетная обработка",
     tool_llm_batch_size: "Размер пакета (строк)",
+    tool_llm_stream: "Потоковый вывод ответа",
     tool_llm_manual_run: "Ручной запуск",
     tool_llm_run_btn: "Запустить AI обработку",
     tool_llm_running: "AI думает...",
@@ -301,13 +324,13 @@ var LANG_RU = {
     llm_proxy_placeholder: "http://127.0.0.1:20000/uuid...",
     run_chain: "Выполнить",
  
-    tool_regex_long_desc: "Поиск и замена текста выполняется на основе регулярных выражений, которые позволяют находить сложные последовательности символов. Поле ввода для паттерна принимает стандартный синтаксис для идентификации нужных фрагментов в каждой строке. Опция игнорирования регистра помогает находить совпадения вне зависимости от того, написаны ли буквы как заглавные или строчные. Если требуется изменить данные, используется поле для строки замены, где можно применять ссылки на захваченные группы. Режим отображения только совпадений полезен при извлечении конкретных идентификаторов из системных журналов. Инструмент обрабатывает входные данные построчно, применяя заданные правила к каждому элементу списка. При обработке логов можно выделить только метки времени или коды ошибок, отсекая лишнюю информацию. Отключение режима замены превращает блок в средство поиска содержимого. Правильное составление шаблона обеспечивает точность выделения данных в сложных строковых структурах. В случае возникновения синтаксической ошибки в выражении система выведет уведомление для корректировки правил. Гибкость подхода позволяет решать задачи от простого исправления опечаток до переработки структуры данных. Для работы с текстом применяются глобальные флаги поиска, обеспечивающие обработку всех вхождений. Результат работы передается следующему звену в цепочке для дальнейших преобразований. Использование ссылок на группы в строке замены дает возможность менять порядок элементов внутри строки. Это упрощает переформатирование списков сетевых адресов или изменение формата дат в отчетах. Обработка выполняется полностью на стороне пользователя, что важно при работе с конфиденциальными файлами конфигурации.",
+    tool_regex_long_desc: "Поиск и замена текста выполняется на основе регулярных выражений, которые позволяют находить сложные последовательности символов. Поле ввода для паттерна принимает стандартный синтаксис для идентификации нужных фрагментов в каждой строке. Опция игнорирования регистра помогает находить совпадения вне зависимости от того, написаны ли буквы как заглавные или строчные. Если требуется изменить данные, используется поле для строки замены, где можно применять ссылки на захваченные группы. Режим отображения только совпадений полезен при извлечении конкретных идентификаторов из системных журналов. Инструмент обрабатывает входные данные построчно, применяя заданные правила к каждому элементу списка. При обработке логов можно выделить только метки времени или коды ошибок, отсекая лишнюю информацию. Отключение режима замены превращает блок в средство поиска содержимого. Правильное составление шаблона обеспечивает точность выделения данных в сложных строковых структурах. В случае возникновения синтаксической ошибки в выражении система выведет уведомление для корректировки правил. Гибкость подхода позволяет решать задачи от простого исправления опечаток до переработки структуры данных. Для работы с текстом применяются глобальные флаги поиска, обеспечивающие обработку всех вхождений. Результат работы передается следующему звену в цепочке для дальнейших преобразований. Использование ссылок на группы в строке замены дает возможность менять порядок элементов внутри строки. Это упрощает переформатирование списков сетевых адресов или изменение формата дат в отчетах. Обработка выполняется полностью на стороне пользователя, что важно при работе с конфиденциальными файлами конфигурации. Несколько выражений можно ввести по одному на строку: они применяются за один проход по тексту, а если в одной позиции совпадают несколько, побеждает указанное первым.",
     tool_deduplicate_long_desc: "Удаление дубликатов обеспечивает чистоту данных путем исключения повторяющихся элементов из общего списка. Алгоритм сравнивает каждую строку с уже обработанными и оставляет только первое вхождение уникального значения. Флажок предварительной очистки краев позволяет игнорировать лишние пробелы при сравнении строк. Это критично при обработке списков электронных адресов или имен пользователей, где случайные отступы могут помешать выявлению повторов. Инструмент эффективно справляется с очисткой больших массивов данных, полученных из разных источников. После завершения процесса система предоставляет статистику по количеству удаленных элементов и размеру итогового списка. Порядок следования уникальных строк сохраняется в том виде, в котором они встретились в исходном файле. Это позволяет использовать инструмент для подготовки чистых списков рассылки или баз данных. При анализе журналов доступа удаление повторов помогает выделить уникальные IP-адреса посетителей. В случае работы с программным кодом блок помогает избавиться от лишних импортов или повторяющихся настроек. Опция тримминга гарантирует, что строки с одинаковым текстом, но разным количеством пробелов, будут считаться идентичными. Результат очистки готов для дальнейшей сортировки или экспорта в другие форматы. Отсутствие скрытых символов после обработки повышает надежность последующих этапов конвейера. Работа со списком в памяти браузера обеспечивает высокую скорость даже при значительном количестве записей. Каждая уникальная запись остается в единственном экземпляре для обеспечения компактности выходных данных. Использование этого инструмента является залогом корректной работы всех аналитических систем предприятия.",
     tool_sort_long_desc: "Сортировка упорядочивает список строк в соответствии с выбранными критериями и правилами сравнения. Доступны несколько режимов, включая текстовый порядок, числовое сравнение и умный алгоритм. Текстовый режим подходит для обычных списков, где важна последовательность букв в словах. Числовая сортировка корректно обрабатывает значения, рассматривая их как цифры, а не как набор символов. Умный режим позволяет правильно ранжировать строки, содержащие как текст, так и числа, например номера версий или имена файлов. Выбор направления позволяет располагать элементы по возрастанию или по убыванию. Переключатель учета регистра определяет, будут ли заглавные буквы иметь приоритет над строчными при определении порядка. Это полезно при подготовке списков имен функций или переменных в исходном коде. Обработка игнорирует пустые строки для повышения читаемости итогового результата. Использование локальных настроек гарантирует правильное поведение для разных языков и алфавитов. При работе с логами сортировка помогает выстроить события в хронологическом порядке или по уровню критичности. В списках адресов можно быстро найти нужные записи, сгруппированные по алфавиту. Инструмент создает новый упорядоченный массив данных без изменения структуры самих строк. Высокая производительность алгоритма позволяет обрабатывать тысячи записей практически мгновенно. После применения параметров список передается дальше по цепочке для возможной фильтрации или форматирования.",
     tool_reverse_long_desc: "Разворот списка меняет порядок следования всех строк на прямо противоположный без изменения их внутреннего содержимого. Первый элемент становится последним, а последний занимает место в самом начале списка. Инструмент не имеет дополнительных параметров настройки, что обеспечивает его простую и предсказуемую работу. Это действие часто применяется после сортировки, когда требуется получить обратную последовательность данных. При анализе логов, идущих в прямом порядке, разворот позволяет увидеть самые свежие записи сверху. Блок эффективно работает с любыми типами текстовой информации, от списков идентификаторов до фрагментов кода. Весь массив данных обрабатывается целиком, сохраняя целостность каждой отдельной строки. Это полезно при необходимости изменить логику обработки данных в конвейере. В цепочке трансформаций разворот может служить подготовительным этапом для извлечения определенных фрагментов. Результат преобразования немедленно отображается и готов к передаче в следующий блок. Операция выполняется в один проход, что гарантирует минимальные затраты вычислительных ресурсов. Отсутствие настроек исключает ошибки конфигурации при использовании инструмента. Данное действие является классическим инструментом при манипуляции со списками в задачах системного администрирования. Сохранение итогового результата позволяет зафиксировать измененный порядок для дальнейшего использования. Применение этого инструмента является стандартным шагом в подготовке данных для визуальных панелей мониторинга.",
     tool_compare_long_desc: "Сравнение списков позволяет выявить различия или общие элементы между основным текстом и дополнительным набором строк. Второе поле ввода предназначено для вставки списка, с которым будет производиться сопоставление. Настройка разделителя определяет, как именно будут разбиваться данные во втором списке для корректного сравнения. Пользователь может выбрать режим отображения только общих элементов, которые присутствуют в обоих наборах. Также доступен режим вывода различий, показывающий строки, которые есть в первом списке, но отсутствуют во втором. Для полного анализа предусмотрен режим отображения всех строк с пометками об их наличии в каждом из списков. Это незаменимо при синхронизации баз данных или проверке списков разрешенных адресов. Инструмент автоматически очищает края строк от лишних пробелов для повышения точности сопоставления. При обработке конфигурационных файлов можно быстро найти отсутствующие или лишние параметры. Результат выводится в виде нового списка, соответствующего выбранному критерию фильтрации. Сравнение больших объемов данных происходит быстро благодаря использованию эффективных алгоритмов поиска. Статистика в нижней части блока показывает количество полученных в результате строк. Инструмент помогает контролировать целостность данных при переносе информации между различными системами. Использование специальных префиксов в режиме показа всех строк позволяет визуально отличить добавленные и удаленные записи. Автоматизация процесса сопоставления исключает человеческий фактор при проверке длинных списков соответствия.",
     tool_duplicates_long_desc: "Поиск дубликатов фокусирует внимание пользователя только на тех строках, которые встречаются в тексте более одного раза. В отличие от удаления повторов, этот инструмент скрывает уникальные значения, оставляя только дублирующиеся данные. Опция отображения количества повторений добавляет числовое значение в скобках к каждой найденной строке. Это позволяет быстро оценить масштаб избыточности в обрабатываемом массиве данных. Инструмент полезен при аудите журналов безопасности для выявления подозрительно частых событий. В списках инвентаризации поиск повторов помогает найти ошибки ввода или дублирующиеся записи о товарах. Обработка выполняется с автоматическим удалением пробелов по краям строк для исключения ложных различий. Если дубликатов не обнаружено, система выведет соответствующее информационное сообщение. Результат поиска представляет собой компактный список только проблемных элементов. Это упрощает ручную проверку и последующую очистку данных в исходных системах. Инструмент работает быстро даже на списках, содержащих десятки тысяч записей. Полученные данные можно скопировать или передать дальше по конвейеру для дополнительной обработки. Использование этого блока является важным этапом в процессе обеспечения качества данных в корпоративных системах. Выявление повторяющихся идентификаторов пользователей помогает предотвратить конфликты в базах данных. Результат анализа можно использовать для оптимизации объема хранения данных в корпоративных репозиториях.",
-    tool_filter_long_desc: "Фильтрация строк позволяет оставить или удалить фрагменты текста на основе заданного условия и ключевого слова. В поле ввода запроса вносится текст, наличие которого будет проверяться в каждой строке списка. Доступно несколько режимов работы, включая поиск по вхождению, исключение совпадений, а также проверку начала или конца строки. Режим содержания оставляет только те строки, в которых присутствует указанная последовательность символов. Опция исключения работает наоборот, удаляя все подходящие под условие записи и оставляя остальное. Проверка начала строки полезна для выделения определенных типов логов, начинающихся с метки даты или уровня важности. Режим конца строки помогает находить файлы с конкретными расширениями или записи, завершающиеся специальными маркерами. Инструмент не учитывает регистр символов при сравнении, что упрощает настройку поиска. Это эффективный способ быстро сократить объем обрабатываемых данных до нужного минимума. При анализе сетевых отчетов фильтрация помогает выделить трафик с определенных IP-адресов. В процессе очистки списков можно легко убрать строки, содержащие нежелательные пометки или комментарии. Результат фильтрации сразу готов к дальнейшим преобразованиям в цепочке блоков. Статистика отображает количество совпадений и число удаленных из списка строк. Инструмент обеспечивает высокую гибкость при работе с неструктурированными текстовыми массивами. Применение фильтров существенно ускоряет процесс поиска иголки в стоге сена при работе с сырыми данными.",
+    tool_filter_long_desc: "Фильтрация строк позволяет оставить или удалить фрагменты текста на основе заданного условия и ключевого слова. В поле ввода запроса вносится текст, наличие которого будет проверяться в каждой строке списка. Доступно несколько режимов работы, включая поиск по вхождению, исключение совпадений, а также проверку начала или конца строки. Режим содержания оставляет только те строки, в которых присутствует указанная последовательность символов. Опция исключения работает наоборот, удаляя все подходящие под условие записи и оставляя остальное. Проверка начала строки полезна для выделения определенных типов логов, начинающихся с метки даты или уровня важности. Режим конца строки помогает находить файлы с конкретными расширениями или записи, завершающиеся специальными маркерами. Инструмент не учитывает регистр символов при сравнении, что упрощает настройку поиска. Это эффективный способ быстро сократить объем обрабатываемых данных до нужного минимума. При анализе сетевых отчетов фильтрация помогает выделить трафик с определенных IP-адресов. В процессе очистки списков можно легко убрать строки, содержащие нежелательные пометки или комментарии. Результат фильтрации сразу готов к дальнейшим преобразованиям в цепочке блоков. Статистика отображает количество совпадений и число удаленных из списка строк. Инструмент обеспечивает высокую гибкость при работе с неструктурированными текстовыми массивами. Применение фильтров существенно ускоряет процесс поиска иголки в стоге сена при работе с сырыми данными. Несколько запросов можно ввести по одному на строку, и строка проходит фильтр, если совпадает с любым из них.",
     tool_csv_long_desc: "Разбор CSV данных предназначен для преобразования структурированных табличных строк в произвольный текстовый формат по заданному шаблону. Поле выбора разделителя позволяет указать символ, используемый для разделения колонок, например точка с запятой или запятая. В поле шаблона задается структура будущей строки, где порядковые номера колонок обозначаются специальными символами с цифрами. Опция пропуска заголовка позволяет игнорировать первую строку файла, если она содержит названия столбцов. Инструмент автоматически разбивает каждую входящую строку на составляющие и подставляет их в указанные места шаблона. Это удобно для генерации SQL-запросов, конфигурационных файлов или форматированных отчетов из выгрузок баз данных. При обработке списка пользователей можно превратить таблицу с именами и почтами в набор команд для создания учетных записей. Каждая колонка перед подстановкой очищается от лишних пробелов для обеспечения аккуратного результата. Если в шаблоне указан номер колонки, которой нет в исходной строке, на это место будет подставлена пустая строка. Инструмент эффективно работает с большими выгрусками в формате CSV, обеспечивая мгновенный результат. Преобразованные данные сохраняются в виде списка строк, готовых для дальнейшей обработки другими блоками. Гибкость настройки шаблона позволяет реализовывать сложные правила форматирования без написания кода. Использование этого блока значительно ускоряет рутинные задачи по миграции данных между системами. Инструмент незаменим при работе с банковскими выписками или реестрами платежей. Каждая строка на выходе может быть дополнена статическим текстом для пояснения структуры данных.",
     tool_case_long_desc: "Изменение регистра букв позволяет быстро привести текстовые данные к единому стандарту написания. Доступно несколько режимов трансформации, включая перевод всех символов в верхний или нижний регистр. Режим заглавных букв в начале предложений автоматически корректирует текст, делая первую букву после точки большой. Опция изменения регистра каждого слова делает первую букву каждого слова заглавной, что полезно для заголовков или имен. Инструмент корректно обрабатывает кириллицу и латиницу, учитывая особенности алфавитов. При обработке списков переменных в программном коде приведение к одному регистру помогает избежать ошибок именования. В базах данных нормализация регистра имен пользователей обеспечивает единообразие и упрощает последующий поиск. Блок обрабатывает каждую строку независимо, сохраняя исходную структуру списка. Это быстрый способ исправить небрежный ввод данных в веб-формах или при импорте из разных источников. Использование нижнего регистра часто требуется при подготовке данных для последующего сравнения или поиска дубликатов. Инструмент не добавляет и не удаляет символы, меняя только их начертание. Результат работы виден мгновенно и может быть передан следующим звеньям конвейера. Простота настройки делает этот блок незаменимым при подготовке текстовых отчетов. Высокая скорость обработки гарантирует отсутствие задержек даже при работе с очень длинными списками. Корректный регистр важен для профессионального вида документации и технической переписки.",
     tool_wrapper_long_desc: "Обертка строк добавляет произвольный текст в начало и в конец каждой строки обрабатываемого списка. В поле префикса вводится текст, который должен появиться перед исходным содержанием строки. Поле суффикса предназначено для символов, которые будут добавлены в самом конце. Инструмент полезен для превращения обычного списка слов в набор элементов массива для программного кода. Можно легко добавить кавычки вокруг каждой строки и запятую в конце для использования в конфигурационных файлах JSON или JavaScript. При формировании SQL-запросов обертка помогает добавить необходимые части команд вокруг идентификаторов. Блок работает со всеми входящими строками без исключения, сохраняя их порядок. Это значительно ускоряет процесс подготовки данных для вставки в другие системы или документы. Если одно из полей оставить пустым, добавление будет произведено только с одной стороны. Инструмент не меняет исходный текст внутри строки, воздействуя только на его границы. При обработке путей к файлам можно быстро добавить корневую директорию ко всем записям. Результат форматирования передается дальше по цепочке для возможной склейки или фильтрации. Простота и наглядность работы делает этот блок одним из самых часто используемых при сборке данных. Обертка экономит время, избавляя от необходимости вручную редактировать каждую строку в текстовом редакторе. Обертка позволяет быстро превратить обычный текст в элементы структурированного программного кода.",
@@ -32,8 +32,8 @@ class LLMClient {
         let endpoint = this.settings.provider === 'deepseek' ? 'https://api.deepseek.com/chat/completions' : 'https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions';
 
         if (this.settings.provider === 'qwen_oauth') {
-            const creds = JSON.parse(localStorage.getItem('qwen_oauth') || 'null');
-            if (!creds || !creds.access_token) {
+            const creds = await this.qwenCredentials();
+            if (!creds) {
                 throw new Error(i18n.t('tool_llm_auth_required'));
             }
             token = creds.access_token;
@@ -44,6 +44,12 @@ class LLMClient {
         }
 
         const batchSize = parseInt(params.batchSize) || 1;
+
+        if (params.stream !== true) {
+            const batched = await this.processOnServer(lines, params, endpoint, token, batchSize);
+            if (batched) return batched;
+        }
+
         const results = [];
         let totalPromptTokens = 0;
         let totalCompletionTokens = 0;
@@ -58,8 +64,9 @@ class LLMClient {
                     { role: 'system', content: params.systemPrompt },
                     { role: 'user', content: userContent }
                 ],
-                stream: false
+                stream: params.stream === true
             };
+            if (payload.stream) payload.stream_options = { include_usage: true };
 
             const proxyUrl = `${this.settings.baseUrl}/proxy?url=${encodeURIComponent(endpoint)}`;
             const response = await fetch(proxyUrl, {
@@ -76,26 +83,123 @@ class LLMClient {
                 throw new Error(err.error?.message || `HTTP ${response.status}`);
             }
 
-            const data = await response.json();
-            const reply = data.choices?.[0]?.message?.content || '';
+            let reply = '';
+            let usage = null;
+            if (payload.stream && (response.headers.get('Content-Type') || '').includes('text/event-stream')) {
+                usage = await this.readStream(response, (partial) => {
+                    if (ui && ui.previewOutput) ui.previewOutput([...results, ...partial.split('\n')]);
+                }, (text) => { reply = text; });
+            } else {
+                const data = await response.json();
+                reply = data.choices?.[0]?.message?.content || '';
+                usage = data.usage;
+            }
             results.push(...reply.split('\n'));
 
-            if (data.usage) {
-                totalPromptTokens += data.usage.prompt_tokens || 0;
-                totalCompletionTokens += data.usage.completion_tokens || 0;
+            if (usage) {
+                totalPromptTokens += usage.prompt_tokens || 0;
+                totalCompletionTokens += usage.completion_tokens || 0;
             }
         }
 
+        return { result: results, stats: this.usageStats(totalPromptTokens, totalCompletionTokens) };
+    }
+
+    // The proxy keeps its own refreshed copy of the token and swaps it in for the one sent here,
+    // so a stale token still works; with none stored in the browser, the proxy's login is used.
+    async qwenCredentials() {
+        const creds = JSON.parse(localStorage.getItem('qwen_oauth') || 'null');
+        if (creds && creds.access_token) return creds;
+        try {
+            const res = await fetch(`${this.settings.baseUrl}/auth/status`);
+            const status = await res.json();
+            if (status.authorized) return { access_token: '', resourceUrl: status.resource_url };
+        } catch (e) {
+            console.warn('Proxy auth status unavailable:', e);
+        }
+        return null;
+    }
+
+    usageStats(promptTokens, completionTokens) {
         return {
-            result: results,
-            stats: {
-                [i18n.t('tool_llm_stats_prompt')]: totalPromptTokens,
-                [i18n.t('tool_llm_stats_completion')]: totalCompletionTokens,
-                [i18n.t('tool_llm_stats_tokens')]: totalPromptTokens + totalCompletionTokens
-            }
+            [i18n.t('tool_llm_stats_prompt')]: promptTokens,
+            [i18n.t('tool_llm_stats_completion')]: completionTokens,
+            [i18n.t('tool_llm_stats_tokens')]: promptTokens + completionTokens
         };
     }
 
+    // Lets the proxy fan the batches out concurrently. Returns null when the proxy
+    // predates the /llm/batch route so the caller can fall back to sequential requests.
+    async processOnServer(lines, params, endpoint, token, batchSize) {
+        const response = await fetch(`${this.settings.baseUrl}/llm/batch`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${token}`
+            },
+            body: JSON.stringify({
+                url: endpoint,
+                model: this.settings.model,
+                systemPrompt: params.systemPrompt,
+                promptTemplate: params.promptTemplate,
+                lines,
+                batchSize
+            })
+        });
+
+        if (response.status === 404 || response.status === 405) return null;
+
+        if (!response.ok) {
+            const err = await response.json().catch(() => ({}));
+            throw new Error(err.error?.message || `HTTP ${response.status}`);
+        }
+
+        const data = await response.json();
+        const usage = data.usage || {};
+        return { result: data.result || [], stats: this.usageStats(usage.prompt_tokens || 0, usage.completion_tokens || 0) };
+    }
+
+    // Reads an OpenAI-compatible SSE stream, reporting the accumulated reply as deltas arrive.
+    // Returns the usage object sent in the final chunk, if any.
+    async readStream(response, onProgress, onDone) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let reply = '';
+        let usage = null;
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            const events = buffer.split('\n');
+            buffer = events.pop();
+            let changed = false;
+            for (const event of events) {
+                const line = event.trim();
+                if (!line.startsWith('data:')) continue;
+                const data = line.slice(5).trim();
+                if (!data || data === '[DONE]') continue;
+                try {
+                    const chunk = JSON.parse(data);
+                    const delta = chunk.choices?.[0]?.delta?.content;
+                    if (delta) {
+                        reply += delta;
+                        changed = true;
+                    }
+                    if (chunk.usage) usage = chunk.usage;
+                } catch (e) {
+                    console.warn('Skipping malformed stream chunk:', data);
+                }
+            }
+            if (changed) onProgress(reply);
+        }
+
+        onDone(reply);
+        return usage;
+    }
+
     async generatePKCE() {
         const array = new Uint8Array(32);
         window.crypto.getRandomValues(array);
@@ -180,8 +284,8 @@ class LLMClient {
         let endpoint = this.settings.provider === 'deepseek' ? 'https://api.deepseek.com/models' : 'https://dashscope.aliyuncs.com/compatible-mode/v1/models';
 
         if (this.settings.provider === 'qwen_oauth') {
-            const creds = JSON.parse(localStorage.getItem('qwen_oauth') || 'null');
-            if (!creds || !creds.access_token) return this.providers[this.settings.provider];
+            const creds = await this.qwenCredentials();
+            if (!creds) return this.providers[this.settings.provider];
             token = creds.access_token;
             if (creds.resourceUrl) {
                 const ru = creds.resourceUrl.startsWith('http') ? creds.resourceUrl : `https://${creds.resourceUrl}`;
@@ -219,8 +323,8 @@ class LLMClient {
         let endpoint = this.settings.provider === 'deepseek' ? 'https://api.deepseek.com/chat/completions' : 'https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions';
 
         if (this.settings.provider === 'qwen_oauth') {
-            const creds = JSON.parse(localStorage.getItem('qwen_oauth') || 'null');
-            if (!creds || !creds.access_token) {
+            const creds = await this.qwenCredentials();
+            if (!creds) {
                 throw new Error('LLM Auth Required');
             }
             token = creds.access_token;
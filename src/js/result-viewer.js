@@ -0,0 +1,206 @@
+// --- PAGED RESULT VIEWER ---
+
+const VIEWER_ROW_HEIGHT = 20;
+const VIEWER_MAX_HEIGHT = 350;
+// Browsers cap element heights (about 17M px in Firefox): longer lists scroll proportionally
+const VIEWER_MAX_SCROLL = 10000000;
+const REMOTE_PAGE_SIZE = 500;
+const REMOTE_CACHED_PAGES = 40;
+
+// Lines held by the page, as produced by a chain run in the browser
+class ArrayLines {
+    constructor(lines, delimiter) {
+        this.lines = lines;
+        this.delimiter = delimiter;
+        this.total = lines.length;
+    }
+
+    getLines(offset, limit) {
+        return this.lines.slice(offset, offset + limit);
+    }
+
+    search(query, start, limit = 100) {
+        const matches = [];
+        for (let i = start; i < this.total; i++) {
+            if (this.lines[i].includes(query)) {
+                matches.push(i);
+                if (matches.length >= limit) return { matches, next: i + 1 < this.total ? i + 1 : null };
+            }
+        }
+        return { matches, next: null };
+    }
+
+    text() {
+        return this.lines.join(this.delimiter);
+    }
+
+    // The parts are joined by the Blob, so no single string of the whole output is built
+    async download(name) {
+        const parts = [];
+        this.lines.forEach((line, i) => {
+            if (i) parts.push(this.delimiter);
+            parts.push(line);
+        });
+        const url = URL.createObjectURL(new Blob(parts, { type: 'text/plain' }));
+        clickDownload(url, `${name}.txt`);
+        URL.revokeObjectURL(url);
+    }
+}
+
+// Lines of a source (/source) or chain result (/result) kept by the proxy, fetched by pages
+class RemoteLines {
+    constructor(baseUrl, kind, id, total, delimiter = '\n') {
+        this.url = `${baseUrl}/${kind}/${id}`;
+        this.total = total;
+        this.delimiter = delimiter;
+        this.pages = new Map();
+    }
+
+    page(index) {
+        let page = this.pages.get(index);
+        if (page) {
+            this.pages.delete(index);
+        } else {
+            page = fetch(`${this.url}?offset=${index * REMOTE_PAGE_SIZE}&limit=${REMOTE_PAGE_SIZE}`)
+                .then(r => r.ok ? r.json() : Promise.reject(new Error(`HTTP ${r.status}`)))
+                .then(data => data.lines);
+            page.catch(() => this.pages.delete(index));
+            if (this.pages.size >= REMOTE_CACHED_PAGES) this.pages.delete(this.pages.keys().next().value);
+        }
+        this.pages.set(index, page);
+        return page;
+    }
+
+    async getLines(offset, limit) {
+        const end = Math.min(offset + limit, this.total);
+        const first = Math.floor(offset / REMOTE_PAGE_SIZE);
+        const last = Math.floor(Math.max(end - 1, offset) / REMOTE_PAGE_SIZE);
+        const pages = [];
+        for (let p = first; p <= last; p++) pages.push(this.page(p));
+        const lines = (await Promise.all(pages)).flat();
+        return lines.slice(offset - first * REMOTE_PAGE_SIZE, end - first * REMOTE_PAGE_SIZE);
+    }
+
+    async search(query, start, limit = 100) {
+        const r = await fetch(`${this.url}/search?q=${encodeURIComponent(query)}&start=${start}&limit=${limit}`);
+        if (!r.ok) throw new Error(`HTTP ${r.status}`);
+        return r.json();
+    }
+
+    async text() {
+        const r = await fetch(`${this.url}/download`);
+        if (!r.ok) throw new Error(`HTTP ${r.status}`);
+        return r.text();
+    }
+
+    async download(name) {
+        clickDownload(`${this.url}/download?name=${encodeURIComponent(name)}`, `${name}.txt`);
+    }
+}
+
+function clickDownload(url, filename) {
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = filename;
+    document.body.appendChild(a);
+    a.click();
+    document.body.removeChild(a);
+}
+
+// Shows the lines of an ArrayLines or RemoteLines, keeping only the rows in view in the DOM
+class ResultViewer {
+    constructor(container) {
+        this.container = container;
+        this.container.classList.add('result-viewer');
+        this.container.textContent = '';
+        this.spacer = document.createElement('div');
+        this.spacer.className = 'viewer-spacer';
+        this.rows = document.createElement('div');
+        this.rows.className = 'viewer-rows';
+        this.spacer.appendChild(this.rows);
+        this.container.appendChild(this.spacer);
+        this.source = new ArrayLines([], '\n');
+        this.highlight = -1;
+        this.generation = 0;
+        this.frame = null;
+        this.container.addEventListener('scroll', () => this.scheduleRender());
+    }
+
+    show(source) {
+        this.source = source;
+        this.highlight = -1;
+        const rows = Math.max(source.total, 1);
+        this.container.style.height = `${Math.min(rows * VIEWER_ROW_HEIGHT + 2, VIEWER_MAX_HEIGHT)}px`;
+        this.spacer.style.height = `${Math.min(source.total * VIEWER_ROW_HEIGHT, VIEWER_MAX_SCROLL)}px`;
+        this.container.scrollTop = 0;
+        this.render();
+    }
+
+    get scaled() {
+        return this.source.total * VIEWER_ROW_HEIGHT > VIEWER_MAX_SCROLL;
+    }
+
+    visibleRows() {
+        return Math.ceil(this.container.clientHeight / VIEWER_ROW_HEIGHT) + 1;
+    }
+
+    firstRow() {
+        if (!this.scaled) return Math.floor(this.container.scrollTop / VIEWER_ROW_HEIGHT);
+        const range = Math.max(this.spacer.offsetHeight - this.container.clientHeight, 1);
+        return Math.floor(this.container.scrollTop / range * Math.max(this.source.total - this.visibleRows() + 1, 0));
+    }
+
+    scheduleRender() {
+        if (this.frame !== null) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.render();
+        });
+    }
+
+    async render() {
+        const generation = ++this.generation;
+        const source = this.source;
+        const first = this.firstRow();
+        let lines;
+        try {
+            lines = await source.getLines(first, this.visibleRows());
+        } catch (e) {
+            // The proxy went away or dropped the text; the rows stay as they were
+            console.error('Could not load lines', e);
+            return;
+        }
+        // A newer render (scroll, new result) has started meanwhile
+        if (generation !== this.generation) return;
+
+        this.rows.style.top = `${this.scaled ? this.container.scrollTop : first * VIEWER_ROW_HEIGHT}px`;
+        const fragment = document.createDocumentFragment();
+        lines.forEach((line, i) => {
+            const row = document.createElement('div');
+            row.className = first + i === this.highlight ? 'viewer-row highlight' : 'viewer-row';
+            // Numbered by CSS, so the rows' text is the output itself
+            row.dataset.line = first + i + 1;
+            row.appendChild(document.createTextNode(line.replace(/\r?\n/g, '↵')));
+            if (first + i + 1 < source.total) {
+                // Hidden, but part of the text when the rows are copied or read as a whole
+                const delim = document.createElement('span');
+                delim.className = 'viewer-delim';
+                delim.textContent = source.delimiter;
+                row.appendChild(delim);
+            }
+            fragment.appendChild(row);
+        });
+        this.rows.replaceChildren(fragment);
+    }
+
+    scrollToLine(index) {
+        this.highlight = index;
+        const range = this.spacer.offsetHeight - this.container.clientHeight;
+        if (this.scaled) {
+            this.container.scrollTop = index / Math.max(this.source.total - this.visibleRows() + 1, 1) * range;
+        } else {
+            this.container.scrollTop = index * VIEWER_ROW_HEIGHT - this.container.clientHeight / 3;
+        }
+        this.render();
+    }
+}
@@ -8,6 +8,241 @@ function resolveDelimiter(params, id = 'delimiter', defaultVal = '\n') {
     return val || defaultVal;
 }
 
+// Compiled patterns are reused across chain runs; least recently used ones are dropped first
+const REGEX_CACHE_SIZE = 256;
+const regexCache = new Map();
+
+function cachedPattern(key, build) {
+    let value = regexCache.get(key);
+    if (value !== undefined) {
+        regexCache.delete(key);
+    } else {
+        value = build();
+        if (regexCache.size >= REGEX_CACHE_SIZE) regexCache.delete(regexCache.keys().next().value);
+    }
+    regexCache.set(key, value);
+    return value;
+}
+
+function cachedRegExp(source, flags) {
+    return cachedPattern(`${flags}/${source}`, () => new RegExp(source, flags));
+}
+
+// One pattern (or query) per line of a multi-line param; blank lines are ignored
+function patternList(value) {
+    return (value || '').split('\n').filter(p => p);
+}
+
+function escapeRegExp(text) {
+    return text.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+}
+
+function countGroups(pattern) {
+    let count = 0;
+    let inClass = false;
+    for (let i = 0; i < pattern.length; i++) {
+        const c = pattern[i];
+        if (c === '\\') i++;
+        else if (inClass) inClass = c !== ']';
+        else if (c === '[') inClass = true;
+        else if (c === '(' && (pattern[i + 1] !== '?' ||
+            (pattern.startsWith('?<', i + 1) && !pattern.startsWith('?<=', i + 1) && !pattern.startsWith('?<!', i + 1)))) count++;
+    }
+    return count;
+}
+
+function shiftBackreferences(pattern, groups, shift) {
+    let out = '';
+    let inClass = false;
+    for (let i = 0; i < pattern.length; i++) {
+        const c = pattern[i];
+        if (c === '\\') {
+            const ref = inClass ? null : /^[1-9]\d*/.exec(pattern.slice(i + 1));
+            if (!ref) {
+                out += pattern.slice(i, i + 2);
+            } else if (parseInt(ref[0], 10) <= groups) {
+                out += '\\' + (parseInt(ref[0], 10) + shift);
+                i += ref[0].length - 1;
+            } else {
+                // Annex B: not a back reference, so an octal escape or the digit itself
+                const octal = /^(?:[0-3][0-7]{0,2}|[4-7][0-7]?)/.exec(pattern.slice(i + 1));
+                out += octal ? '\\x' + parseInt(octal[0], 8).toString(16).padStart(2, '0') : pattern[i + 1];
+                i += octal ? octal[0].length - 1 : 0;
+            }
+            i++;
+            continue;
+        }
+        if (inClass) inClass = c !== ']';
+        else if (c === '[') inClass = true;
+        out += c;
+    }
+    return out;
+}
+
+// Joins patterns into one alternation (p1)|(p2)|...: at each position the earliest matching pattern wins
+function combinedRegExp(patterns, flags) {
+    return cachedPattern(`${flags}|${patterns.join('\n')}`, () => {
+        const parts = [];
+        const alternatives = [];
+        let group = 1;
+        patterns.forEach(pattern => {
+            const groups = countGroups(pattern);
+            const names = new Set([...pattern.matchAll(/\(\?<([^=!>][^>]*)>/g)].map(m => m[1]));
+            parts.push(`(${shiftBackreferences(pattern, groups, group)})`);
+            alternatives.push({ group, groups, names });
+            group += groups + 1;
+        });
+        return { regex: new RegExp(parts.join('|'), flags), alternatives };
+    });
+}
+
+// Compiled nunjucks templates by source, so re-running a chain does not parse its template again.
+// nunjucks copies the context up front, so whether to join `body` is decided from the source.
+const TEMPLATE_CACHE_SIZE = 64;
+const templateCache = new Map();
+
+function compileTemplate(source) {
+    let entry = templateCache.get(source);
+    if (entry) {
+        templateCache.delete(source);
+    } else {
+        entry = { tpl: nunjucks.compile(source), usesBody: /\bbody\b/.test(source) };
+        if (templateCache.size >= TEMPLATE_CACHE_SIZE) templateCache.delete(templateCache.keys().next().value);
+    }
+    templateCache.set(source, entry);
+    return entry;
+}
+
+// Expands $1, $&, $<name>, $$ ... like String.prototype.replace for one pattern of a combined RegExp:
+// its group numbers are shifted by offset and only its own group names are resolved
+function compileReplacement(template, groups, offset, names) {
+    const parts = [];
+    let pos = 0;
+    for (const m of template.matchAll(/\$(\$|&|`|'|\d{1,2}|<[^>]*>)/g)) {
+        const token = m[1];
+        const literal = template.slice(pos, m.index);
+        pos = m.index + m[0].length;
+        if (token === '$') parts.push(literal + '$');
+        else if (token === '&') parts.push(literal, 0);
+        else if (token === '`') parts.push(literal, { prefix: true });
+        else if (token === "'") parts.push(literal, { suffix: true });
+        else if (token[0] === '<') parts.push(literal, { name: token.slice(1, -1) });
+        else {
+            const num = parseInt(token, 10);
+            const first = parseInt(token[0], 10);
+            if (num >= 1 && num <= groups) parts.push(literal, num + offset);
+            else if (token.length === 2 && first >= 1 && first <= groups) parts.push(literal, first + offset, token[1]);
+            else parts.push(literal + m[0]);
+        }
+    }
+    parts.push(template.slice(pos));
+
+    return (captures, position, input, named) => parts.map(p => {
+        if (typeof p === 'string') return p;
+        if (typeof p === 'number') return captures[p] !== undefined ? captures[p] : '';
+        if (p.prefix) return input.slice(0, position);
+        if (p.suffix) return input.slice(position + captures[0].length);
+        if (names.has(p.name)) return named[p.name] !== undefined ? named[p.name] : '';
+        return `$<${p.name}>`;
+    }).join('');
+}
+
+function regexMulti(lines, patterns, params, flags) {
+    const { regex, alternatives } = combinedRegExp(patterns, flags);
+    const replacement = params.replacement || '';
+    const expanders = alternatives.map(a => compileReplacement(replacement, a.groups, a.group, a.names));
+    const expand = (captures, position, input, named) => {
+        const i = alternatives.findIndex(a => captures[a.group] !== undefined);
+        return expanders[i](captures, position, input, named);
+    };
+
+    let count = 0;
+    let result;
+    if (params.onlyMatched) {
+        result = lines.map(line => {
+            let out = '';
+            for (const m of line.matchAll(regex)) {
+                count++;
+                out += replacement ? expand(m, m.index, m.input, m.groups) : m[0];
+            }
+            return out;
+        });
+    } else {
+        result = lines.map(line => line.replace(regex, (...args) => {
+            count++;
+            const named = typeof args[args.length - 1] === 'object' ? args.pop() : undefined;
+            const input = args.pop();
+            const position = args.pop();
+            return expand(args, position, input, named);
+        }));
+    }
+    return { result, stats: { matches: count } };
+}
+
+// Keeps lines matching any of the queries, checking all of them in one pass per line
+function filterMulti(lines, queries, mode) {
+    let test;
+    if (mode === 'contains' || mode === 'not_contains') {
+        // Longest first, so that the engine's literal prefix checks fail as early as possible
+        const any = cachedPattern(`any|${queries.join('\n')}`, () =>
+            new RegExp(queries.slice().sort((a, b) => b.length - a.length).map(escapeRegExp).join('|')));
+        const keep = mode === 'contains';
+        test = val => any.test(val) === keep;
+    } else if (mode === 'starts') {
+        test = val => queries.some(q => val.startsWith(q));
+    } else if (mode === 'ends') {
+        test = val => queries.some(q => val.endsWith(q));
+    } else {
+        test = () => true;
+    }
+    return lines.filter(item => test(item.toLowerCase()));
+}
+
+function mulberry32(a) {
+    return function () {
+        let t = a += 0x6D2B79F5;
+        t = Math.imul(t ^ t >>> 15, t | 1);
+        t ^= t + Math.imul(t ^ t >>> 7, t | 61);
+        return ((t ^ t >>> 14) >>> 0) / 4294967296;
+    }
+}
+
+// Sample size "N" (lines) or "P%": returns { count } or { fraction }, or null when invalid
+function parseSampleSize(value) {
+    const text = String(value ?? '').trim();
+    const percent = text.endsWith('%');
+    const number = percent ? text.slice(0, -1).trim() : text;
+    const n = number ? Number(number) : NaN;
+    if (percent) return n >= 0 && n <= 100 ? { fraction: n / 100 } : null;
+    return Number.isInteger(n) && n >= 0 ? { count: n } : null;
+}
+
+// Seeded sample in input order: a reservoir of `count` lines (one per key in stratified mode)
+// or each line kept with probability `fraction`. Same random sequence as the headless runner.
+function sampleLines(lines, size, random, key) {
+    if (size.fraction !== undefined) {
+        const result = lines.filter(() => random() < size.fraction);
+        return { result, stats: { total: lines.length, sampled: result.length } };
+    }
+    const reservoirs = new Map();
+    lines.forEach((line, index) => {
+        const stratum = key ? key(line) : '';
+        let reservoir = reservoirs.get(stratum);
+        if (!reservoir) reservoirs.set(stratum, reservoir = { seen: 0, items: [] });
+        const n = reservoir.seen++;
+        if (n < size.count) {
+            reservoir.items.push([index, line]);
+        } else {
+            const j = Math.floor(random() * (n + 1));
+            if (j < size.count) reservoir.items[j] = [index, line];
+        }
+    });
+    const picked = [...reservoirs.values()].flatMap(r => r.items).sort((a, b) => a[0] - b[0]);
+    const stats = { total: lines.length, sampled: picked.length };
+    if (key) stats.strata = reservoirs.size;
+    return { result: picked.map(([, line]) => line), stats };
+}
+
 const TOOLS = [
     {
         id: 'regex',
@@ -16,17 +251,21 @@ const TOOLS = [
         description: 'tool_regex_desc',
         long_description: 'tool_regex_long_desc',
         params: [
-            { id: 'pattern', type: 'text', label: 'tool_regex_pattern', placeholder: '\\d+', value: '\\d+' },
+            { id: 'pattern', type: 'textarea', label: 'tool_regex_pattern', placeholder: '\\d+', value: '\\d+' },
             { id: 'replacement', type: 'text', label: 'tool_regex_replacement', placeholder: '[$1]', value: '' },
             { id: 'caseInsensitive', type: 'checkbox', label: 'tool_regex_case', value: false },
             { id: 'onlyMatched', type: 'checkbox', label: 'tool_regex_only_matched', value: false }
         ],
         help: 'https://en.wikipedia.org/wiki/Regular_expression',
         process: (lines, params) => {
-            if (!params.pattern) return { result: lines, stats: { msg: i18n.t('tool_regex_empty') } };
+            // A lone pattern typed in the textarea often ends with a newline
+            const patterns = patternList(params.pattern);
+            if (!patterns.length) return { result: lines, stats: { msg: i18n.t('tool_regex_empty') } };
             try {
                 const flags = 'gm' + (params.caseInsensitive ? 'i' : '');
-                const regex = new RegExp(params.pattern, flags);
+                if (patterns.length > 1) return regexMulti(lines, patterns, params, flags);
+                const pattern = patterns[0];
+                const regex = cachedRegExp(pattern, flags);
 
                 let count = 0;
                 let result = [];
@@ -39,7 +278,7 @@ const TOOLS = [
                                 count++;
                                 if (params.replacement) {
                                     // Apply replacement to the match itself
-                                    const singleRegex = new RegExp(params.pattern, flags.replace('g', ''));
+                                    const singleRegex = cachedRegExp(pattern, flags.replace('g', ''));
                                     return m[0].replace(singleRegex, params.replacement);
                                 } else {
                                     return m[0];
@@ -167,9 +406,14 @@ const TOOLS = [
         params: [
             { id: 'list2', type: 'textarea', label: 'tool_compare_list2', placeholder: 'tool_compare_placeholder', value: '' },
             { id: 'delimiter', type: 'delimiter', label: 'tool_compare_delimiter', value: '\\n' },
-            { id: 'operation', type: 'select', label: 'tool_compare_show', options: [{ v: 'common', l: 'tool_compare_common' }, { v: 'diff', l: 'tool_compare_diff' }, { v: 'all', l: 'tool_compare_all' }], value: 'common' }
+            { id: 'operation', type: 'select', label: 'tool_compare_show', options: [{ v: 'common', l: 'tool_compare_common' }, { v: 'diff', l: 'tool_compare_diff' }, { v: 'all', l: 'tool_compare_all' }], value: 'common' },
+            { id: 'dataset', type: 'text', label: 'tool_compare_dataset', placeholder: 'tool_compare_dataset_placeholder', value: '' }
         ],
         process: (lines, params) => {
+            // Datasets are files read by the Python runner (python -m stringlom or /chain/run)
+            if ((params.dataset || '').trim()) {
+                return { result: [i18n.t('tool_compare_dataset_runner')], error: true };
+            }
             const delim = resolveDelimiter(params, 'delimiter', '\n');
             const setA = new Set(lines.map(x => x.trim()).filter(x => x));
             const listB = (params.list2 || '').split(delim).map(x => x.trim()).filter(x => x);
@@ -230,13 +474,14 @@ const TOOLS = [
         description: 'tool_filter_desc',
         long_description: 'tool_filter_long_desc',
         params: [
-            { id: 'query', type: 'text', label: 'tool_filter_query', value: '' },
+            { id: 'query', type: 'textarea', label: 'tool_filter_query', value: '' },
             { id: 'mode', type: 'select', label: 'tool_sort_mode', options: [{ v: 'contains', l: 'tool_filter_contains' }, { v: 'not_contains', l: 'tool_filter_not_contains' }, { v: 'starts', l: 'tool_filter_starts' }, { v: 'ends', l: 'tool_filter_ends' }], value: 'contains' }
         ],
         process: (lines, params) => {
-            const q = (params.query || '').toLowerCase();
+            const queries = patternList(params.query).map(q => q.toLowerCase());
+            const q = queries[0] || '';
 
-            const res = lines.filter(item => {
+            const res = queries.length > 1 ? filterMulti(lines, queries, params.mode) : lines.filter(item => {
                 const val = item.toLowerCase();
                 if (params.mode === 'contains') return val.includes(q);
                 if (params.mode === 'not_contains') return !val.includes(q);
@@ -544,10 +789,8 @@ const TOOLS = [
         help: 'https://mozilla.github.io/nunjucks/templating.html',
         process: (lines, params) => {
             try {
-                const res = nunjucks.renderString(params.tpl || '', {
-                    body: lines.join('\n'),
-                    lines: lines
-                });
+                const { tpl, usesBody } = compileTemplate(params.tpl || '');
+                const res = tpl.render(usesBody ? { body: lines.join('\n'), lines } : { lines });
                 return { result: res.split('\n'), stats: { length: res.length } };
             } catch (e) {
                 return { result: [e.message], error: true };
@@ -563,6 +806,8 @@ const TOOLS = [
         params: [
             { id: 'code', type: 'textarea', label: 'tool_js_function_code', value: 'return line.toUpperCase();' }
         ],
+        // User code may depend on the time, Math.random() etc.
+        cache: false,
         process: (lines, params) => {
             try {
                 const fn = new Function('line', params.code || 'return line');
@@ -586,7 +831,16 @@ const TOOLS = [
         description: 'tool_shuffle_desc',
         long_description: 'tool_shuffle_long_desc',
         params: [
-            { id: 'seed', type: 'text', label: 'tool_shuffle_seed', value: '' }
+            { id: 'seed', type: 'text', label: 'tool_shuffle_seed', value: '' },
+            {
+                id: 'mode', type: 'select', label: 'tool_shuffle_mode', options: [
+                    { v: 'shuffle', l: 'tool_shuffle_mode_shuffle' },
+                    { v: 'sample', l: 'tool_shuffle_mode_sample' },
+                    { v: 'stratified', l: 'tool_shuffle_mode_stratified' }
+                ], value: 'shuffle'
+            },
+            { id: 'size', type: 'text', label: 'tool_shuffle_size', value: '100' },
+            { id: 'keyPattern', type: 'text', label: 'tool_shuffle_key', value: '^\\S+' }
         ],
         init: (params) => {
             if (!params.seed) {
@@ -594,16 +848,26 @@ const TOOLS = [
             }
         },
         process: (lines, params) => {
-            const seedVal = parseInt(params.seed) || 0;
-            const mulberry32 = (a) => {
-                return function () {
-                    let t = a += 0x6D2B79F5;
-                    t = Math.imul(t ^ t >>> 15, t | 1);
-                    t ^= t + Math.imul(t ^ t >>> 7, t | 61);
-                    return ((t ^ t >>> 14) >>> 0) / 4294967296;
+            const random = mulberry32(parseInt(params.seed) || 0);
+            if (params.mode === 'sample' || params.mode === 'stratified') {
+                const size = parseSampleSize(params.size);
+                if (!size) return { result: [`${i18n.t('tool_shuffle_invalid_size')}${params.size ?? ''}`], error: true };
+                let key = null;
+                if (params.mode === 'stratified') {
+                    let pattern;
+                    try {
+                        pattern = cachedRegExp(params.keyPattern || '', '');
+                    } catch (e) {
+                        return { result: [e.message], error: true };
+                    }
+                    // The first group if the pattern has one, else the whole match; lines without a match share ''
+                    key = line => {
+                        const m = pattern.exec(line);
+                        return m ? (m.length > 1 ? (m[1] ?? '') : m[0]) : '';
+                    };
                 }
+                return sampleLines(lines, size, random, key);
             }
-            const random = mulberry32(seedVal);
             const items = [...lines];
             for (let i = items.length - 1; i > 0; i--) {
                 const j = Math.floor(random() * (i + 1));
@@ -642,6 +906,11 @@ const TOOLS = [
         process: (lines, params) => {
             const res = [];
             const encoder = new TextEncoder();
+            const hexBytes = Array.from({ length: 256 }, (_, b) => {
+                const h = b.toString(16).padStart(2, '0');
+                return params.uppercase ? h.toUpperCase() : h;
+            });
+            const toHexStr = (b) => hexBytes[b];
 
             const win1251Encode = (str) => {
                 const arr = new Uint8Array(str.length);
@@ -725,15 +994,13 @@ const TOOLS = [
 
                 if (!bytes) return;
 
-                const toHexStr = (b) => {
-                    let h = b.toString(16).padStart(2, '0');
-                    return params.uppercase ? h.toUpperCase() : h;
-                };
-
-                if (params.format === 'plain') {
-                    res.push(Array.from(bytes).map(toHexStr).join(''));
-                } else if (params.format === 'spaced') {
-                    res.push(Array.from(bytes).map(toHexStr).join(' '));
+                if (params.format === 'plain' || params.format === 'spaced') {
+                    const sep = params.format === 'plain' ? '' : ' ';
+                    let h = '';
+                    for (let i = 0; i < bytes.length; i++) {
+                        h += (i ? sep : '') + hexBytes[bytes[i]];
+                    }
+                    res.push(h);
                 } else {
                     const showAscii = params.format === 'dump_ascii';
                     for (let i = 0; i < bytes.length; i += 16) {
@@ -936,6 +1203,7 @@ const TOOLS = [
                 return crcTable;
             };
             let crcTable = null;
+            const encoder = new TextEncoder();
 
             let errors = 0;
             const res = lines.map(line => {
@@ -944,7 +1212,6 @@ const TOOLS = [
                     if (params.algorithm === 'crc32') {
                         if (!crcTable) crcTable = makeCRCTable();
                         let crc = 0 ^ (-1);
-                        const encoder = new TextEncoder();
                         const bytes = encoder.encode(line);
                         for (let i = 0; i < bytes.length; i++) {
                             crc = (crc >>> 8) ^ crcTable[(crc ^ bytes[i]) & 0xFF];
@@ -1029,10 +1296,13 @@ const TOOLS = [
         params: [
             { id: 'systemPrompt', type: 'textarea', label: 'tool_llm_system_prompt', value: 'You are a helpful assistant.' },
             { id: 'promptTemplate', type: 'textarea', label: 'tool_llm_prompt_tpl', value: '{{ line }}' },
-            { id: 'batchSize', type: 'number', label: 'tool_llm_batch_size', value: 1 }
+            { id: 'batchSize', type: 'number', label: 'tool_llm_batch_size', value: 1 },
+            { id: 'stream', type: 'checkbox', label: 'tool_llm_stream', value: false }
         ],
         async: true,
         manualRun: true,
+        // Results also depend on the provider and model from the LLM settings
+        cacheKey: () => `${window.llmClient.settings.provider}|${window.llmClient.settings.model}`,
         process: async (lines, params, blockId, ui) => {
             return await window.llmClient.process(lines, params, blockId, ui);
         }
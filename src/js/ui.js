@@ -1,3 +1,72 @@
+// Files larger than this are kept by the proxy (when one is set) instead of in the textarea
+const SOURCE_INLINE_LIMIT = 8 * 1024 * 1024;
+// Longer source texts are not remembered in localStorage
+const SOURCE_STORAGE_LIMIT = 1024 * 1024;
+
+// --- BLOCK RESULT CACHE ---
+
+// cyrb53: fast 53-bit string hash, used for cache keys
+function hashString(str, seed = 0) {
+    let h1 = 0xdeadbeef ^ seed, h2 = 0x41c6ce57 ^ seed;
+    for (let i = 0; i < str.length; i++) {
+        const ch = str.charCodeAt(i);
+        h1 = Math.imul(h1 ^ ch, 2654435761);
+        h2 = Math.imul(h2 ^ ch, 1597334677);
+    }
+    h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+    h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+    return 4294967296 * (2097151 & h2) + (h1 >>> 0);
+}
+
+// LRU of block results ({ result, stats }), bounded by entry count and total stored lines
+class BlockCache {
+    constructor(maxEntries = 50, maxLines = 2000000) {
+        this.maxEntries = maxEntries;
+        this.maxLines = maxLines;
+        this.entries = new Map();
+        this.lines = 0;
+        this.hits = 0;
+        this.misses = 0;
+    }
+
+    get(key) {
+        const entry = this.entries.get(key);
+        if (entry === undefined) {
+            this.misses++;
+            return undefined;
+        }
+        // Map keeps insertion order: re-insert to mark as most recently used
+        this.entries.delete(key);
+        this.entries.set(key, entry);
+        this.hits++;
+        return entry;
+    }
+
+    set(key, entry) {
+        const size = Array.isArray(entry.result) ? entry.result.length : 1;
+        if (size > this.maxLines) return;
+        if (this.entries.has(key)) this.delete(key);
+        this.entries.set(key, { result: entry.result, stats: entry.stats, size });
+        this.lines += size;
+        while (this.entries.size > this.maxEntries || this.lines > this.maxLines) {
+            this.delete(this.entries.keys().next().value);
+        }
+    }
+
+    delete(key) {
+        const entry = this.entries.get(key);
+        if (entry) {
+            this.lines -= entry.size;
+            this.entries.delete(key);
+        }
+    }
+
+    clear() {
+        this.entries.clear();
+        this.lines = 0;
+    }
+}
+
 // --- APP ENGINE ---
 
 class BlockApp {
@@ -18,6 +87,10 @@ class BlockApp {
         this.isModified = false;
 
         this.isRunning = false;
+        this.blockCache = new BlockCache();
+        this.sourceHash = { text: null, delimiter: null, hash: null };
+        this.resultViewer = new ResultViewer(document.getElementById('final-output-box'));
+        this.finalSearch = null;
 
         // Initialize I18n
         this.updateUIStrings();
@@ -126,6 +199,17 @@ class BlockApp {
         if (copyFinalBtn) copyFinalBtn.onclick = () => this.copyFinalResult();
         const downloadFinalBtn = document.getElementById('download-final-btn');
         if (downloadFinalBtn) downloadFinalBtn.onclick = () => this.downloadFinalResult();
+        const finalSearchInput = document.getElementById('final-search-input');
+        if (finalSearchInput) {
+            finalSearchInput.addEventListener('input', () => this.resetFinalSearch());
+            finalSearchInput.addEventListener('keydown', (e) => {
+                if (e.key === 'Enter') this.searchFinalResult(e.shiftKey ? -1 : 1);
+            });
+        }
+        const finalSearchPrev = document.getElementById('final-search-prev');
+        if (finalSearchPrev) finalSearchPrev.onclick = () => this.searchFinalResult(-1);
+        const finalSearchNext = document.getElementById('final-search-next');
+        if (finalSearchNext) finalSearchNext.onclick = () => this.searchFinalResult(1);
 
         // Drag events for result block
         const resultBlock = document.querySelector('.block[data-type="result"]');
@@ -421,8 +505,14 @@ class BlockApp {
         this.renderSavedChains();
     }
 
-    copyFinalResult() {
-        const txt = document.getElementById('final-output-box').textContent;
+    async copyFinalResult() {
+        let txt;
+        try {
+            txt = await this.resultViewer.source.text();
+        } catch (e) {
+            this.alertAction(e.message);
+            return;
+        }
         if (!txt) return;
         const btn = document.getElementById('copy-final-btn');
         navigator.clipboard.writeText(txt).then(() => {
@@ -444,17 +534,53 @@ class BlockApp {
     }
 
     downloadFinalResult() {
-        const txt = document.getElementById('final-output-box').textContent;
-        if (!txt) return;
-        const blob = new Blob([txt], { type: 'text/plain' });
-        const url = URL.createObjectURL(blob);
-        const a = document.createElement('a');
-        a.href = url;
-        a.download = (this.currentChainName || 'result') + '.txt';
-        document.body.appendChild(a);
-        a.click();
-        document.body.removeChild(a);
-        URL.revokeObjectURL(url);
+        if (!this.resultViewer.source.total) return;
+        this.resultViewer.source.download(this.currentChainName || 'result');
+    }
+
+    showFinalLines(source) {
+        this.resultViewer.show(source);
+        this.resetFinalSearch();
+    }
+
+    resetFinalSearch() {
+        this.finalSearch = null;
+        this.resultViewer.highlight = -1;
+        const count = document.getElementById('final-search-count');
+        if (count) count.textContent = '';
+    }
+
+    // Steps through the matches of the search box, fetching them a batch at a time
+    async searchFinalResult(step) {
+        const input = document.getElementById('final-search-input');
+        const count = document.getElementById('final-search-count');
+        const query = input ? input.value : '';
+        if (!query) return;
+        const source = this.resultViewer.source;
+        let search = this.finalSearch;
+        if (!search || search.query !== query || search.source !== source) {
+            search = this.finalSearch = { query, source, matches: [], next: 0, pos: -1 };
+        }
+        try {
+            const atEnd = search.pos + 1 >= search.matches.length;
+            if (search.next !== null && (!search.matches.length || (step > 0 && atEnd))) {
+                const found = await source.search(query, search.next);
+                if (this.finalSearch !== search) return;
+                search.matches.push(...found.matches);
+                search.next = found.next;
+            }
+        } catch (e) {
+            if (count) count.textContent = e.message;
+            return;
+        }
+        if (!search.matches.length) {
+            if (count) count.textContent = i18n.t('search_no_matches');
+            return;
+        }
+        const total = search.matches.length;
+        search.pos = search.pos < 0 ? (step > 0 ? 0 : total - 1) : (search.pos + step + total) % total;
+        if (count) count.textContent = `${search.pos + 1} / ${search.matches.length}${search.next !== null ? '+' : ''}`;
+        this.resultViewer.scrollToLine(search.matches[search.pos]);
     }
 
     genId() {
@@ -802,7 +928,7 @@ class BlockApp {
         const idx = saved.findIndex(x => x.id === this.currentChainId);
         if (idx !== -1) {
             saved[idx].name = newName;
-            localStorage.setItem('strings_saved_chains', JSON.stringify(saved));
+            this.setSavedChains(saved);
             this.currentChainName = newName;
             this.updateWorkspaceTitle();
             this.renderSavedChains();
@@ -839,6 +965,7 @@ class BlockApp {
 
         const defaultSource = i18n.t('default_source_text');
         const currentSourceValue = (this.chain.length > 0 && !clearData) ? this.chain[0].value : defaultSource;
+        const currentSourceRef = (this.chain.length > 0 && !clearData) ? this.chain[0].sourceRef : undefined;
 
         this.chain = blocksData.map(blockData => {
             return {
@@ -846,7 +973,8 @@ class BlockApp {
                 type: blockData.type,
                 params: blockData.params || {},
                 manualRun: blockData.manualRun === true,
-                value: blockData.type === 'source' ? currentSourceValue : null
+                value: blockData.type === 'source' ? currentSourceValue : null,
+                sourceRef: blockData.type === 'source' ? currentSourceRef : undefined
             };
         });
 
@@ -870,11 +998,13 @@ class BlockApp {
         this.isModified = false;
     }
 
-    shareChain() {
+    async shareChain() {
         const config = this.getChainConfig();
         try {
-            const json = JSON.stringify(config);
-            const encoded = btoa(unescape(encodeURIComponent(json)));
+            // Older browsers without CompressionStream share the longer base64 JSON links
+            const encoded = ChainFormat.isSupported()
+                ? await ChainFormat.toLinkValue(config)
+                : btoa(unescape(encodeURIComponent(JSON.stringify(config))));
             const url = new URL(window.location.href);
             url.searchParams.delete('id');
             url.searchParams.set('chain', encoded);
@@ -891,13 +1021,14 @@ class BlockApp {
         }
     }
 
-    checkSharedLink() {
+    async checkSharedLink() {
         const urlParams = new URLSearchParams(window.location.search);
         const sharedData = urlParams.get('chain');
         if (sharedData) {
             try {
-                const json = decodeURIComponent(escape(atob(sharedData)));
-                const importData = JSON.parse(json);
+                const importData = ChainFormat.isBinary(sharedData)
+                    ? await ChainFormat.fromLinkValue(sharedData)
+                    : JSON.parse(decodeURIComponent(escape(atob(sharedData))));
                 const blocks = Array.isArray(importData) ? importData : importData.blocks;
                 if (Array.isArray(blocks) && blocks.length > 0 && blocks[0].type === 'source') {
                     this.currentChainName = null;
@@ -931,10 +1062,11 @@ class BlockApp {
         if (id) {
             const saved = this.getSavedChains();
             const item = saved.find(x => x.id === id);
-            if (item) {
+            const data = item && this.getSavedChainData(id);
+            if (data) {
                 this.currentChainName = item.name;
                 this.currentChainId = item.id;
-                this.loadChainConfig(item.data);
+                this.loadChainConfig(data);
                 this.updateWorkspaceTitle();
                 this.renderSavedChains();
                 this.isModified = false;
@@ -943,26 +1075,30 @@ class BlockApp {
     }
 
     migrateSavedChains() {
-        let saved = this.getSavedChains();
-        const idRegex = /^[a-z0-9]{8}$/;
-        let changed = false;
+        // Chains used to be kept together in one 'strings_saved_chains' array
+        let saved;
+        try {
+            saved = JSON.parse(localStorage.getItem('strings_saved_chains') || 'null');
+        } catch (e) {
+            saved = null;
+        }
+        if (!Array.isArray(saved)) return;
 
-        saved = saved.map(item => {
-            if (!item.id || !idRegex.test(item.id)) {
+        const idRegex = /^[a-z0-9]{8}$/;
+        const index = this.getSavedChains();
+        saved.forEach(item => {
+            if (!item.id || !idRegex.test(item.id) || index.some(s => s.id === item.id)) {
                 let newId;
                 do {
                     newId = this.genChainId();
-                } while (saved.some(s => s.id === newId));
-
+                } while (saved.some(s => s.id === newId) || index.some(s => s.id === newId));
                 item.id = newId;
-                changed = true;
             }
-            return item;
+            localStorage.setItem(this.savedChainKey(item.id), JSON.stringify(item.data));
+            index.push({ id: item.id, name: item.name });
         });
-
-        if (changed) {
-            localStorage.setItem('strings_saved_chains', JSON.stringify(saved));
-        }
+        this.setSavedChains(index);
+        localStorage.removeItem('strings_saved_chains');
     }
 
     exportChain() {
@@ -1008,14 +1144,32 @@ class BlockApp {
     }
 
     // --- LOCAL STORAGE LOGIC ---
+    // 'strings_chain_index' lists { id, name } in display order; each config has its own key,
+    // so saving one chain does not rewrite the others
     getSavedChains() {
         try {
-            return JSON.parse(localStorage.getItem('strings_saved_chains') || '[]');
+            return JSON.parse(localStorage.getItem('strings_chain_index') || '[]');
         } catch (e) {
             return [];
         }
     }
 
+    setSavedChains(index) {
+        localStorage.setItem('strings_chain_index', JSON.stringify(index));
+    }
+
+    savedChainKey(id) {
+        return `strings_chain_${id}`;
+    }
+
+    getSavedChainData(id) {
+        try {
+            return JSON.parse(localStorage.getItem(this.savedChainKey(id)) || 'null');
+        } catch (e) {
+            return null;
+        }
+    }
+
     saveCurrentChain() {
         let name = this.currentChainName;
         const proceedSave = (targetName) => {
@@ -1029,26 +1183,25 @@ class BlockApp {
             if (existingIndex !== -1) {
                 idToSave = saved[existingIndex].id;
                 const item = saved.splice(existingIndex, 1)[0];
-                item.data = data;
                 saved.unshift(item);
             } else {
                 if (this.currentChainId && saved.find(x => x.id === this.currentChainId)) {
                     const idx = saved.findIndex(x => x.id === this.currentChainId);
                     const item = saved.splice(idx, 1)[0];
                     item.name = finalName;
-                    item.data = data;
                     saved.unshift(item);
                     idToSave = item.id;
                 } else {
                     idToSave = this.genChainId();
-                    saved.unshift({ id: idToSave, name: finalName, data });
+                    saved.unshift({ id: idToSave, name: finalName });
                 }
             }
 
             this.currentChainName = finalName;
             this.currentChainId = idToSave;
 
-            localStorage.setItem('strings_saved_chains', JSON.stringify(saved));
+            localStorage.setItem(this.savedChainKey(idToSave), JSON.stringify(data));
+            this.setSavedChains(saved);
             this.renderSavedChains();
             this.updateWorkspaceTitle();
             this.updateUrlWithChain(idToSave);
@@ -1077,7 +1230,8 @@ class BlockApp {
         this.confirmAction(confirmMsg, () => {
             let saved = this.getSavedChains();
             saved = saved.filter(x => x.id !== id);
-            localStorage.setItem('strings_saved_chains', JSON.stringify(saved));
+            this.setSavedChains(saved);
+            localStorage.removeItem(this.savedChainKey(id));
 
             if (this.currentChainId === id) {
                 this.currentChainId = null;
@@ -1091,9 +1245,11 @@ class BlockApp {
 
     loadChain(item) {
         const proceed = () => {
+            const data = this.getSavedChainData(item.id);
+            if (!data) return;
             this.currentChainName = item.name;
             this.currentChainId = item.id;
-            this.loadChainConfig(item.data);
+            this.loadChainConfig(data);
             this.updateWorkspaceTitle();
             this.renderSavedChains();
             this.isModified = false;
@@ -1615,45 +1771,77 @@ class BlockApp {
         content.className = 'block-content';
 
         if (isSource) {
-            const group = document.createElement('div');
-            group.className = 'form-group';
-            const textarea = document.createElement('textarea');
-            textarea.value = block.value;
-            textarea.rows = 5;
-            textarea.placeholder = i18n.t('source_placeholder');
-            textarea.addEventListener('input', (e) => {
-                block.value = e.target.value;
-                if (isSource) {
-                    localStorage.setItem('strings_last_source', block.value);
-                }
-                this.runChain();
-            });
+            if (block.sourceRef) {
+                const ref = block.sourceRef;
+                const info = document.createElement('div');
+                info.className = 'stats';
+                const badge = document.createElement('span');
+                badge.className = 'badge';
+                badge.textContent = `${ref.name} · ${i18n.t('lines_count')} ${ref.lines}`;
+                const clearBtn = document.createElement('button');
+                clearBtn.className = 'icon-btn';
+                clearBtn.title = i18n.t('source_clear_file');
+                clearBtn.innerHTML = '<i class="fas fa-times"></i>';
+                clearBtn.onclick = () => {
+                    block.sourceRef = undefined;
+                    this.reRenderAll();
+                };
+                info.appendChild(badge);
+                info.appendChild(clearBtn);
+                content.appendChild(info);
+
+                const box = document.createElement('div');
+                box.className = 'result-box';
+                content.appendChild(box);
+                const baseUrl = window.llmClient?.settings?.baseUrl;
+                // Shown once the box is in the page, so the viewer can measure it
+                requestAnimationFrame(() => new ResultViewer(box).show(new RemoteLines(baseUrl, 'source', ref.id, ref.lines)));
+            } else {
+                const group = document.createElement('div');
+                group.className = 'form-group';
+                const textarea = document.createElement('textarea');
+                textarea.value = block.value;
+                textarea.rows = 5;
+                textarea.placeholder = i18n.t('source_placeholder');
+                textarea.addEventListener('input', (e) => {
+                    block.value = e.target.value;
+                    if (isSource) {
+                        // Large inputs are not worth stalling every keystroke on a synchronous write
+                        if (block.value.length <= SOURCE_STORAGE_LIMIT) {
+                            localStorage.setItem('strings_last_source', block.value);
+                        } else {
+                            localStorage.removeItem('strings_last_source');
+                        }
+                    }
+                    this.runChain();
+                });
 
-            textarea.addEventListener('dragover', (e) => {
-                e.preventDefault();
-                e.stopPropagation();
-                textarea.style.borderColor = 'var(--primary)';
-                textarea.style.background = 'rgba(71, 114, 250, 0.05)';
-            });
-            textarea.addEventListener('dragleave', (e) => {
-                e.preventDefault();
-                e.stopPropagation();
-                textarea.style.borderColor = '';
-                textarea.style.background = '';
-            });
-            textarea.addEventListener('drop', (e) => {
-                e.preventDefault();
-                e.stopPropagation();
-                textarea.style.borderColor = '';
-                textarea.style.background = '';
-                const files = e.dataTransfer.files;
-                if (files && files.length > 0) {
-                    this.handleFileUpload(files[0], block);
-                }
-            });
+                textarea.addEventListener('dragover', (e) => {
+                    e.preventDefault();
+                    e.stopPropagation();
+                    textarea.style.borderColor = 'var(--primary)';
+                    textarea.style.background = 'rgba(71, 114, 250, 0.05)';
+                });
+                textarea.addEventListener('dragleave', (e) => {
+                    e.preventDefault();
+                    e.stopPropagation();
+                    textarea.style.borderColor = '';
+                    textarea.style.background = '';
+                });
+                textarea.addEventListener('drop', (e) => {
+                    e.preventDefault();
+                    e.stopPropagation();
+                    textarea.style.borderColor = '';
+                    textarea.style.background = '';
+                    const files = e.dataTransfer.files;
+                    if (files && files.length > 0) {
+                        this.handleFileUpload(files[0], block);
+                    }
+                });
 
-            group.appendChild(textarea);
-            content.appendChild(group);
+                group.appendChild(textarea);
+                content.appendChild(group);
+            }
 
             const pGrid = document.createElement('div');
             pGrid.className = 'params-grid';
@@ -1857,9 +2045,12 @@ class BlockApp {
 
     async runChain(triggerManualId = null, forceManual = false) {
         if (this.isRunning) return;
+        if (this.chain[0]?.sourceRef) return this.runChainOnServer(this.chain[0]);
 
         let currentLines = [];
         let globalDelimiter = '\n';
+        // Chained key of everything upstream of the current block; null once it can't be cached
+        let upstreamKey = null;
 
         const manualBlocks = this.chain.filter(b => b.manualRun === true);
         const hasManual = manualBlocks.length > 0;
@@ -1881,10 +2072,22 @@ class BlockApp {
                 globalDelimiter = innerDelim === '\\n' ? '\n' : (innerDelim || '\n');
                 const text = block.value || '';
                 currentLines = text ? text.split(globalDelimiter) : [];
+                upstreamKey = this.hashSource(text, globalDelimiter);
             } else {
                 const toolDef = TOOLS.find(t => t.id === block.type);
 
                 if (toolDef) {
+                    const cacheKey = this.blockCacheKey(upstreamKey, block, toolDef);
+                    upstreamKey = cacheKey;
+                    // A manual run is an explicit request to recompute manual blocks
+                    const cached = cacheKey !== null && !(forceManual && block.manualRun === true)
+                        ? this.blockCache.get(cacheKey) : undefined;
+                    if (cached) {
+                        currentLines = cached.result;
+                        this.renderStats(block, cached.stats, true);
+                        continue;
+                    }
+
                     if (block.manualRun === true) manualBlockReached = true;
 
                     if (manualBlockReached && !forceManual) {
@@ -1908,7 +2111,8 @@ class BlockApp {
                                 break;
                             }
                             currentLines = res.result;
-                            this.renderStats(block, res.stats);
+                            if (cacheKey !== null) this.blockCache.set(cacheKey, res);
+                            this.renderStats(block, res.stats, cacheKey !== null ? false : undefined);
                         } catch (e) {
                             if (statsDiv) statsDiv.innerHTML = `<span style="color:var(--danger); font-size: 0.85rem;">${e.message}</span>`;
                             currentLines = [];
@@ -1927,14 +2131,94 @@ class BlockApp {
                             break;
                         }
                         currentLines = res.result;
-                        this.renderStats(block, res.stats);
+                        if (cacheKey !== null) this.blockCache.set(cacheKey, res);
+                        this.renderStats(block, res.stats, cacheKey !== null ? false : undefined);
                     }
                 }
             }
         }
 
+        const finalDelim = this.getFinalDelimiter();
+        if (finalDelim === null) return;
+
+        const finalStats = document.getElementById('final-stats');
+        this.showFinalLines(new ArrayLines(Array.isArray(currentLines) ? currentLines : [String(currentLines)], finalDelim));
+
+        if (finalStats) {
+            finalStats.innerHTML = '';
+            if (Array.isArray(currentLines)) {
+                const badge = document.createElement('span');
+                badge.className = 'badge';
+                const linesCountMsg = i18n.t('lines_count');
+                badge.textContent = `${linesCountMsg} ${currentLines.length}`;
+                finalStats.appendChild(badge);
+            }
+        }
+    }
+
+    // A source held by the proxy (a large file) runs there: the result stays on the proxy and is paged
+    async runChainOnServer(sourceBlock) {
+        const baseUrl = window.llmClient?.settings?.baseUrl;
+        const finalStats = document.getElementById('final-stats');
+        this.isRunning = true;
+        this.lockUI(true);
+        if (finalStats) finalStats.innerHTML = `<div class="typing"><span></span><span></span><span></span></div>`;
+        let run;
+        try {
+            const response = await fetch(`${baseUrl}/chain/run`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ chain: this.getChainConfig(), source: sourceBlock.sourceRef.id })
+            });
+            run = await response.json();
+            if (!response.ok) throw new Error(run.error || `HTTP ${response.status}`);
+        } catch (e) {
+            if (finalStats) finalStats.innerHTML = `<span style="color:var(--danger); font-size: 0.85rem;">${e.message}</span>`;
+            return;
+        } finally {
+            this.isRunning = false;
+            this.lockUI(false);
+        }
+
+        this.chain.slice(1).forEach((block, i) => {
+            const entry = run.blocks[i];
+            const statsDiv = document.getElementById(`stats-${block.id}`);
+            if (!entry) {
+                if (statsDiv) statsDiv.innerHTML = '';
+            } else if (entry.error) {
+                if (statsDiv) statsDiv.innerHTML = `<span style="color:var(--danger); font-size: 0.85rem;">${entry.error}</span>`;
+            } else {
+                this.renderStats(block, entry.stats);
+            }
+        });
+        this.showFinalLines(run.result ? new RemoteLines(baseUrl, 'result', run.result, run.lines, this.getFinalDelimiter()) : new ArrayLines([], '\n'));
+        if (finalStats) {
+            finalStats.innerHTML = '';
+            const badge = document.createElement('span');
+            badge.className = 'badge';
+            badge.textContent = `${i18n.t('lines_count')} ${run.lines}`;
+            finalStats.appendChild(badge);
+        }
+    }
+
+    hashSource(text, delimiter) {
+        // The source text rarely changes between runs: skip rehashing a large unchanged value
+        if (this.sourceHash.text !== text || this.sourceHash.delimiter !== delimiter) {
+            this.sourceHash = { text, delimiter, hash: hashString(`${delimiter}\u0000${text}`) };
+        }
+        return this.sourceHash.hash;
+    }
+
+    // Key of a block's result: upstream key + type + params (+ tool-specific context such as the LLM model)
+    blockCacheKey(upstreamKey, block, toolDef) {
+        if (upstreamKey === null || toolDef.cache === false) return null;
+        const extra = toolDef.cacheKey ? toolDef.cacheKey(block.params) : '';
+        return hashString(`${upstreamKey}|${block.type}|${JSON.stringify(block.params)}|${extra}`);
+    }
+
+    getFinalDelimiter() {
         const fDelimSelect = document.getElementById('final-delimiter-select');
-        if (!fDelimSelect) return;
+        if (!fDelimSelect) return null;
         const finalDelimParam = fDelimSelect.value;
         let finalDelimStr = finalDelimParam;
 
@@ -1943,29 +2227,19 @@ class BlockApp {
             finalDelimStr = fCustomInput.value;
         }
 
-        const finalDelim = finalDelimStr === '\\n' ? '\n' : (finalDelimStr || '\n');
-
-        const finalOutBox = document.getElementById('final-output-box');
-        const finalStats = document.getElementById('final-stats');
-
-        if (finalOutBox) {
-            const finalOutputText = Array.isArray(currentLines) ? currentLines.join(finalDelim) : currentLines;
-            finalOutBox.textContent = finalOutputText;
+        return finalDelimStr === '\\n' ? '\n' : (finalDelimStr || '\n');
+    }
 
-            if (finalStats) {
-                finalStats.innerHTML = '';
-                if (Array.isArray(currentLines)) {
-                    const badge = document.createElement('span');
-                    badge.className = 'badge';
-                    const linesCountMsg = i18n.t('lines_count');
-                    badge.textContent = `${linesCountMsg} ${currentLines.length}`;
-                    finalStats.appendChild(badge);
-                }
-            }
+    // Shows intermediate lines (e.g. a streaming LLM reply) in the final box while a block is still running
+    previewOutput(lines) {
+        const finalDelim = this.getFinalDelimiter();
+        if (finalDelim !== null) {
+            this.showFinalLines(new ArrayLines(lines, finalDelim));
         }
     }
 
-    renderStats(block, stats) {
+    // cacheHit: true/false when the block result is cacheable, undefined otherwise
+    renderStats(block, stats, cacheHit) {
         const statsDiv = document.getElementById(`stats-${block.id}`);
         if (!statsDiv) return;
         statsDiv.innerHTML = '';
@@ -1992,6 +2266,19 @@ class BlockApp {
                 statsDiv.appendChild(badges);
             }
         }
+        if (cacheHit !== undefined) {
+            const badge = document.createElement('span');
+            badge.className = 'badge cache-badge';
+            badge.textContent = `${i18n.t('block_cache')} ${i18n.t(cacheHit ? 'block_cache_hit' : 'block_cache_miss')}`;
+            badge.title = `${i18n.t('block_cache_hits')} ${this.blockCache.hits}, ${i18n.t('block_cache_misses')} ${this.blockCache.misses}, ${i18n.t('block_cache_entries')} ${this.blockCache.entries.size}`;
+            let badges = statsDiv.querySelector('.stats-badges');
+            if (!badges) {
+                badges = document.createElement('div');
+                badges.className = 'stats-badges';
+                statsDiv.appendChild(badges);
+            }
+            badges.appendChild(badge);
+        }
     }
 
     showToast(message) {
@@ -2034,8 +2321,23 @@ class BlockApp {
     }
 
 
-    handleFileUpload(file, block) {
+    async handleFileUpload(file, block) {
         if (!file) return;
+        const baseUrl = window.llmClient?.settings?.baseUrl;
+        if (baseUrl && file.size > SOURCE_INLINE_LIMIT) {
+            // Too large for the textarea: the proxy keeps the file and the chain runs there
+            try {
+                const response = await fetch(`${baseUrl}/source`, { method: 'POST', body: file });
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                const data = await response.json();
+                block.sourceRef = { id: data.id, name: file.name, lines: data.lines };
+                block.value = '';
+                this.reRenderAll();
+                return;
+            } catch (e) {
+                this.alertAction(`${i18n.t('source_upload_error')}${e.message}`);
+            }
+        }
         const reader = new FileReader();
         reader.onload = (e) => {
             const content = e.target.result;
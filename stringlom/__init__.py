@@ -0,0 +1,12 @@
+"""Headless runner for StringLOM chains.
+
+Loads chain configs exported from the browser app (JSON or ?chain= share links)
+and runs the deterministic tools over text without a browser.
+"""
+from .tools import TOOLS, DEFAULTS, BROWSER_ONLY
+from .chain import ChainError, load_chain, run_chain, format_output
+from .stream import LINEWISE, SpillBuffer, stream_chain
+from .parallel import parallel_chain
+
+__all__ = ["TOOLS", "DEFAULTS", "BROWSER_ONLY", "ChainError", "load_chain", "run_chain", "format_output",
+           "LINEWISE", "SpillBuffer", "stream_chain", "parallel_chain"]
@@ -0,0 +1,92 @@
+"""Command line entry point: python -m stringlom CHAIN [INPUT] [-o OUTPUT]."""
+import os
+import sys
+import json
+import argparse
+
+from . import datasets
+from .chain import ChainError, load_chain, run_chain, format_output
+from .store import ChainStore
+from .stream import stream_chain
+from .parallel import parallel_chain
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m stringlom", description="Run a StringLOM chain over a text file")
+    parser.add_argument("chain", help="Chain JSON file (Export), share link or its 'chain' value, or a chain name with --store")
+    parser.add_argument("input", nargs="?", default="-", help="Input text file (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Output file (default: stdout)")
+    parser.add_argument("--encoding", default="utf-8", help="Encoding of the input and output files")
+    parser.add_argument("--stats", action="store_true", help="Print per-block stats to stderr as JSON")
+    parser.add_argument("--stream", action="store_true", help="Stream records from input to output instead of loading the whole file")
+    parser.add_argument("--memory-mb", type=float, default=64, help="Per-block memory budget in --stream mode before spilling to disk")
+    parser.add_argument("--temp-dir", default=None, help="Directory for spill and chunk files in --stream and --jobs modes")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Run line-wise blocks on N processes (0: one per CPU)")
+    parser.add_argument("--store", default=None, help="Chain store (SQLite) to look CHAIN up in by id or name")
+    parser.add_argument("--datasets-dir", default=None, help="Directory of datasets that compare blocks can name (default: ~/.stringlom/datasets)")
+    parser.add_argument("--index-dir", default=None, help="Directory for dataset indexes (default: ~/.cache/stringlom/indexes)")
+    args = parser.parse_args(argv)
+    if args.stream and args.jobs is not None:
+        parser.error("--stream and --jobs cannot be combined")
+    datasets.configure(args.datasets_dir, args.index_dir)
+
+    try:
+        saved = None
+        if args.store:
+            store = ChainStore(args.store)
+            try:
+                saved = store.load(args.chain)
+            finally:
+                store.close()
+        if saved is not None:
+            chain = load_chain(saved)
+        elif os.path.isfile(args.chain):
+            with open(args.chain, encoding="utf-8") as f:
+                chain = load_chain(f.read())
+        else:
+            chain = load_chain(args.chain)
+    except ChainError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    if args.stream:
+        return run_streaming(chain, args)
+
+    if args.input == "-":
+        text = sys.stdin.read()
+    else:
+        with open(args.input, encoding=args.encoding, newline="") as f:
+            text = f.read()
+
+    res = run_chain(chain, text) if args.jobs is None else parallel_chain(chain, text, args.jobs or None, args.temp_dir)
+    if args.stats or res["error"]:
+        print(json.dumps(res["blocks"], ensure_ascii=False, indent=2), file=sys.stderr)
+    if res["error"]:
+        return 1
+
+    output = format_output(chain, res["result"])
+    if args.output == "-":
+        sys.stdout.write(output)
+    else:
+        with open(args.output, "w", encoding=args.encoding, newline="") as f:
+            f.write(output)
+    return 0
+
+
+def run_streaming(chain, args) -> int:
+    source = sys.stdin if args.input == "-" else open(args.input, encoding=args.encoding, newline="")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding=args.encoding, newline="")
+    try:
+        res = stream_chain(chain, source, out, int(args.memory_mb * 1024 * 1024), args.temp_dir)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    if args.stats or res["error"]:
+        print(json.dumps(res["blocks"], ensure_ascii=False, indent=2), file=sys.stderr)
+    return 1 if res["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
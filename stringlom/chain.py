@@ -0,0 +1,116 @@
+"""Loading and running chain configs exported by the browser app (getChainConfig / ?chain= links)."""
+import json
+import base64
+import binascii
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import urlparse, parse_qs
+
+from .tools import TOOLS, DEFAULTS, BROWSER_ONLY
+from .chainformat import ChainFormatError, from_link_value, is_binary_link_value
+
+
+class ChainError(Exception):
+    pass
+
+
+def decode_share_payload(payload: str) -> Any:
+    """Decodes a ?chain= share link (the link itself or just its value), binary or the older base64 JSON."""
+    payload = payload.strip()
+    if "://" in payload or payload.startswith("?"):
+        values = parse_qs(urlparse(payload).query).get("chain")
+        if not values:
+            raise ChainError("Link has no 'chain' parameter")
+        payload = values[0]
+    if is_binary_link_value(payload):
+        try:
+            return from_link_value(payload)
+        except ChainFormatError as e:
+            raise ChainError(f"Invalid share payload: {e}")
+    try:
+        # parse_qs turns '+' into spaces
+        raw = base64.b64decode(payload.replace(" ", "+"), validate=True)
+        return json.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ChainError(f"Invalid share payload: {e}")
+
+
+def load_chain(source: Union[str, Dict, List]) -> Dict:
+    """Normalizes a chain given as a dict/list, JSON text or share payload to {blocks, settings}."""
+    data = source
+    if isinstance(source, str):
+        text = source.strip()
+        if text.startswith(("{", "[")):
+            try:
+                data = json.loads(text)
+            except ValueError as e:
+                raise ChainError(f"Invalid chain JSON: {e}")
+        else:
+            data = decode_share_payload(text)
+
+    blocks = data if isinstance(data, list) else (data or {}).get("blocks")
+    if not isinstance(blocks, list) or not blocks or blocks[0].get("type") != "source":
+        raise ChainError("Invalid chain format: the first block must be a 'source' block")
+
+    for i, block in enumerate(blocks[1:], 1):
+        tool_id = block.get("type")
+        if tool_id in BROWSER_ONLY:
+            raise ChainError(f"Block {i + 1} ('{tool_id}') can only run in the browser")
+        if tool_id not in TOOLS:
+            raise ChainError(f"Block {i + 1} has an unknown tool '{tool_id}'")
+
+    settings = data.get("settings") if isinstance(data, dict) else None
+    return {"blocks": blocks, "settings": settings or {}}
+
+
+def source_delimiter(block: Dict) -> str:
+    params = block.get("params") or {}
+    delim = params.get("delimiter")
+    if delim == "custom":
+        delim = params.get("customDelimiter") or ""
+    return "\n" if delim == "\\n" else (delim or "\n")
+
+
+def final_delimiter(settings: Dict) -> str:
+    delim = settings.get("finalDelimiter", "\\n")
+    if delim == "custom":
+        delim = settings.get("finalCustomDelimiter", "")
+    return "\n" if delim == "\\n" else (delim or "\n")
+
+
+def block_params(block: Dict) -> Dict:
+    return {**DEFAULTS[block["type"]], **(block.get("params") or {})}
+
+
+def error_message(res: Dict) -> str:
+    return res["result"] if isinstance(res["result"], str) else "\n".join(res["result"])
+
+
+def run_blocks(blocks: List[Dict], lines: List[str], report: List[Dict]) -> Optional[List[str]]:
+    """Runs processing blocks in order, appending one report entry each; None once a block fails."""
+    for block in blocks:
+        res = TOOLS[block["type"]](lines, block_params(block))
+        if res.get("error"):
+            report.append({"type": block["type"], "error": error_message(res)})
+            return None
+        lines = res["result"]
+        report.append({"type": block["type"], "stats": res.get("stats") or {}})
+    return lines
+
+
+def run_chain(chain: Dict, text: str) -> Dict:
+    """Runs every block over the source text like BlockApp.runChain with forceManual.
+
+    Returns {'result': lines, 'blocks': [{'type', 'stats'} | {'type', 'error'}], 'error': bool}.
+    As in the browser, a failing block stops the chain and leaves an empty result.
+    """
+    blocks = chain["blocks"]
+    delim = source_delimiter(blocks[0])
+    report: List[Dict] = []
+    lines = run_blocks(blocks[1:], text.split(delim) if text else [], report)
+    if lines is None:
+        return {"result": [], "blocks": report, "error": True}
+    return {"result": lines, "blocks": report, "error": False}
+
+
+def format_output(chain: Dict, lines: List[str]) -> str:
+    return final_delimiter(chain["settings"]).join(lines)
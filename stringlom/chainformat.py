@@ -0,0 +1,77 @@
+"""Binary chain encoding shared with the browser's ChainFormat (src/js/chain-format.js).
+
+A payload is one version byte followed by raw deflate of compact JSON: blocks as
+``[type, params]`` (``[type, params, 1]`` when manualRun) and settings as
+``[finalDelimiter, finalCustomDelimiter]``. Share links carry it as unpadded base64url.
+"""
+import json
+import zlib
+import base64
+import binascii
+from typing import Any, Dict, List
+
+VERSION = 1
+
+
+class ChainFormatError(ValueError):
+    pass
+
+
+def _compact(config: Any) -> List:
+    blocks = config if isinstance(config, list) else config.get("blocks") or []
+    settings = {} if isinstance(config, list) else config.get("settings") or {}
+    return [
+        [[block["type"], block.get("params") or {}] + ([1] if block.get("manualRun") else []) for block in blocks],
+        [settings.get("finalDelimiter", "\\n"), settings.get("finalCustomDelimiter", "")]
+    ]
+
+
+def _expand(data: Any) -> Dict:
+    try:
+        blocks, (final_delimiter, custom_delimiter) = data
+        return {
+            "blocks": [
+                {"type": entry[0], "params": entry[1], "manualRun": len(entry) > 2 and entry[2] == 1}
+                for entry in blocks
+            ],
+            "settings": {"finalDelimiter": final_delimiter, "finalCustomDelimiter": custom_delimiter}
+        }
+    except (TypeError, ValueError, IndexError, KeyError) as e:
+        raise ChainFormatError(f"Malformed chain data: {e}")
+
+
+def encode_chain(config: Any) -> bytes:
+    """The versioned binary form of a chain config ({blocks, settings} or a list of blocks)."""
+    text = json.dumps(_compact(config), ensure_ascii=False, separators=(",", ":"))
+    deflate = zlib.compressobj(9, zlib.DEFLATED, -15)
+    return bytes([VERSION]) + deflate.compress(text.encode("utf-8")) + deflate.flush()
+
+
+def decode_chain(data: bytes) -> Dict:
+    if not data:
+        raise ChainFormatError("Empty chain data")
+    if data[0] != VERSION:
+        raise ChainFormatError(f"Unsupported chain format version {data[0]}")
+    try:
+        text = zlib.decompress(data[1:], -15).decode("utf-8")
+        return _expand(json.loads(text))
+    except (zlib.error, UnicodeDecodeError, ValueError) as e:
+        raise ChainFormatError(f"Corrupt chain data: {e}")
+
+
+def to_link_value(config: Any) -> str:
+    """The ?chain= value of a share link."""
+    return base64.urlsafe_b64encode(encode_chain(config)).rstrip(b"=").decode("ascii")
+
+
+def from_link_value(value: str) -> Dict:
+    try:
+        data = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+    except (binascii.Error, ValueError) as e:
+        raise ChainFormatError(f"Invalid base64url: {e}")
+    return decode_chain(data)
+
+
+def is_binary_link_value(value: str) -> bool:
+    # A small version byte encodes as "A"; the older base64 JSON links start with "ey" or "W"
+    return value.startswith("A")
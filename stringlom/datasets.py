@@ -0,0 +1,271 @@
+"""Second lists for the compare tool that stay on disk.
+
+A dataset is a text file named by path or by its name in the datasets directory. It is
+indexed once into a file of hashed, deduplicated values that later runs memory-map,
+so comparing a stream against it keeps neither list in memory. The index is rebuilt
+when the dataset file changes.
+"""
+import os
+import mmap
+import zlib
+import struct
+import hashlib
+import tempfile
+import threading
+from array import array
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+MAGIC = b"SLOMSET1"
+# magic, values, slots, data bytes, source size, source mtime_ns; padded to keep the arrays aligned
+_HEADER = struct.Struct("<8sQQQqq")
+_HEADER_SIZE = 64
+# A power of two, so the table keeps the arrays after it 8-byte aligned
+MIN_SLOTS = 1024
+
+DEFAULT_DATASETS_DIR = os.path.join(os.path.expanduser("~"), ".stringlom", "datasets")
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "stringlom", "indexes")
+
+
+class DatasetError(Exception):
+    pass
+
+
+_config = {"datasets_dir": DEFAULT_DATASETS_DIR, "index_dir": DEFAULT_INDEX_DIR, "allow_paths": True}
+_open: Dict[Tuple[str, str], "SetIndex"] = {}
+_lock = threading.Lock()
+
+
+def configure(datasets_dir: Optional[str] = None, index_dir: Optional[str] = None, allow_paths: Optional[bool] = None):
+    """Sets where names are looked up and indexes are kept; allow_paths=False accepts names only."""
+    if datasets_dir is not None:
+        _config["datasets_dir"] = datasets_dir
+    if index_dir is not None:
+        _config["index_dir"] = index_dir
+    if allow_paths is not None:
+        _config["allow_paths"] = allow_paths
+
+
+def resolve(name: str) -> str:
+    """The file of a dataset given as a name in the datasets directory or, if allowed, as a path."""
+    name = name.strip()
+    if _config["allow_paths"] and (os.path.isabs(name) or os.sep in name or os.path.isfile(name)):
+        if os.path.isfile(name):
+            return os.path.realpath(name)
+        raise DatasetError(f"Dataset file not found: {name}")
+    if name and not name.startswith(".") and os.sep not in name and "/" not in name:
+        for candidate in (name, name + ".txt"):
+            path = os.path.join(_config["datasets_dir"], candidate)
+            if os.path.isfile(path):
+                return os.path.realpath(path)
+    raise DatasetError(f"Unknown dataset: {name}")
+
+
+def _hash(value: bytes) -> int:
+    # Stable across processes, unlike hash(); matches are confirmed by comparing the bytes
+    return zlib.crc32(value) | zlib.adler32(value) << 32
+
+
+def _encode(value: str) -> bytes:
+    return value.encode("utf-8", "surrogatepass")
+
+
+class SetIndex:
+    """Read-only open-addressing hash set over a memory-mapped index file.
+
+    Values keep the order of their first occurrence in the dataset.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.slots, data_size, self.source_size, self.source_mtime = _HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            self.map.close()
+            raise DatasetError(f"Not a dataset index: {path}")
+        self.view = view = memoryview(self.map)
+        pos = _HEADER_SIZE
+        self.table = view[pos:pos + 4 * self.slots].cast("I")
+        pos += 4 * self.slots
+        self.hashes = view[pos:pos + 8 * self.count].cast("Q")
+        pos += 8 * self.count
+        self.offsets = view[pos:pos + 8 * (self.count + 1)].cast("Q")
+        pos += 8 * (self.count + 1)
+        self.data = view[pos:pos + data_size]
+        self.data_start = pos
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, value: str) -> bool:
+        return self.find(value) >= 0
+
+    def find(self, value: str) -> int:
+        """Position of ``value`` in the dataset's unique values, or -1."""
+        encoded = _encode(value)
+        h = _hash(encoded)
+        table, hashes, offsets = self.table, self.hashes, self.offsets
+        mask = self.slots - 1
+        slot = h & mask
+        while True:
+            entry = table[slot]
+            if not entry:
+                return -1
+            i = entry - 1
+            if hashes[i] == h:
+                # Slicing the mmap gives bytes, which compare faster than a memoryview slice
+                start = self.data_start
+                if self.map[start + offsets[i]:start + offsets[i + 1]] == encoded:
+                    return i
+            slot = (slot + 1) & mask
+
+    def value(self, i: int) -> str:
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8", "surrogatepass")
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return (self.source_size, self.source_mtime) == (stat.st_size, stat.st_mtime_ns)
+
+    def close(self):
+        for view in (self.table, self.hashes, self.offsets, self.data, self.view):
+            view.release()
+        self.map.close()
+
+
+def _values(source: str, delim: str) -> Iterator[str]:
+    # stream imports tools, which imports this module
+    from .stream import read_records
+    with open(source, encoding="utf-8", newline="") as f:
+        for record in read_records(f, delim):
+            value = record.strip()
+            if value:
+                yield value
+
+
+def _place(table: array, hashes: array, i: int):
+    mask = len(table) - 1
+    slot = hashes[i] & mask
+    while table[slot]:
+        slot = (slot + 1) & mask
+    table[slot] = i + 1
+
+
+def build_index(values: Iterable[str], path: str, source_size: int = -1, source_mtime: int = -1):
+    """Writes the index of the unique ``values`` to ``path``; only hashes and offsets are kept in memory."""
+    hashes, offsets = array("Q"), array("Q", [0])
+    table = array("I", bytes(4 * MIN_SLOTS))
+    directory = os.path.dirname(path) or "."
+    with tempfile.TemporaryFile(dir=directory) as data:
+        fd = data.fileno()
+        for value in values:
+            encoded = _encode(value)
+            h = _hash(encoded)
+            mask = len(table) - 1
+            slot = h & mask
+            while table[slot]:
+                i = table[slot] - 1
+                if hashes[i] == h:
+                    data.flush()
+                    if os.pread(fd, offsets[i + 1] - offsets[i], offsets[i]) == encoded:
+                        break
+                slot = (slot + 1) & mask
+            else:
+                hashes.append(h)
+                data.write(encoded)
+                offsets.append(offsets[-1] + len(encoded))
+                table[slot] = len(hashes)
+                if 2 * len(hashes) > len(table):
+                    table = array("I", bytes(8 * len(table)))
+                    for i in range(len(hashes)):
+                        _place(table, hashes, i)
+
+        data.flush()
+        data.seek(0)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                header = _HEADER.pack(MAGIC, len(hashes), len(table), offsets[-1], source_size, source_mtime)
+                out.write(header.ljust(_HEADER_SIZE, b"\0"))
+                table.tofile(out)
+                hashes.tofile(out)
+                offsets.tofile(out)
+                while True:
+                    chunk = data.read(1 << 20)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+def open_index(name: str, delim: str = "\n") -> SetIndex:
+    """The index of a dataset split by ``delim``, built on first use and kept open for later runs."""
+    source = resolve(name)
+    stat = os.stat(source)
+    key = (source, delim)
+    with _lock:
+        index = _open.get(key)
+        if index is not None and index.matches(stat):
+            return index
+        os.makedirs(_config["index_dir"], exist_ok=True)
+        digest = hashlib.sha1(f"{source}\0{delim}".encode("utf-8", "surrogatepass")).hexdigest()[:24]
+        path = os.path.join(_config["index_dir"], digest + ".idx")
+        fresh = None
+        if os.path.exists(path):
+            try:
+                fresh = SetIndex(path)
+            except (DatasetError, ValueError, struct.error):
+                fresh = None
+            if fresh is not None and not fresh.matches(stat):
+                fresh.close()
+                fresh = None
+        if fresh is None:
+            try:
+                build_index(_values(source, delim), path, stat.st_size, stat.st_mtime_ns)
+            except UnicodeDecodeError as e:
+                raise DatasetError(f"Dataset is not UTF-8 text: {name} ({e})")
+            fresh = SetIndex(path)
+        # Indexes handed out earlier stay usable until the process ends
+        _open[key] = fresh
+        return fresh
+
+
+def match_values(values: Iterable[str], index: SetIndex, operation: str, seen: bytearray,
+                 others: Optional[set] = None) -> Iterator[str]:
+    """The compare tool's output for the first list, without the dataset values it lacks.
+
+    ``seen`` (one byte per dataset value) deduplicates and records the dataset members met;
+    values outside the dataset are deduplicated with ``others`` when given.
+    """
+    for value in values:
+        i = index.find(value)
+        if i >= 0:
+            if seen[i]:
+                continue
+            seen[i] = 1
+            if operation == "common":
+                yield value
+            elif operation != "diff":
+                yield f"[=] {value}"
+        elif operation != "common":
+            if others is not None:
+                if value in others:
+                    continue
+                others.add(value)
+            yield value if operation == "diff" else f"[-] {value}"
+
+
+def unmatched(index: SetIndex, seen: bytearray) -> Iterator[str]:
+    """The "[+]" lines of the dataset values that match_values() did not meet."""
+    for i in range(len(index)):
+        if not seen[i]:
+            yield f"[+] {index.value(i)}"
+
+
+def compare_index(values: Iterable[str], index: SetIndex, operation: str) -> Iterator[str]:
+    """The compare tool's output for the stripped, non-empty ``values`` of the first list against ``index``."""
+    seen = bytearray(len(index))
+    yield from match_values(values, index, operation, seen, None if operation == "common" else set())
+    if operation not in ("common", "diff"):
+        yield from unmatched(index, seen)
@@ -0,0 +1,212 @@
+"""External-memory versions of the sort, deduplicate, duplicates and shuffle tools.
+
+Each takes a spilled ``SpillBuffer`` and keeps about ``buffer.budget`` bytes of
+records in memory: sort writes sorted runs and merges them, deduplicate and duplicates
+hash-partition the values into spill files and process one partition at a time, and
+shuffle permutes an on-disk index of record offsets.
+Results and stats are the same as those of the in-memory tools.
+"""
+import mmap
+import heapq
+import tempfile
+from itertools import chain
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from .tools import sort_order, sort_partitioned, duplicate_line
+from .jsutil import js_number, js_parse_int, is_array_index, mulberry32
+from .spill import SpillBuffer, record_size
+
+MAX_FAN_IN = 64
+# Times an oversized hash partition is split again before it is processed as it is
+MAX_PARTITION_DEPTH = 3
+# Sort runs hold 1/SORT_RUN_SHARE of the budget in records; the rest goes to their collation keys
+SORT_RUN_SHARE = 4
+
+Merge = Callable[[List[Iterable[str]]], Iterator[str]]
+
+
+def _number_key(item: str) -> float:
+    return js_number(item.strip())
+
+
+def merge_sorted(numbers: List[Iterable[str]], texts: List[Iterable[str]], params: Dict) -> Iterator[str]:
+    """Stable k-way merge of parts already in the sort tool's order, numbers before texts."""
+    key, reverse = sort_order(params)
+    yield from heapq.merge(*numbers, key=_number_key, reverse=reverse)
+    yield from heapq.merge(*texts, key=key, reverse=reverse)
+
+
+def _runs(records: Iterable[str], budget: int) -> Iterator[List[str]]:
+    run: List[str] = []
+    size = 0
+    for record in records:
+        run.append(record)
+        size += record_size(record)
+        if size >= budget:
+            yield run
+            run, size = [], 0
+    if run:
+        yield run
+
+
+def _to_disk(records: Iterable[str], temp_dir) -> SpillBuffer:
+    buffer = SpillBuffer(-1, temp_dir)
+    buffer.extend(records)
+    return buffer
+
+
+def _reduce(runs: List[SpillBuffer], merge: Merge, temp_dir) -> List[SpillBuffer]:
+    # Merge neighbouring runs (keeps the merge stable) until they fit into one pass
+    while len(runs) > MAX_FAN_IN:
+        merged = []
+        for i in range(0, len(runs), MAX_FAN_IN):
+            group = runs[i:i + MAX_FAN_IN]
+            merged.append(_to_disk(merge(group), temp_dir))
+            for run in group:
+                run.close()
+        runs = merged
+    return runs
+
+
+def _drain(records: Iterator[str], buffers: List[SpillBuffer]) -> Iterator[str]:
+    try:
+        yield from records
+    finally:
+        for buffer in buffers:
+            buffer.close()
+
+
+def external_sort(buffer: SpillBuffer, params: Dict) -> Dict:
+    number_runs: List[SpillBuffer] = []
+    text_runs: List[SpillBuffer] = []
+    for run in _runs(buffer, max(buffer.budget // SORT_RUN_SHARE, 1)):
+        numbers, texts = sort_partitioned(run, params)
+        if numbers:
+            number_runs.append(_to_disk(numbers, buffer.temp_dir))
+        if texts:
+            text_runs.append(_to_disk(texts, buffer.temp_dir))
+
+    key, reverse = sort_order(params)
+    number_runs = _reduce(number_runs, lambda parts: heapq.merge(*parts, key=_number_key, reverse=reverse), buffer.temp_dir)
+    text_runs = _reduce(text_runs, lambda parts: heapq.merge(*parts, key=key, reverse=reverse), buffer.temp_dir)
+    return {"result": _drain(merge_sorted(number_runs, text_runs, params), number_runs + text_runs), "stats": {}}
+
+
+def _hash_parts(entries: Iterable[Tuple[object, str]], size: int, budget: int, temp_dir, salt: int = 0) -> List[SpillBuffer]:
+    """Writes ``(index, value)`` entries as 'index<TAB>value' records into parts by hash of the value.
+
+    A part still larger than ``budget`` (more than MAX_FAN_IN parts were needed) is split
+    again with another salt, unless every entry landed in it, e.g. one value repeated.
+    """
+    count = max(1, min(MAX_FAN_IN, 2 * -(-size // max(budget, 1))))
+    parts = [SpillBuffer(budget // count, temp_dir) for _ in range(count)]
+    total = 0
+    for index, val in entries:
+        parts[hash((salt, val)) % count].append(f"{index}\t{val}")
+        total += 1
+    result = []
+    for part in parts:
+        if part.size > budget and len(part) < total and salt < MAX_PARTITION_DEPTH:
+            result.extend(_hash_parts(_entries(part), part.size, budget, temp_dir, salt + 1))
+            part.close()
+        else:
+            result.append(part)
+    return result
+
+
+def _partition(buffer: SpillBuffer, value: Callable[[str], str]) -> List[SpillBuffer]:
+    """Splits non-empty values into 'index<TAB>value' records by hash, keeping input order in each part."""
+    values = ((index, value(record)) for index, record in enumerate(buffer))
+    return _hash_parts(((index, val) for index, val in values if val), buffer.size, buffer.budget, buffer.temp_dir)
+
+
+def _entries(part: SpillBuffer) -> Iterator[List[str]]:
+    for entry in part:
+        yield entry.split("\t", 1)
+
+
+def _ordered_by_key(entry: str) -> int:
+    return int(entry[:entry.index("\t")])
+
+
+def _strip_key(entries: Iterable[str]) -> Iterator[str]:
+    for entry in entries:
+        yield entry[entry.index("\t") + 1:]
+
+
+def external_deduplicate(buffer: SpillBuffer, params: Dict) -> Dict:
+    parts = _partition(buffer, str.strip if params.get("trim") else str)
+    firsts = []
+    for part in parts:
+        seen = set()
+        out = SpillBuffer(part.budget, buffer.temp_dir)
+        for index, val in _entries(part):
+            if val not in seen:
+                seen.add(val)
+                out.append(f"{index}\t{val}")
+        part.close()
+        firsts.append(out)
+
+    unique = sum(len(out) for out in firsts)
+    merged = heapq.merge(*firsts, key=_ordered_by_key)
+    return {
+        "result": _drain(_strip_key(merged), firsts),
+        "stats": {"original": len(buffer), "unique": unique, "removed": len(buffer) - unique}
+    }
+
+
+def external_duplicates(buffer: SpillBuffer, params: Dict) -> Dict:
+    parts = _partition(buffer, str.strip)
+    # Object.entries() order: array-index keys by value, then the rest by first occurrence
+    index_keys, other_keys = [], []
+    for part in parts:
+        counts: Dict[str, List[int]] = {}
+        for index, val in _entries(part):
+            if val in counts:
+                counts[val][1] += 1
+            else:
+                counts[val] = [int(index), 1]
+        part.close()
+
+        repeated = [(val, first, n) for val, (first, n) in counts.items() if n > 1]
+        numeric = sorted((r for r in repeated if is_array_index(r[0])), key=lambda r: int(r[0]))
+        index_keys.append(SpillBuffer(part.budget, buffer.temp_dir))
+        index_keys[-1].extend(f"{val}\t{duplicate_line(val, n, params)}" for val, _, n in numeric)
+        other_keys.append(SpillBuffer(part.budget, buffer.temp_dir))
+        other_keys[-1].extend(f"{first}\t{duplicate_line(val, n, params)}"
+                              for val, first, n in repeated if not is_array_index(val))
+
+    buffers = index_keys + other_keys
+    found = sum(len(b) for b in buffers)
+    if not found:
+        for b in buffers:
+            b.close()
+        return {"result": ["(No duplicates)"], "stats": {"duplicates": 0}}
+    merged = chain(heapq.merge(*index_keys, key=_ordered_by_key), heapq.merge(*other_keys, key=_ordered_by_key))
+    return {"result": _drain(_strip_key(merged), buffers), "stats": {"duplicates": found}}
+
+
+def _shuffled(buffer: SpillBuffer, seed: int) -> Iterator[str]:
+    count = len(buffer)
+    if count < 2:
+        yield from buffer
+        return
+    with tempfile.TemporaryFile(prefix="stringlom-", dir=buffer.temp_dir) as index:
+        buffer.offsets[:count].tofile(index)
+        index.flush()
+        with mmap.mmap(index.fileno(), 0) as mapped:
+            order = memoryview(mapped).cast("q")
+            try:
+                # Same Fisher-Yates pass as tools.shuffle, over record offsets instead of records
+                random = mulberry32(seed)
+                for i in range(count - 1, 0, -1):
+                    j = int(random() * (i + 1))
+                    order[i], order[j] = order[j], order[i]
+                for offset in order:
+                    yield buffer.read_at(offset)
+            finally:
+                order.release()
+
+
+def external_shuffle(buffer: SpillBuffer, params: Dict) -> Dict:
+    return {"result": _shuffled(buffer, js_parse_int(params.get("seed")) or 0), "stats": {}}
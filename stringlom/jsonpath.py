@@ -0,0 +1,159 @@
+"""Minimal JSONPath evaluator covering the syntax used in chains.
+
+Supported: ``$``, ``.name``, ``['name']``, ``[n]`` (negative counts from the end),
+``[*]`` / ``.*``, ``..name`` / ``..*``, unions ``[a,b]`` and slices ``[start:end:step]``.
+Filter (``?()``) and script (``()``) expressions are rejected.
+"""
+import re
+from typing import Any, Iterator, List, Tuple
+
+_NAME = re.compile(r"[A-Za-z_$\u0080-\uffff][\w$\u0080-\uffff-]*")
+
+
+class JSONPathError(ValueError):
+    pass
+
+
+Step = Tuple[str, Any]  # (kind, arg): kind in child/descendant, arg is a list of selectors
+
+
+def _parse_bracket(expr: str, i: int) -> Tuple[List[Any], int]:
+    end = i + 1
+    quote = None
+    while end < len(expr):
+        c = expr[end]
+        if quote:
+            if c == "\\":
+                end += 1
+            elif c == quote:
+                quote = None
+        elif c in "'\"":
+            quote = c
+        elif c == "]":
+            break
+        end += 1
+    else:
+        raise JSONPathError(f"Unclosed '[' at position {i}")
+
+    body = expr[i + 1:end].strip()
+    if body.startswith(("?", "(")):
+        raise JSONPathError("Filter and script expressions are not supported")
+
+    selectors: List[Any] = []
+    for part in re.findall(r"'(?:\\.|[^'])*'|\"(?:\\.|[^\"])*\"|[^,]+", body):
+        part = part.strip()
+        if part == "*":
+            selectors.append("*")
+        elif part[:1] in "'\"":
+            selectors.append(("key", re.sub(r"\\(.)", r"\1", part[1:-1])))
+        elif ":" in part:
+            bounds = [int(b) if b.strip() else None for b in part.split(":")]
+            if len(bounds) > 3:
+                raise JSONPathError(f"Invalid slice '{part}'")
+            selectors.append(("slice", tuple(bounds + [None] * (3 - len(bounds)))))
+        elif re.fullmatch(r"-?\d+", part):
+            selectors.append(("index", int(part)))
+        else:
+            selectors.append(("key", part))
+    if not selectors:
+        raise JSONPathError("Empty subscript")
+    return selectors, end + 1
+
+
+def parse(expr: str) -> List[Step]:
+    expr = expr.strip()
+    if not expr.startswith("$"):
+        raise JSONPathError("Path must start with '$'")
+    steps: List[Step] = []
+    i = 1
+    while i < len(expr):
+        c = expr[i]
+        if expr.startswith("..", i):
+            i += 2
+            if i < len(expr) and expr[i] == "[":
+                selectors, i = _parse_bracket(expr, i)
+            elif i < len(expr) and expr[i] == "*":
+                selectors, i = ["*"], i + 1
+            else:
+                m = _NAME.match(expr, i)
+                if not m:
+                    raise JSONPathError(f"Expected a name after '..' at position {i}")
+                selectors, i = [("key", m.group(0))], m.end()
+            steps.append(("descendant", selectors))
+        elif c == ".":
+            i += 1
+            if i < len(expr) and expr[i] == "*":
+                steps.append(("child", ["*"]))
+                i += 1
+            else:
+                m = _NAME.match(expr, i)
+                if not m:
+                    raise JSONPathError(f"Expected a name after '.' at position {i}")
+                steps.append(("child", [("key", m.group(0))]))
+                i = m.end()
+        elif c == "[":
+            selectors, i = _parse_bracket(expr, i)
+            steps.append(("child", selectors))
+        elif c.isspace():
+            i += 1
+        else:
+            raise JSONPathError(f"Unexpected '{c}' at position {i}")
+    return steps
+
+
+def _select(node: Any, selectors: List[Any]) -> Iterator[Any]:
+    for sel in selectors:
+        if sel == "*":
+            if isinstance(node, dict):
+                yield from node.values()
+            elif isinstance(node, list):
+                yield from node
+            continue
+        kind, arg = sel
+        if kind == "key":
+            if isinstance(node, dict) and arg in node:
+                yield node[arg]
+            elif isinstance(node, list) and re.fullmatch(r"\d+", arg) and int(arg) < len(node):
+                yield node[int(arg)]
+            elif isinstance(node, list) and arg == "length":
+                yield len(node)
+        elif kind == "index":
+            if isinstance(node, list) and -len(node) <= arg < len(node):
+                yield node[arg]
+            elif isinstance(node, dict) and str(arg) in node:
+                yield node[str(arg)]
+        elif kind == "slice" and isinstance(node, list):
+            start, stop, step = arg
+            if step == 0:
+                raise JSONPathError("Slice step cannot be zero")
+            yield from node[slice(start, stop, step)]
+
+
+def _descendants(node: Any) -> Iterator[Any]:
+    yield node
+    children = node.values() if isinstance(node, dict) else node if isinstance(node, list) else ()
+    for child in children:
+        yield from _descendants(child)
+
+
+def _child_step(nodes: Iterator[Any], selectors: List[Any]) -> Iterator[Any]:
+    for node in nodes:
+        yield from _select(node, selectors)
+
+
+def _descendant_step(nodes: Iterator[Any], selectors: List[Any]) -> Iterator[Any]:
+    for node in nodes:
+        for desc in _descendants(node):
+            yield from _select(desc, selectors)
+
+
+def evaluate(steps: List[Step], root: Any) -> Iterator[Any]:
+    nodes: Iterator[Any] = iter([root])
+    for kind, selectors in steps:
+        nodes = (_child_step if kind == "child" else _descendant_step)(nodes, selectors)
+    return nodes
+
+
+def query(obj: Any, expr: str) -> List[Any]:
+    """jsonpath.query(obj, expr)."""
+    return list(evaluate(parse(expr), obj))
@@ -0,0 +1,272 @@
+"""Incremental JSON decoding for the json_path and json_format tools.
+
+The elements of a top-level array are decoded one at a time from a stream of text
+chunks, so only a window of the text, the current element and the output are held in
+memory. Other documents, and JSONPath queries whose first step needs the whole array
+(negative indices, unions, ``length`` ...), are decoded in one piece. Errors carry the
+same messages and positions as ``json_parse`` on the joined text.
+"""
+import re
+import sys
+import json
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from . import jsonpath
+from .jsutil import JSON_DECODER, json_stringify
+
+READ_SIZE = 1 << 20
+# Elements formatted per json_stringify() call
+FORMAT_BATCH = 1024
+# A value decoded this close to the end of the window may have been cut short by it (e.g. a number)
+_MARGIN = 16
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_INDEX = re.compile(r"\d+")
+
+
+def _trailing_comma() -> Optional[str]:
+    # Newer Pythons name the error and point at the comma instead of reporting "Expecting value" after it
+    try:
+        json.loads("[0,]")
+    except json.JSONDecodeError as e:
+        return e.msg if e.pos == 2 else None
+    return None
+
+
+_TRAILING_COMMA = _trailing_comma()
+
+
+class JSONStreamError(ValueError):
+    pass
+
+
+class _Reader:
+    def __init__(self, chunks: Iterable[str]):
+        self.chunks = iter(chunks)
+        self.buf = ""
+        self.pos = 0  # next character in buf
+        self.offset = 0  # document position of buf[0]
+        self.line = 1  # line of buf[0]
+        self.line_start = 0  # document position where that line starts
+        self.mark: Optional[int] = None  # kept in buf by fill() when set
+        self.eof = False
+        self.read_size = READ_SIZE
+
+    def fill(self, size: Optional[int] = None) -> bool:
+        """Drops the text before pos (or mark) and reads at least ``size`` (default read_size) more characters."""
+        size = size or self.read_size
+        if self.eof:
+            return False
+        drop = self.pos if self.mark is None else self.mark
+        if drop:
+            dropped = self.buf[:drop]
+            newlines = dropped.count("\n")
+            if newlines:
+                self.line += newlines
+                self.line_start = self.offset + dropped.rindex("\n") + 1
+            self.offset += drop
+            self.buf = self.buf[drop:]
+            self.pos -= drop
+            if self.mark is not None:
+                self.mark = 0
+        parts = [self.buf]
+        read = 0
+        for chunk in self.chunks:
+            parts.append(chunk)
+            read += len(chunk)
+            if read >= size:
+                break
+        else:
+            self.eof = True
+        self.buf = "".join(parts)
+        return read > 0
+
+    def skip(self) -> str:
+        """Skips whitespace; returns the next character, or '' at the end of the text."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def location(self, pos: int) -> Tuple[int, int, int]:
+        newlines = self.buf.count("\n", 0, pos)
+        if newlines:
+            return self.offset + pos, self.line + newlines, pos - self.buf.rindex("\n", 0, pos)
+        return self.offset + pos, self.line, self.offset + pos - self.line_start + 1
+
+    def error(self, msg: str, pos: int) -> JSONStreamError:
+        # Formatted like json.JSONDecodeError
+        doc_pos, line, column = self.location(pos)
+        return JSONStreamError(f"{msg}: line {line} column {column} (char {doc_pos})")
+
+    def _cut(self, e: json.JSONDecodeError) -> bool:
+        return not self.eof and (e.pos >= len(self.buf) - _MARGIN or e.msg.startswith("Unterminated string"))
+
+    def value(self) -> Any:
+        while True:
+            try:
+                value, end = JSON_DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # Read more (doubling the window) and decode again when the window may have cut the value
+                if self._cut(e):
+                    self.fill(max(self.read_size, len(self.buf)))
+                    continue
+                raise self.error(e.msg, e.pos)
+            if end > len(self.buf) - _MARGIN and not self.eof:
+                self.fill(max(self.read_size, len(self.buf)))
+                continue
+            self.pos = end
+            return value
+
+    def end(self):
+        if self.skip():
+            raise self.error("Extra data", self.pos)
+
+
+def _items(reader: _Reader) -> Iterator[Any]:
+    reader.pos += 1
+    if reader.skip() == "]":
+        reader.pos += 1
+        reader.end()
+        return
+    while True:
+        yield reader.value()
+        c = reader.skip()
+        if c == "]":
+            reader.pos += 1
+            reader.end()
+            return
+        if c != ",":
+            raise reader.error("Expecting ',' delimiter", reader.pos)
+        if _TRAILING_COMMA is not None:
+            reader.mark = reader.pos
+        reader.pos += 1
+        c = reader.skip()
+        comma, reader.mark = reader.mark, None
+        if c == "]" and comma is not None:
+            raise reader.error(_TRAILING_COMMA, comma)
+
+
+def _whole(reader: _Reader) -> Iterator[Any]:
+    reader.fill(sys.maxsize)
+    reader.skip()
+    value = reader.value()
+    reader.end()
+    yield value
+
+
+def read_json(chunks: Iterable[str], items: bool = True) -> Tuple[bool, Iterator[Any]]:
+    """Returns (True, elements) for a top-level array when ``items`` is set, else (False, [whole value]).
+
+    Both iterators decode lazily and raise JSONStreamError where json_parse would fail.
+    """
+    reader = _Reader(chunks)
+    reader.fill()
+    if reader.buf.startswith("\ufeff"):
+        raise reader.error("Unexpected UTF-8 BOM (decode using utf-8-sig)", 0)
+    if items and reader.skip() == "[":
+        return True, _items(reader)
+    return False, _whole(reader)
+
+
+def joined(lines: Iterable[str], delim: str) -> Iterator[str]:
+    """The chunks of ``delim.join(lines)``."""
+    first = True
+    for line in lines:
+        if not first:
+            yield delim
+        first = False
+        yield line
+
+
+def blank_head(records: Iterator[str], delim: str) -> Tuple[List[str], bool]:
+    """Reads records until ``delim.join(records)`` can no longer be blank: (records read, blank)."""
+    head = []
+    for record in records:
+        head.append(record)
+        if record.strip() or (len(head) > 1 and delim.strip()):
+            return head, False
+    return head, True
+
+
+# --- json_path ---
+
+def _element_plan(steps: List[jsonpath.Step]) -> Optional[Tuple[Callable[[int], bool], List[jsonpath.Step]]]:
+    """For queries that only look inside the elements of a root array: which elements, and the path within them."""
+    if not steps:
+        return None
+    for _, selectors in steps:
+        # Keep the error for a zero slice step behind any parse error, as for a whole document
+        if any(sel != "*" and sel[0] == "slice" and sel[1][2] == 0 for sel in selectors):
+            return None
+    kind, selectors = steps[0]
+    if kind == "descendant":
+        # Only indices, slices, '*' and 'length' select anything on the root array itself
+        if all(sel != "*" and sel[0] == "key" and sel[1] != "length" and not _INDEX.fullmatch(sel[1])
+               for sel in selectors):
+            return (lambda i: True), steps
+        return None
+    if len(selectors) != 1:
+        return None
+    sel = selectors[0]
+    if sel == "*":
+        return (lambda i: True), steps[1:]
+    kind, arg = sel
+    if kind == "key" and _INDEX.fullmatch(arg):
+        kind, arg = "index", int(arg)
+    if kind == "index" and arg >= 0:
+        return (lambda i: i == arg), steps[1:]
+    if kind == "slice":
+        start, stop, step = arg
+        start, step = start or 0, step or 1
+        if start >= 0 and (stop is None or stop >= 0) and step > 0:
+            return (lambda i: i >= start and (stop is None or i < stop) and (i - start) % step == 0), steps[1:]
+    return None
+
+
+def query(steps: List[jsonpath.Step], chunks: Iterable[str]) -> Iterator[Any]:
+    """jsonpath.evaluate(steps, json_parse(''.join(chunks))), element by element where the query allows."""
+    plan = _element_plan(steps)
+    is_array, values = read_json(chunks, items=plan is not None)
+    if not is_array:
+        for root in values:
+            yield from jsonpath.evaluate(steps, root)
+        return
+    used, rest = plan
+    for i, item in enumerate(values):
+        if used(i):
+            yield from jsonpath.evaluate(rest, item)
+
+
+# --- json_format ---
+
+def format_lines(chunks: Iterable[str], indent: Any) -> Iterator[str]:
+    """json_stringify(json_parse(''.join(chunks)), indent).split('\\n'), element by element for a root array."""
+    is_array, values = read_json(chunks)
+    if not is_array:
+        for root in values:
+            yield from json_stringify(root, indent).split("\n")
+        return
+    if not indent:
+        yield "[" + ",".join(json_stringify(item) for item in values) + "]"
+        return
+
+    pending: Optional[List[str]] = None
+    while True:
+        batch = list(islice(values, FORMAT_BATCH))
+        if not batch:
+            break
+        if pending is None:
+            yield "["
+        else:
+            pending[-1] += ","
+            yield from pending
+        # The lines of a slice of the array without its brackets are the lines of those elements in the whole array
+        pending = json_stringify(batch, indent).split("\n")[1:-1]
+    if pending is None:
+        yield "[]"
+    else:
+        yield from pending
+        yield "]"
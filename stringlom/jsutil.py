@@ -0,0 +1,403 @@
+"""Helpers reproducing the JavaScript semantics the browser tools rely on."""
+import re
+import math
+import json
+import codecs
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# TextEncoder replaces lone surrogates with U+FFFD instead of failing
+# (as bytes: the UTF-8 encoder only takes ASCII replacement text)
+codecs.register_error("js_replace", lambda e: ("\ufffd".encode("utf-8") * (e.end - e.start), e.end))
+
+_JS_DECIMAL = re.compile(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?")
+_JS_RADIX = {"0x": 16, "0X": 16, "0o": 8, "0O": 8, "0b": 2, "0B": 2}
+_JS_INT_PREFIX = re.compile(r"\s*([+-]?\d+)")
+_ARRAY_INDEX = re.compile(r"0|[1-9]\d*")
+
+
+def js_number(s: str) -> Optional[float]:
+    """Number(s) for an already trimmed, non-empty string; None where JS gives NaN."""
+    if _JS_DECIMAL.fullmatch(s):
+        return float(s)
+    if s[:2] in _JS_RADIX:
+        try:
+            return float(int(s[2:], _JS_RADIX[s[:2]]))
+        except ValueError:
+            return None
+    if s in ("Infinity", "+Infinity"):
+        return math.inf
+    if s == "-Infinity":
+        return -math.inf
+    return None
+
+
+def js_parse_int(s: Any) -> Optional[int]:
+    """parseInt(s) in base 10; None where JS gives NaN."""
+    m = _JS_INT_PREFIX.match(str(s))
+    return int(m.group(1)) if m else None
+
+
+def js_number_str(n: float) -> str:
+    """String(n) for a JS number."""
+    if n != n:
+        return "NaN"
+    if n in (math.inf, -math.inf):
+        return "Infinity" if n > 0 else "-Infinity"
+    if n == int(n) and abs(n) < 1e21:
+        return str(int(n))
+    r = repr(float(n))
+    if "e" in r:
+        mantissa, exp = r.split("e")
+        mantissa = mantissa[:-2] if mantissa.endswith(".0") else mantissa
+        sign = "-" if exp.startswith("-") else "+"
+        return f"{mantissa}e{sign}{exp.lstrip('+-').lstrip('0') or '0'}"
+    return r
+
+
+def js_string(value: Any) -> str:
+    """String(value) for a JSON-parsed value."""
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, (int, float)):
+        return js_number_str(value)
+    if isinstance(value, list):
+        return ",".join("" if v is None else js_string(v) for v in value)
+    if isinstance(value, dict):
+        return "[object Object]"
+    return str(value)
+
+
+def is_array_index(key: str) -> bool:
+    """Whether JS engines list this object key before the others (in ascending numeric order)."""
+    return bool(_ARRAY_INDEX.fullmatch(key)) and int(key) < 2 ** 32 - 1
+
+
+def js_key_order(pairs: List[Tuple[str, Any]]) -> Dict[str, Any]:
+    """Orders object keys like JS engines do: array-index keys ascending, then insertion order."""
+    obj = dict(pairs)
+    index_keys = [k for k in obj if is_array_index(k)]
+    if not index_keys:
+        return obj
+    ordered = {k: obj[k] for k in sorted(index_keys, key=int)}
+    ordered.update((k, v) for k, v in obj.items() if k not in ordered)
+    return ordered
+
+
+def _parse_number(s: str) -> Any:
+    n = float(s)
+    # Out-of-range literals such as 1e400 stay Infinity, as in JS
+    return int(n) if math.isfinite(n) and abs(n) < 1e21 and n == int(n) else n
+
+
+def _reject_constant(name: str):
+    raise ValueError(f"Unexpected token {name} in JSON")
+
+
+# Built once: json.loads() with hooks creates a new decoder on every call
+JSON_DECODER = json.JSONDecoder(object_pairs_hook=js_key_order, parse_float=_parse_number, parse_constant=_reject_constant)
+
+
+def json_parse(text: str) -> Any:
+    """JSON.parse: no NaN/Infinity, JS key order, integral numbers collapse to ints."""
+    if text.startswith("\ufeff"):
+        # Checked by json.loads() only
+        raise json.JSONDecodeError("Unexpected UTF-8 BOM (decode using utf-8-sig)", text, 0)
+    return JSON_DECODER.decode(text)
+
+
+def _finite(value: Any) -> Any:
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, list):
+        return [_finite(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    return value
+
+
+def json_stringify(value: Any, space: Any = None) -> str:
+    """JSON.stringify(value, null, space)."""
+    separators = (",", ": ") if space else (",", ":")
+    try:
+        return json.dumps(value, ensure_ascii=False, indent=space or None, separators=separators, allow_nan=False)
+    except ValueError:
+        # Infinity (from literals like 1e400) is written as null
+        return json.dumps(_finite(value), ensure_ascii=False, indent=space or None, separators=separators)
+
+
+def utf8_encode(s: str) -> bytes:
+    """TextEncoder.encode."""
+    return s.encode("utf-8", "js_replace")
+
+
+def utf16_units(s: str) -> int:
+    """String.prototype.length."""
+    return len(s) + sum(1 for c in s if ord(c) > 0xFFFF)
+
+
+# --- Regular expressions ---
+
+# Non-ASCII characters Python's IGNORECASE folds onto ASCII letters; JS never does
+_ASCII_FOLD_EXCEPTIONS = "(?-i:(?![\u0130\u0131\u017f\u212a]))"
+
+
+def _translate_class_escape(escape: str, in_class: bool, ignore_case: bool) -> str:
+    # JS \d and \w are ASCII-only without the 'u' flag
+    if escape == "\\d":
+        return "0-9" if in_class else "[0-9]"
+    if escape == "\\w":
+        if in_class:
+            return "A-Za-z0-9_"
+        return f"(?:{_ASCII_FOLD_EXCEPTIONS}[A-Za-z0-9_])" if ignore_case else "[A-Za-z0-9_]"
+    if escape == "\\D" and not in_class:
+        return "[^0-9]"
+    if escape == "\\W" and not in_class:
+        return "[^A-Za-z0-9_]"
+    return escape
+
+
+# Compiled patterns kept across tool runs; chains rerun the same few patterns on every change
+REGEX_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def js_regex(pattern: str, ignore_case: bool = False) -> "re.Pattern":
+    """Compiles a JS RegExp source (flags 'gm' + optional 'i') into a Python pattern."""
+    pattern = _octal_escapes(pattern, _count_groups(pattern))
+    out = []
+    i = 0
+    in_class = False
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "\\" and i + 1 < n:
+            nxt = pattern[i + 1]
+            if nxt == "k" and pattern.startswith("<", i + 2):
+                end = pattern.index(">", i + 3)
+                out.append(f"(?P={pattern[i + 3:end]})")
+                i = end + 1
+                continue
+            if nxt == "u" and re.fullmatch(r"[0-9a-fA-F]{4}", pattern[i + 2:i + 6]):
+                out.append(pattern[i:i + 6])
+                i += 6
+                continue
+            out.append(_translate_class_escape(pattern[i:i + 2], in_class, ignore_case))
+            i += 2
+            continue
+        if in_class:
+            if c == "]":
+                in_class = False
+            elif c == "[":
+                c = "\\["
+            out.append(c)
+        elif c == "[":
+            in_class = True
+            # JS allows a literal ']' right after '[' or '[^' only as an empty class
+            if pattern.startswith("]", i + 1):
+                out.append("(?!)")
+                in_class = False
+                i += 2
+                continue
+            if pattern.startswith("^]", i + 1):
+                out.append("[\\s\\S]")
+                in_class = False
+                i += 3
+                continue
+            out.append(c)
+        elif c == "(" and pattern.startswith("?<", i + 1) and not pattern.startswith(("?<=", "?<!"), i + 1):
+            out.append("(?P<")
+            i += 3
+            continue
+        else:
+            out.append(c)
+        i += 1
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    return re.compile("".join(out), flags)
+
+
+def _count_groups(pattern: str) -> int:
+    count = 0
+    i = 0
+    in_class = False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            i += 1
+        elif in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+        elif c == "(" and (not pattern.startswith("?", i + 1) or (
+                pattern.startswith("?<", i + 1) and not pattern.startswith(("?<=", "?<!"), i + 1))):
+            count += 1
+        i += 1
+    return count
+
+
+_DECIMAL_ESCAPE = re.compile(r"[1-9]\d*")
+_LEGACY_OCTAL = re.compile(r"[0-3][0-7]{0,2}|[4-7][0-7]?")
+
+
+def _octal_escapes(pattern: str, groups: int) -> str:
+    """Rewrites \\N escapes above the group count, which JS reads as octal escapes or digits (Annex B)."""
+    out = []
+    i = 0
+    in_class = False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            m = None if in_class else _DECIMAL_ESCAPE.match(pattern, i + 1)
+            if m is None or int(m.group(0)) <= groups:
+                end = i + 2 if m is None else m.end()
+                out.append(pattern[i:end])
+                i = end
+            else:
+                octal = _LEGACY_OCTAL.match(pattern, i + 1)
+                out.append(f"\\x{int(octal.group(0), 8):02x}" if octal else pattern[i + 1])
+                i = octal.end() if octal else i + 2
+            continue
+        if in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+_REPLACEMENT_TOKEN = re.compile(r"\$(\$|&|`|'|\d{1,2}|<[^>]*>)")
+_PREFIX = ("prefix",)
+_SUFFIX = ("suffix",)
+
+
+def js_replacement(template: str, groups: int) -> Callable[["re.Match"], str]:
+    """Builds a re.sub callback expanding a JS replacement string ($1, $&, $<name>, $$ ...)."""
+    parts: List[Any] = []
+    pos = 0
+    for m in _REPLACEMENT_TOKEN.finditer(template):
+        token = m.group(1)
+        literal = template[pos:m.start()]
+        pos = m.end()
+        if token == "$":
+            parts.append(literal + "$")
+        elif token == "&":
+            parts += [literal, 0]
+        elif token == "`":
+            parts += [literal, _PREFIX]
+        elif token == "'":
+            parts += [literal, _SUFFIX]
+        elif token.startswith("<"):
+            parts += [literal, ("name", token[1:-1])]
+        else:
+            num = int(token)
+            if 1 <= num <= groups:
+                parts += [literal, num]
+            elif len(token) == 2 and 1 <= int(token[0]) <= groups:
+                parts += [literal, int(token[0]), token[1]]
+            else:
+                parts.append(literal + m.group(0))
+    parts.append(template[pos:])
+
+    if all(isinstance(p, str) for p in parts):
+        constant = "".join(parts)
+        return lambda m: constant
+
+    def expand(m: "re.Match") -> str:
+        out = []
+        for p in parts:
+            if isinstance(p, str):
+                out.append(p)
+            elif isinstance(p, int):
+                out.append(m.group(p) or "")
+            elif p is _PREFIX:
+                out.append(m.string[:m.start()])
+            elif p is _SUFFIX:
+                out.append(m.string[m.end():])
+            else:
+                try:
+                    out.append(m.group(p[1]) or "")
+                except IndexError:
+                    out.append(f"$<{p[1]}>")
+        return "".join(out)
+
+    return expand
+
+
+# --- Seeded PRNG (mulberry32, as in the shuffle tool) ---
+
+def _int32(x: int) -> int:
+    x &= 0xFFFFFFFF
+    return x - 0x100000000 if x & 0x80000000 else x
+
+
+def _imul(a: int, b: int) -> int:
+    return _int32((a & 0xFFFFFFFF) * (b & 0xFFFFFFFF))
+
+
+def mulberry32(seed: int) -> Callable[[], float]:
+    state = seed
+
+    def random() -> float:
+        nonlocal state
+        state += 0x6D2B79F5
+        t = _int32(state)
+        t = _imul(t ^ ((t & 0xFFFFFFFF) >> 15), t | 1)
+        t = _int32(t ^ (t + _imul(t ^ ((t & 0xFFFFFFFF) >> 7), t | 61)))
+        return ((t ^ ((t & 0xFFFFFFFF) >> 14)) & 0xFFFFFFFF) / 4294967296
+
+    return random
+
+
+# --- Keccak-512 (CryptoJS.SHA3 is pre-standard Keccak, not FIPS-202 SHA3) ---
+
+_KECCAK_RC = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008
+]
+_KECCAK_ROT = [
+    [0, 36, 3, 41, 18], [1, 44, 10, 45, 2], [62, 6, 43, 15, 61],
+    [28, 55, 25, 21, 56], [27, 20, 39, 8, 14]
+]
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _keccak_f(lanes: List[List[int]]):
+    for rc in _KECCAK_RC:
+        c = [lanes[x][0] ^ lanes[x][1] ^ lanes[x][2] ^ lanes[x][3] ^ lanes[x][4] for x in range(5)]
+        for x in range(5):
+            r = c[(x + 1) % 5]
+            d = c[(x - 1) % 5] ^ (((r << 1) | (r >> 63)) & _MASK64)
+            for y in range(5):
+                lanes[x][y] ^= d
+        b = [[0] * 5 for _ in range(5)]
+        for x in range(5):
+            for y in range(5):
+                v, r = lanes[x][y], _KECCAK_ROT[x][y]
+                b[y][(2 * x + 3 * y) % 5] = ((v << r) | (v >> (64 - r))) & _MASK64 if r else v
+        for x in range(5):
+            for y in range(5):
+                lanes[x][y] = b[x][y] ^ ((~b[(x + 1) % 5][y]) & b[(x + 2) % 5][y])
+        lanes[0][0] ^= rc
+
+
+def keccak512(data: bytes) -> str:
+    rate = 72
+    padded = bytearray(data) + b"\x01" + b"\x00" * ((-len(data) - 1) % rate)
+    padded[-1] |= 0x80
+    lanes = [[0] * 5 for _ in range(5)]
+    for offset in range(0, len(padded), rate):
+        block = padded[offset:offset + rate]
+        for i in range(rate // 8):
+            lanes[i % 5][i // 5] ^= int.from_bytes(block[i * 8:i * 8 + 8], "little")
+        _keccak_f(lanes)
+    out = b"".join(lanes[i % 5][i // 5].to_bytes(8, "little") for i in range(8))
+    return out.hex()
@@ -0,0 +1,163 @@
+"""Random access to the records of large texts without loading them.
+
+An ``IndexedText`` is a UTF-8 file of records joined by a delimiter, next to an index
+file (``<path>.idx``) holding the byte offset where each record starts. Both are
+memory-mapped, so a window of records or a search costs the pages it touches, not the
+size of the text. ``IndexWriter`` writes both from a stream of records; ``build_index``
+indexes a text file that already exists.
+"""
+import os
+import mmap
+import bisect
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+INDEX_SUFFIX = ".idx"
+# Offsets buffered before they are appended to the index file
+_FLUSH_EVERY = 1 << 16
+
+
+def index_path(path: str) -> str:
+    return path + INDEX_SUFFIX
+
+
+def build_index(path: str, delimiter: str = "\n") -> int:
+    """Writes the index of ``path`` split like ``text.split(delimiter) if text else []``; returns the record count."""
+    if not delimiter:
+        raise ValueError("An index needs a non-empty delimiter")
+    delim = delimiter.encode("utf-8", "surrogatepass")
+    count = 0
+    with open(path, "rb") as text, open(index_path(path), "wb") as index:
+        if os.fstat(text.fileno()).st_size == 0:
+            return 0
+        starts = array("q", [0])
+        with mmap.mmap(text.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            find = data.find
+            pos = find(delim)
+            while pos >= 0:
+                pos += len(delim)
+                starts.append(pos)
+                if len(starts) >= _FLUSH_EVERY:
+                    starts.tofile(index)
+                    count += len(starts)
+                    starts = array("q")
+                pos = find(delim, pos)
+        starts.tofile(index)
+        return count + len(starts)
+
+
+class IndexWriter:
+    """Writes records joined by ``delimiter`` to ``path`` and their offsets to its index."""
+
+    def __init__(self, path: str, delimiter: str = "\n"):
+        self.delimiter = delimiter.encode("utf-8", "surrogatepass")
+        self.text = open(path, "wb")
+        self.index = open(index_path(path), "wb")
+        self.starts = array("q")
+        self.size = 0
+        self.count = 0
+
+    def append(self, record: str):
+        if self.count:
+            self.text.write(self.delimiter)
+            self.size += len(self.delimiter)
+        self.starts.append(self.size)
+        data = record.encode("utf-8", "surrogatepass")
+        self.text.write(data)
+        self.size += len(data)
+        self.count += 1
+        if len(self.starts) >= _FLUSH_EVERY:
+            self.starts.tofile(self.index)
+            self.starts = array("q")
+
+    def extend(self, records: Iterable[str]):
+        for record in records:
+            self.append(record)
+
+    def close(self):
+        if not self.text.closed:
+            self.starts.tofile(self.index)
+            self.starts = array("q")
+            self.text.close()
+            self.index.close()
+
+    def __enter__(self) -> "IndexWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class IndexedText:
+    """Read-only view of a text file and its index (built first if there is none)."""
+
+    def __init__(self, path: str, delimiter: str = "\n"):
+        self.path = path
+        self.delimiter = delimiter.encode("utf-8", "surrogatepass")
+        if not os.path.exists(index_path(path)):
+            build_index(path, delimiter)
+        self.data = self.index = self.starts = None
+        with open(path, "rb") as text:
+            self.size = os.fstat(text.fileno()).st_size
+            if self.size:
+                self.data = mmap.mmap(text.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(index_path(path), "rb") as index:
+            if os.fstat(index.fileno()).st_size:
+                self.index = mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ)
+                self.starts = memoryview(self.index).cast("q")
+        self.count = len(self.starts) if self.starts is not None else 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _span(self, i: int) -> Tuple[int, int]:
+        end = self.starts[i + 1] - len(self.delimiter) if i + 1 < self.count else self.size
+        return self.starts[i], end
+
+    def __getitem__(self, i: int) -> str:
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        start, end = self._span(i)
+        return self.data[start:end].decode("utf-8", "replace") if end > start else ""
+
+    def window(self, offset: int, limit: int) -> List[str]:
+        """Records ``offset`` to ``offset + limit``, clipped to the text."""
+        return [self[i] for i in range(max(offset, 0), min(offset + limit, self.count))]
+
+    def search(self, query: str, start: int = 0, limit: int = 100) -> Tuple[List[int], Optional[int]]:
+        """Indexes of up to ``limit`` records from ``start`` on that contain ``query``, and where to go on (None at the end)."""
+        matches: List[int] = []
+        if not query or self.data is None or start >= self.count:
+            return matches, None
+        needle = query.encode("utf-8", "surrogatepass")
+        pos = self.starts[max(start, 0)]
+        while True:
+            pos = self.data.find(needle, pos)
+            if pos < 0:
+                return matches, None
+            i = bisect.bisect_right(self.starts, pos) - 1
+            # A hit can straddle the delimiter between two records
+            if query not in self[i]:
+                pos += 1
+                continue
+            matches.append(i)
+            if i + 1 >= self.count:
+                return matches, None
+            if len(matches) >= limit:
+                return matches, i + 1
+            pos = self.starts[i + 1]
+
+    def close(self):
+        if self.starts is not None:
+            self.starts.release()
+            self.starts = None
+        for mapped in (self.index, self.data):
+            if mapped is not None:
+                mapped.close()
+        self.index = self.data = None
+
+    def __enter__(self) -> "IndexedText":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,186 @@
+"""Multi-core chain execution.
+
+Runs of line-wise blocks are applied to contiguous chunks of the input in a process pool.
+The input of each run is written once to a temporary file that workers memory-map and
+slice by byte offsets, so no line lists are pickled on the way in. Chunk results come
+back in input order. A ``deduplicate`` or ``sort`` block right after a run is pre-applied
+per chunk and merged in the parent; every other block runs in the parent over all lines.
+"""
+import os
+import mmap
+import tempfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .tools import TOOLS
+from .chain import source_delimiter, block_params, error_message, run_blocks, run_chain
+from .jsutil import js_number
+from .stream import is_linewise, merge_stats
+from .external import merge_sorted
+
+# Blocks that can be applied per chunk and merged afterwards
+MERGEABLE = {"deduplicate", "sort"}
+
+MIN_PARALLEL_CHARS = 1 << 20
+CHUNKS_PER_WORKER = 4
+
+# Record separators for chunk results, tried in order until one does not occur in the data
+_SEPARATORS = ("\n", "\x00", "\x1e", "\uffff", "\U0010fffe")
+
+Segment = Tuple[List[Dict], Optional[Dict]]
+
+
+def _segments(blocks: List[Dict]) -> Iterator[Tuple[bool, Segment]]:
+    """Groups blocks into (parallel, (line-wise run, mergeable block)) segments."""
+    run: List[Dict] = []
+    for block in blocks:
+        if is_linewise(block):
+            run.append(block)
+            continue
+        if block["type"] in MERGEABLE:
+            yield True, (run, block)
+        else:
+            if run:
+                yield True, (run, None)
+            yield False, ([block], None)
+        run = []
+    if run:
+        yield True, (run, None)
+
+
+def _join(lines: List[str]) -> Tuple[str, str]:
+    for sep in _SEPARATORS:
+        text = sep.join(lines)
+        if text.count(sep) == max(len(lines) - 1, 0):
+            return text, sep
+    raise ValueError("No free record separator")
+
+
+def _split(text: str, sep: str, count: int) -> List[str]:
+    return text.split(sep) if count else []
+
+
+def _chunk_bounds(text: str, sep: str, parts: int) -> List[Tuple[int, int]]:
+    step = max(len(text) // parts, 1)
+    bounds = []
+    start = 0
+    while True:
+        cut = text.find(sep, start + step)
+        if cut == -1:
+            bounds.append((start, len(text)))
+            return bounds
+        bounds.append((start, cut))
+        start = cut + len(sep)
+
+
+def _run_chunk(path: str, start: int, end: int, sep: str, run: List[Dict], merge: Optional[Dict]) -> Dict:
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        lines = buf[start:end].decode("utf-8", "surrogatepass").split(sep)
+    stats = []
+    for block in run:
+        res = TOOLS[block["type"]](lines, block_params(block))
+        if res.get("error"):
+            return {"error": error_message(res)}
+        block_stats = res.get("stats") or {}
+        # The '(empty)' placeholder is decided for the whole input by the parent
+        lines = [] if block["type"] == "filter" and not block_stats["matched"] else res["result"]
+        stats.append(block_stats)
+    count = len(lines)
+    if merge is not None:
+        lines = TOOLS[merge["type"]](lines, block_params(merge))["result"]
+    text, out_sep = _join(lines)
+    return {"text": text, "sep": out_sep, "count": len(lines), "input": count, "stats": stats}
+
+
+def _merge_sorted(parts: List[List[str]], params: Dict) -> List[str]:
+    if params.get("mode") != "numeric":
+        return list(merge_sorted([], parts, params))
+    # Each part lists its numbers first, as in tools.sort
+    numbers, texts = [], []
+    for part in parts:
+        split = 0
+        while split < len(part) and js_number(part[split].strip()) is not None:
+            split += 1
+        numbers.append(part[:split])
+        texts.append(part[split:])
+    return list(merge_sorted(numbers, texts, params))
+
+
+def _run_segment(pool: Executor, segment: Segment, text: str, sep: str, parts: int,
+                 temp_dir: Optional[str], report: List[Dict]) -> Optional[List[str]]:
+    run, merge = segment
+    bounds = _chunk_bounds(text, sep, parts)
+    with tempfile.NamedTemporaryFile(prefix="stringlom-", dir=temp_dir, delete=False) as f:
+        path = f.name
+        offsets = []
+        for start, end in bounds:
+            begin = f.tell()
+            f.write(text[start:end].encode("utf-8", "surrogatepass"))
+            offsets.append((begin, f.tell()))
+    try:
+        futures = [pool.submit(_run_chunk, path, start, end, sep, run, merge) for start, end in offsets]
+        results = [future.result() for future in futures]
+    finally:
+        os.unlink(path)
+
+    if any("error" in res for res in results):
+        # Rerun serially for the exact report of the failing block and the ones before it
+        return run_blocks(run + ([merge] if merge else []), text.split(sep), report)
+
+    outputs = [_split(res["text"], res["sep"], res["count"]) for res in results]
+    lines = [line for part in outputs for line in part] if merge is None or merge["type"] != "sort" else None
+    for i, block in enumerate(run):
+        stats: Dict = {}
+        for res in results:
+            merge_stats(stats, res["stats"][i])
+        report.append({"type": block["type"], "stats": stats})
+        if block["type"] == "filter" and not stats["matched"]:
+            # No chunk matched: the rest of the segment sees only the placeholder, as in the browser
+            return run_blocks(run[i + 1:] + ([merge] if merge else []), ["(empty)"], report)
+    if merge is None:
+        return lines
+
+    params = block_params(merge)
+    if merge["type"] == "sort":
+        report.append({"type": "sort", "stats": {}})
+        return _merge_sorted(outputs, params)
+    res = TOOLS["deduplicate"](lines, params)
+    original = sum(r["input"] for r in results)
+    report.append({"type": "deduplicate", "stats": {
+        "original": original, "unique": len(res["result"]), "removed": original - len(res["result"])
+    }})
+    return res["result"]
+
+
+def parallel_chain(chain: Dict, text: str, workers: Optional[int] = None, temp_dir: Optional[str] = None,
+                   min_parallel_chars: int = MIN_PARALLEL_CHARS) -> Dict:
+    """run_chain on a process pool; returns the same {'result', 'blocks', 'error'} report.
+
+    Segments whose input is shorter than ``min_parallel_chars`` run in the calling process,
+    as does the whole chain when only one worker is available.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return run_chain(chain, text)
+    blocks = chain["blocks"]
+    delim = source_delimiter(blocks[0])
+    report: List[Dict] = []
+    lines: Optional[List[str]] = None  # until the source text is split
+
+    with ProcessPoolExecutor(workers) as pool:
+        for parallel, segment in _segments(blocks[1:]):
+            size = len(text) if lines is None else sum(map(len, lines))
+            if parallel and size >= max(min_parallel_chars, 1):
+                current, sep = (text, delim) if lines is None else _join(lines)
+                lines = _run_segment(pool, segment, current, sep, workers * CHUNKS_PER_WORKER, temp_dir, report)
+            else:
+                if lines is None:
+                    lines = text.split(delim) if text else []
+                run, merge = segment
+                lines = run_blocks(run + ([merge] if merge else []), lines, report)
+            if lines is None:
+                return {"result": [], "blocks": report, "error": True}
+
+    if lines is None:
+        lines = text.split(delim) if text else []
+    return {"result": lines, "blocks": report, "error": False}
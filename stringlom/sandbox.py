@@ -0,0 +1,232 @@
+"""Isolated, parallel evaluation of candidate chains, as the AI agents test the logic they generate.
+
+Candidates run in a pool of warm worker processes (``python -m stringlom.sandbox``) that
+take one JSON job per line on stdin and answer with one JSON line on stdout. Each worker's
+address space is capped, and a worker that overruns a candidate's time limit is killed and
+replaced, so a runaway candidate costs only its own result.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .tools import TOOLS
+from .chain import ChainError, load_chain, source_delimiter, block_params, error_message
+
+try:
+    import resource
+except ImportError:  # Windows: no address-space limit
+    resource = None
+
+# Lines of each block's output kept in its log entry
+SAMPLE_LINES = 5
+
+# Workers import this package from where it is, whatever the caller's working directory
+_PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def evaluate_chain(chain: Dict, lines: List[str]) -> Dict:
+    """Runs the processing blocks over ``lines`` like the agents' executeLocalLogic.
+
+    Returns {'status', 'final_output', 'log', 'ms'} with one log entry per block that ran:
+    {'type', 'status': 'ok', 'ms', 'lines', 'output', 'stats'} or {'type', 'status': 'error', 'ms', 'msg'}.
+    As in run_chain, a failing block stops the chain and leaves an empty output.
+    """
+    started = time.perf_counter()
+    log: List[Dict] = []
+    for block in chain["blocks"][1:]:
+        block_started = time.perf_counter()
+        res = TOOLS[block["type"]](lines, block_params(block))
+        ms = round((time.perf_counter() - block_started) * 1000, 3)
+        if res.get("error"):
+            log.append({"type": block["type"], "status": "error", "ms": ms, "msg": error_message(res)})
+            return {"status": "error", "final_output": [], "log": log, "error": error_message(res),
+                    "ms": round((time.perf_counter() - started) * 1000, 3)}
+        lines = res["result"]
+        log.append({"type": block["type"], "status": "ok", "ms": ms, "lines": len(lines),
+                    "output": lines[:SAMPLE_LINES], "stats": res.get("stats") or {}})
+    return {"status": "ok", "final_output": lines, "log": log, "ms": round((time.perf_counter() - started) * 1000, 3)}
+
+
+def candidate_lines(chain: Dict, candidate: Dict, inputs: Optional[List[str]]) -> List[str]:
+    """The test input of a candidate: its 'inputs' lines, its 'text' split like the source block, or the shared inputs."""
+    if isinstance(candidate.get("inputs"), list):
+        return [str(line) for line in candidate["inputs"]]
+    if isinstance(candidate.get("text"), str):
+        text = candidate["text"]
+        return text.split(source_delimiter(chain["blocks"][0])) if text else []
+    return [str(line) for line in inputs or []]
+
+
+class SandboxWorker:
+    def __init__(self, memory_mb: float, datasets_dir: Optional[str]):
+        command = [sys.executable, "-m", "stringlom.sandbox", "--memory-mb", str(memory_mb)]
+        if datasets_dir:
+            command += ["--datasets-dir", datasets_dir]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_PACKAGE_ROOT, os.environ.get("PYTHONPATH")])))
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, env=env)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run(self, job: Dict, timeout: float) -> Dict:
+        timed_out = threading.Event()
+
+        def expire():
+            timed_out.set()
+            self.process.kill()
+
+        timer = threading.Timer(timeout, expire)
+        timer.start()
+        try:
+            self.process.stdin.write(json.dumps(job).encode("ascii") + b"\n")
+            self.process.stdin.flush()
+            reply = self.process.stdout.readline()
+        except OSError:
+            reply = b""
+        finally:
+            timer.cancel()
+        if reply and not timed_out.is_set():
+            result = json.loads(reply)
+            if result.get("status") == "memory":
+                # The worker exits after running out of memory
+                self.close()
+            return result
+        self.close()
+        if timed_out.is_set():
+            return {"status": "timeout", "error": f"Timed out after {timeout:g} s"}
+        return {"status": "crashed", "error": f"Worker exited ({self.process.returncode})"}
+
+    def close(self):
+        if self.alive:
+            self.process.kill()
+        self.process.wait()
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class SandboxPool:
+    """Up to ``size`` warm sandbox workers, started on first use."""
+
+    def __init__(self, size: int, memory_mb: float = 256, datasets_dir: Optional[str] = None):
+        self.size = max(size, 1)
+        self.memory_mb = memory_mb
+        self.datasets_dir = datasets_dir
+        self.idle: queue.LifoQueue = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(self.size)
+        self.lock = threading.Lock()
+        self.workers: List[SandboxWorker] = []
+
+    def evaluate(self, candidate: Dict, inputs: Optional[List[str]] = None, timeout: float = 10.0) -> Dict:
+        if not isinstance(candidate, dict):
+            return {"status": "invalid", "error": "A candidate must be an object with a 'chain'"}
+        try:
+            chain = load_chain(candidate.get("chain"))
+        except ChainError as e:
+            return {"status": "invalid", "error": str(e)}
+        job = {"chain": chain, "lines": candidate_lines(chain, candidate, inputs)}
+        with self.slots:
+            worker = self.checkout()
+            started = time.perf_counter()
+            result = None
+            try:
+                result = worker.run(job, timeout)
+            finally:
+                if result is not None and worker.alive:
+                    self.idle.put(worker)
+                else:
+                    # A job that raised may have left a reply half-read; never reuse the worker
+                    worker.close()
+                    self.discard(worker)
+        result.setdefault("ms", round((time.perf_counter() - started) * 1000, 3))
+        return result
+
+    def evaluate_many(self, candidates: List[Dict], inputs: Optional[List[str]] = None, timeout: float = 10.0) -> List[Dict]:
+        """Results in candidate order, at most ``size`` candidates running at once.
+
+        A candidate whose evaluation raises (say, a garbled worker reply) gets an 'error'
+        result instead of failing the others.
+        """
+        def evaluate(candidate: Dict) -> Dict:
+            try:
+                return self.evaluate(candidate, inputs, timeout)
+            except Exception as e:
+                return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+
+        if len(candidates) <= 1:
+            return [evaluate(candidate) for candidate in candidates]
+        with ThreadPoolExecutor(min(self.size, len(candidates))) as pool:
+            return list(pool.map(evaluate, candidates))
+
+    def checkout(self) -> SandboxWorker:
+        while True:
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker.alive:
+                return worker
+            self.discard(worker)
+        worker = SandboxWorker(self.memory_mb, self.datasets_dir)
+        with self.lock:
+            self.workers.append(worker)
+        return worker
+
+    def discard(self, worker: SandboxWorker):
+        with self.lock:
+            if worker in self.workers:
+                self.workers.remove(worker)
+
+    def close(self):
+        with self.lock:
+            workers, self.workers = self.workers, []
+        for worker in workers:
+            worker.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m stringlom.sandbox", description="Sandbox worker: evaluates one JSON job per stdin line")
+    parser.add_argument("--memory-mb", type=float, default=256, help="Address-space limit of this process")
+    parser.add_argument("--datasets-dir", default=None, help="Directory of datasets that compare blocks can name")
+    args = parser.parse_args(argv)
+
+    from . import datasets
+    # Candidates come from a model, so they may name datasets but never read arbitrary paths
+    datasets.configure(args.datasets_dir, allow_paths=False)
+    if resource is not None and args.memory_mb > 0:
+        limit = int(args.memory_mb * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    for line in sys.stdin.buffer:
+        try:
+            job = json.loads(line)
+            result = evaluate_chain(job["chain"], job["lines"])
+        except MemoryError:
+            result = {"status": "memory", "error": f"Exceeded the {args.memory_mb:g} MB memory limit"}
+        except Exception as e:
+            result = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        try:
+            reply = json.dumps(result).encode("ascii") + b"\n"
+        except MemoryError:
+            reply = json.dumps({"status": "memory", "error": f"Exceeded the {args.memory_mb:g} MB memory limit"}).encode("utf-8") + b"\n"
+        sys.stdout.buffer.write(reply)
+        sys.stdout.buffer.flush()
+        if result["status"] == "memory":
+            # The heap may be left fragmented; the pool starts a fresh worker
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Record buffers that move to disk once they outgrow a memory budget."""
+import struct
+import tempfile
+from array import array
+from typing import Iterable, Iterator, List, Optional
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+# Approximate bytes a str takes beyond its characters, including its slot in a list
+RECORD_OVERHEAD = 57
+
+_LENGTH = struct.Struct("<I")
+
+
+def record_size(record: str) -> int:
+    return len(record) + RECORD_OVERHEAD
+
+
+class SpillBuffer:
+    """Append-only list of records that moves to a temporary file once it takes about ``budget``
+    bytes of memory (a negative budget writes to disk from the start).
+
+    Spilled records are length-prefixed UTF-8 with an offset index, so they can be read
+    back in order or by position while only the index stays in memory.
+    """
+
+    def __init__(self, budget: int = DEFAULT_MEMORY_BUDGET, temp_dir: Optional[str] = None):
+        self.budget = budget
+        self.temp_dir = temp_dir
+        self.records: List[str] = []
+        self.size = 0
+        self.file = None
+        self.offsets = array("q")
+        if budget < 0:
+            self._spill()
+
+    @property
+    def spilled(self) -> bool:
+        return self.file is not None
+
+    def append(self, record: str):
+        self.size += record_size(record)
+        if self.file is None:
+            self.records.append(record)
+            if self.size > self.budget:
+                self._spill()
+        else:
+            self._write(record)
+
+    def extend(self, records: Iterable[str]):
+        for record in records:
+            self.append(record)
+
+    def _spill(self):
+        self.file = tempfile.TemporaryFile(prefix="stringlom-", dir=self.temp_dir)
+        self.offsets.append(0)
+        for record in self.records:
+            self._write(record)
+        self.records = []
+
+    def _write(self, record: str):
+        data = record.encode("utf-8", "surrogatepass")
+        self.file.write(_LENGTH.pack(len(data)))
+        self.file.write(data)
+        self.offsets.append(self.offsets[-1] + _LENGTH.size + len(data))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1 if self.file else len(self.records)
+
+    def __getitem__(self, index: int) -> str:
+        if self.file is None:
+            return self.records[index]
+        return self.read_at(self.offsets[index])
+
+    def read_at(self, offset: int) -> str:
+        """The spilled record that starts at byte ``offset`` (one of ``offsets``)."""
+        self.file.seek(offset)
+        (size,) = _LENGTH.unpack(self.file.read(_LENGTH.size))
+        return self.file.read(size).decode("utf-8", "surrogatepass")
+
+    def __iter__(self) -> Iterator[str]:
+        if self.file is None:
+            yield from self.records
+            return
+        # Sequential reads; a single pass at a time
+        self.file.seek(0)
+        for _ in range(len(self)):
+            (size,) = _LENGTH.unpack(self.file.read(_LENGTH.size))
+            yield self.file.read(size).decode("utf-8", "surrogatepass")
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.records = []
+        self.offsets = array("q")
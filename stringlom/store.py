@@ -0,0 +1,79 @@
+"""Saved chains kept one row per chain in SQLite, in the binary chain format.
+
+Listing reads only the index columns, and saving or deleting a chain touches only its
+own row, however many chains are saved. Names are unique; saving under an existing name
+replaces that chain, as the browser's Save does.
+"""
+import os
+import time
+import random
+import sqlite3
+import string
+import threading
+from typing import Any, Dict, List, Optional
+
+from .chainformat import decode_chain, encode_chain
+
+_ID_CHARS = string.ascii_lowercase + string.digits
+
+
+def new_chain_id() -> str:
+    # Same shape as the browser's genChainId()
+    return "".join(random.choice(_ID_CHARS) for _ in range(8))
+
+
+class ChainStore:
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.expanduser(path), check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS chains (id TEXT PRIMARY KEY, name TEXT NOT NULL UNIQUE, updated REAL NOT NULL, data BLOB NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS chains_updated ON chains (updated)")
+
+    def list(self) -> List[Dict]:
+        """Saved chains, most recently saved first, without their configs."""
+        with self.lock:
+            rows = self.conn.execute("SELECT id, name, updated FROM chains ORDER BY updated DESC").fetchall()
+        return [{"id": chain_id, "name": name, "updated": updated} for chain_id, name, updated in rows]
+
+    def load(self, key: str) -> Optional[Dict]:
+        """The config of the chain with this id or, failing that, this name."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT data FROM chains WHERE id = ? UNION ALL SELECT data FROM chains WHERE name = ? LIMIT 1", (key, key)
+            ).fetchone()
+        return decode_chain(row[0]) if row else None
+
+    def save(self, config: Any, name: str, chain_id: Optional[str] = None) -> str:
+        """Saves a chain under ``name`` (renaming ``chain_id`` if given) and returns its id."""
+        name = name.strip()
+        if not name:
+            raise ValueError("Chain name is empty")
+        data = encode_chain(config)
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT id FROM chains WHERE name = ?", (name,)).fetchone()
+                if row is not None:
+                    chain_id = row[0]
+                elif chain_id is None or self.conn.execute("SELECT 1 FROM chains WHERE id = ?", (chain_id,)).fetchone() is None:
+                    chain_id = new_chain_id()
+                    while self.conn.execute("SELECT 1 FROM chains WHERE id = ?", (chain_id,)).fetchone():
+                        chain_id = new_chain_id()
+                self.conn.execute(
+                    "INSERT INTO chains (id, name, updated, data) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET name = excluded.name, updated = excluded.updated, data = excluded.data",
+                    (chain_id, name, time.time(), data)
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return chain_id
+
+    def delete(self, chain_id: str) -> bool:
+        with self.lock:
+            return self.conn.execute("DELETE FROM chains WHERE id = ?", (chain_id,)).rowcount > 0
+
+    def close(self):
+        self.conn.close()
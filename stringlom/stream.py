@@ -0,0 +1,250 @@
+"""Constant-memory chain execution over text streams.
+
+Line-wise tools (``LINEWISE``) are applied chunk by chunk as records flow from the
+input to the output. The JSON tools (``INCREMENTAL``) decode their input as it arrives.
+A template that loops over its lines once renders them as they arrive, and the
+shuffle tool's sampling modes keep only their sample.
+Every other tool is a barrier: it collects its input into a ``SpillBuffer`` that moves
+to a temporary file once it outgrows the memory budget.
+Memory is bounded per record, not per input: a single record (say, a huge
+file without delimiters) is held whole.
+"""
+from itertools import chain as chain_iterables, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from .tools import TOOLS, SAMPLE_MODES, resolve_delimiter, compile_template, render_lines, sample_lines
+from .chain import source_delimiter, final_delimiter, block_params, error_message
+from .spill import DEFAULT_MEMORY_BUDGET, SpillBuffer
+from .external import external_sort, external_deduplicate, external_duplicates, external_shuffle
+from .datasets import DatasetError, match_values, open_index, unmatched
+
+# Tools whose result for a list is the concatenation of their results for its parts
+LINEWISE = {"regex", "ai_cleaner", "filter", "case", "wrapper", "trim", "debug_view", "split", "encode", "hash", "to_hex"}
+
+# Tools that read their input as an iterator and only keep what they produce
+INCREMENTAL = {"json_format", "json_path"}
+
+CHUNK_RECORDS = 4096
+READ_SIZE = 1 << 20
+def _reverse_spilled(buffer: SpillBuffer, params: Dict) -> Dict:
+    return {"result": (buffer[i] for i in range(len(buffer) - 1, -1, -1)), "stats": {}}
+
+
+# Barriers that can read a spilled buffer without loading it back into memory
+SPILLED: Dict[str, Callable[[SpillBuffer, Dict], Dict]] = {
+    "reverse": _reverse_spilled,
+    "shuffle": external_shuffle,
+    "sort": external_sort,
+    "deduplicate": external_deduplicate,
+    "duplicates": external_duplicates,
+}
+
+
+class BlockFailed(Exception):
+    def __init__(self, index: int, message: str):
+        super().__init__(message)
+        self.index = index
+        self.message = message
+
+
+def read_records(source: TextIO, delim: str, read_size: int = READ_SIZE) -> Iterator[str]:
+    """Yields ``text.split(delim)`` for the whole stream (nothing for empty input) without reading it at once."""
+    chunk = source.read(read_size)
+    if not chunk:
+        return
+    # The record being read is kept as chunks and only new text is searched, so a long
+    # record costs linear time; it is still held in memory whole until its delimiter
+    pending: List[str] = []
+    overlap = len(delim) - 1
+    carry = ""
+    while chunk:
+        # A delimiter may start in the text read before this chunk
+        window = carry + chunk
+        carry = window[-overlap:] if overlap else ""
+        pending.append(chunk)
+        if delim in window:
+            parts = "".join(pending).split(delim)
+            pending = [parts.pop()]
+            yield from parts
+        chunk = source.read(read_size)
+    yield from "".join(pending).split(delim)
+
+
+def _chunks(records: Iterator[str], size: int) -> Iterator[List[str]]:
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def merge_stats(total: Dict, stats: Optional[Dict]):
+    for key, value in (stats or {}).items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            total[key] = total.get(key, 0) + value
+        else:
+            total[key] = value
+
+
+def is_linewise(block: Dict) -> bool:
+    if block["type"] == "json_path":
+        # One document per record
+        return block_params(block).get("inputMode") == "lines"
+    return block["type"] in LINEWISE
+
+
+def _call(index: int, block: Dict, lines: Iterable[str]) -> Dict:
+    res = TOOLS[block["type"]](lines, block_params(block))
+    if res.get("error"):
+        raise BlockFailed(index, error_message(res))
+    return res
+
+
+def _linewise(records: Iterator[str], index: int, block: Dict, stats: Dict, chunk_size: int) -> Iterator[str]:
+    # filter answers "no matches" with an '(empty)' placeholder, which only makes sense for the whole stream
+    placeholder = block["type"] == "filter"
+    produced = False
+    for chunk in _chunks(records, chunk_size):
+        res = _call(index, block, chunk)
+        merge_stats(stats, res.get("stats"))
+        if placeholder and not res["stats"]["matched"]:
+            continue
+        produced = True
+        yield from res["result"]
+    if not produced:
+        res = _call(index, block, [])
+        merge_stats(stats, res.get("stats"))
+        yield from res["result"]
+
+
+def _incremental(records: Iterator[str], index: int, block: Dict, stats: Dict) -> Iterator[str]:
+    res = _call(index, block, records)
+    stats.update(res.get("stats") or {})
+    yield from res["result"]
+
+
+def _streams_template(block: Dict) -> bool:
+    try:
+        return compile_template(block_params(block).get("tpl") or "")[2]
+    except Exception:
+        # Left to the barrier, which reports the error like run_chain
+        return False
+
+
+def _template(records: Iterator[str], index: int, block: Dict, stats: Dict) -> Iterator[str]:
+    try:
+        yield from render_lines(records, block_params(block).get("tpl") or "", stats)
+    except ValueError as e:
+        raise BlockFailed(index, str(e))
+
+
+def _sample(records: Iterator[str], index: int, block: Dict, stats: Dict) -> Iterator[str]:
+    try:
+        yield from sample_lines(records, block_params(block), stats)
+    except ValueError as e:
+        raise BlockFailed(index, str(e))
+
+
+def _compare_dataset(records: Iterator[str], index: int, block: Dict, stats: Dict, budget: int,
+                     temp_dir: Optional[str]) -> Iterator[str]:
+    # compare against a dataset index: only output lines from outside the dataset need deduplicating
+    params = block_params(block)
+    try:
+        dataset = open_index(params["dataset"], resolve_delimiter(params, "delimiter", "\n"))
+    except (DatasetError, OSError) as e:
+        raise BlockFailed(index, str(e))
+    operation = params.get("operation")
+    values = (value for value in map(str.strip, records) if value)
+    seen = bytearray(len(dataset))
+    buffer = None
+    try:
+        if operation == "common":
+            result = match_values(values, dataset, operation, seen)
+        else:
+            buffer = SpillBuffer(budget, temp_dir)
+            buffer.extend(match_values(values, dataset, operation, seen))
+            if buffer.spilled:
+                result = external_deduplicate(buffer, {})["result"]
+            else:
+                result = dict.fromkeys(buffer)
+            if operation != "diff":
+                result = chain_iterables(result, unmatched(dataset, seen))
+        count = 0
+        for record in result:
+            count += 1
+            yield record
+        stats["outputLines"] = count
+    finally:
+        if buffer is not None:
+            buffer.close()
+
+
+def _barrier(records: Iterator[str], index: int, block: Dict, stats: Dict, budget: int, temp_dir: Optional[str]) -> Iterator[str]:
+    buffer = SpillBuffer(budget, temp_dir)
+    try:
+        buffer.extend(records)
+        if buffer.spilled and block["type"] in SPILLED:
+            res = SPILLED[block["type"]](buffer, block_params(block))
+        else:
+            lines = list(buffer)
+            buffer.close()
+            res = _call(index, block, lines)
+        stats.update(res.get("stats") or {})
+        yield from res["result"]
+    finally:
+        buffer.close()
+
+
+def stream_records(chain: Dict, source: TextIO, emit: Callable[[str], None], memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                   temp_dir: Optional[str] = None, chunk_size: int = CHUNK_RECORDS) -> Dict:
+    """Like stream_chain, but hands each output record to ``emit`` instead of writing delimited text."""
+    blocks = chain["blocks"]
+    records = read_records(source, source_delimiter(blocks[0]))
+    report = []
+    for index, block in enumerate(blocks[1:]):
+        entry = {"type": block["type"], "stats": {}}
+        report.append(entry)
+        if is_linewise(block):
+            records = _linewise(records, index, block, entry["stats"], chunk_size)
+        elif block["type"] in INCREMENTAL:
+            records = _incremental(records, index, block, entry["stats"])
+        elif block["type"] == "template" and _streams_template(block):
+            records = _template(records, index, block, entry["stats"])
+        elif block["type"] == "shuffle" and block_params(block).get("mode") in SAMPLE_MODES:
+            records = _sample(records, index, block, entry["stats"])
+        elif block["type"] == "compare" and (block_params(block).get("dataset") or "").strip():
+            records = _compare_dataset(records, index, block, entry["stats"], memory_budget, temp_dir)
+        else:
+            records = _barrier(records, index, block, entry["stats"], memory_budget, temp_dir)
+
+    count = 0
+    try:
+        for record in records:
+            emit(record)
+            count += 1
+    except BlockFailed as e:
+        report = report[:e.index + 1]
+        report[-1] = {"type": report[-1]["type"], "error": e.message}
+        return {"lines": count, "blocks": report, "error": True}
+    return {"lines": count, "blocks": report, "error": False}
+
+
+def stream_chain(chain: Dict, source: TextIO, out: TextIO, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 temp_dir: Optional[str] = None, chunk_size: int = CHUNK_RECORDS) -> Dict:
+    """Runs a chain from ``source`` to ``out`` holding at most one chunk per line-wise block in memory.
+
+    Returns {'lines': n, 'blocks': [...], 'error': bool} with the same block report as run_chain.
+    When a block fails, output already written is left in place and the stats of earlier
+    blocks only cover the records that reached it; discard both when 'error' is set.
+    """
+    delim = final_delimiter(chain["settings"])
+    first = True
+
+    def write(record: str):
+        nonlocal first
+        if not first:
+            out.write(delim)
+        out.write(record)
+        first = False
+
+    return stream_records(chain, source, write, memory_budget, temp_dir, chunk_size)
@@ -0,0 +1,1020 @@
+"""Python ports of the deterministic tools from src/js/tools.js.
+
+Every tool takes ``(lines, params)`` and returns ``{'result': [...], 'stats': {...}}``
+(plus ``'error': True`` on failure), exactly like its JavaScript counterpart.
+User-facing messages use the English strings from lang-en.js.
+"""
+import re
+import sys
+import zlib
+import codecs
+import base64
+import hashlib
+import unicodedata
+from array import array
+from itertools import chain, repeat
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from . import datasets, jsonpath, jsonstream
+from .jsutil import (
+    js_number, js_parse_int, js_string, js_regex, js_replacement, json_parse, json_stringify,
+    mulberry32, keccak512, utf8_encode, utf16_units, js_key_order
+)
+
+Tool = Callable[[List[str], Dict[str, Any]], Dict[str, Any]]
+
+TOOLS: Dict[str, Tool] = {}
+DEFAULTS: Dict[str, Dict[str, Any]] = {}
+
+try:
+    import jinja2
+    from jinja2 import nodes as jinja_nodes
+    from jinja2.sandbox import ImmutableSandboxedEnvironment
+    from markupsafe import Markup
+except ImportError:  # the template tool then stays browser-only
+    jinja2 = None
+
+# Tools that only exist in the browser: they run user JS or call an LLM (and render nunjucks without jinja2)
+BROWSER_ONLY = {"js_function", "llm"} | (set() if jinja2 else {"template"})
+
+
+def tool(tool_id: str, **defaults):
+    """Registers a tool; keyword arguments are the default params from the JS definition."""
+    def register(fn: Tool) -> Tool:
+        TOOLS[tool_id] = fn
+        DEFAULTS[tool_id] = defaults
+        return fn
+    return register
+
+
+def resolve_delimiter(params: Dict, id: str = "delimiter", default: str = "\n") -> str:
+    val = params.get(id, default)
+    if val == "custom":
+        val = params.get(id + "Custom") or ""
+    if val == "\\n":
+        return "\n"
+    return val or default
+
+
+def _join_delim(params: Dict) -> str:
+    value = params.get("joinDelim")
+    return "\n" if value == "\\n" else (value or "")
+
+
+# --- Search and clean ---
+
+def pattern_list(value: str) -> List[str]:
+    """One pattern (or query) per line of a multi-line param; blank lines are ignored."""
+    return [p for p in value.split("\n") if p]
+
+
+@tool("regex", pattern="\\d+", replacement="", caseInsensitive=False, onlyMatched=False)
+def regex(lines: List[str], params: Dict) -> Dict:
+    # A lone pattern typed in the textarea often ends with a newline
+    patterns = pattern_list(params.get("pattern") or "")
+    if not patterns:
+        return {"result": lines, "stats": {"msg": "Empty pattern"}}
+    if len(patterns) > 1:
+        return _regex_multi(lines, patterns, params)
+    try:
+        pattern = js_regex(patterns[0], params.get("caseInsensitive"))
+    except re.error as e:
+        return {"result": [str(e)], "error": True}
+
+    replacement = params.get("replacement") or ""
+    repl = js_replacement(replacement, pattern.groups)
+    count = 0
+    result = []
+    if params.get("onlyMatched"):
+        for line in lines:
+            parts = []
+            for m in pattern.finditer(line):
+                count += 1
+                parts.append(pattern.sub(repl, m.group(0), count=1) if replacement else m.group(0))
+            result.append("".join(parts))
+    else:
+        for line in lines:
+            new, n = pattern.subn(repl, line)
+            count += n
+            result.append(new)
+    return {"result": result, "stats": {"matches": count}}
+
+
+def _next_match(line: str, patterns: List["re.Pattern"], found: List[Any], pos: int):
+    """Leftmost match at or after pos among all patterns; the earlier pattern wins a tie, as in an alternation."""
+    best = None
+    index = 0
+    for i, m in enumerate(found):
+        if m is not None and m.start() < pos:
+            m = found[i] = patterns[i].search(line, pos)
+        if m is not None and (best is None or m.start() < best.start()):
+            best, index = m, i
+    return best, index
+
+
+def _regex_multi(lines: List[str], sources: List[str], params: Dict) -> Dict:
+    # One pass per line: every pattern keeps its next match, so none rescans text already replaced.
+    # Python's backtracking engine runs one combined alternation slower than the patterns on their own.
+    try:
+        patterns = [js_regex(p, params.get("caseInsensitive")) for p in sources]
+    except re.error as e:
+        return {"result": [str(e)], "error": True}
+
+    replacement = params.get("replacement") or ""
+    expand = [js_replacement(replacement, p.groups) for p in patterns]
+    only_matched = params.get("onlyMatched")
+    count = 0
+    result = []
+    for line in lines:
+        found = [p.search(line) for p in patterns]
+        parts = []
+        last = pos = 0
+        while pos <= len(line):
+            m, i = _next_match(line, patterns, found, pos)
+            if m is None:
+                break
+            count += 1
+            if only_matched:
+                parts.append(expand[i](m) if replacement else m.group(0))
+            else:
+                parts += [line[last:m.start()], expand[i](m)]
+            last = m.end()
+            # An empty match moves on by one character, like lastIndex in JS
+            pos = last + (m.end() == m.start())
+        if not only_matched:
+            parts.append(line[last:])
+        result.append("".join(parts))
+    return {"result": result, "stats": {"matches": count}}
+
+
+_AI_DASHES = re.compile("[—–]")
+_AI_QUOTES = re.compile("[«»„“]")
+_AI_ALLOWED = re.compile(r"""[^a-zA-Zа-яА-ЯёЁ0-9\s!"#$%&'()*+,\-./:;<=>?@\[\\\]^_`{|}~]""")
+
+
+@tool("ai_cleaner", replaceStr="")
+def ai_cleaner(lines: List[str], params: Dict) -> Dict:
+    replace_str = params.get("replaceStr") or ""
+
+    def replace(m):
+        # Without the 'u' flag JS matches (and replaces) each surrogate half of an astral character
+        return replace_str * 2 if ord(m.group(0)) > 0xFFFF else replace_str
+
+    removed = 0
+    result = []
+    for line in lines:
+        t = _AI_QUOTES.sub('"', _AI_DASHES.sub("-", line))
+        cleaned = _AI_ALLOWED.sub(replace, t)
+        removed += utf16_units(t) - utf16_units(cleaned)
+        result.append(cleaned)
+    return {"result": result, "stats": {"removed": removed}}
+
+
+# --- Remove and filter ---
+
+@tool("deduplicate", trim=True)
+def deduplicate(lines: List[str], params: Dict) -> Dict:
+    unique = {}
+    for item in lines:
+        val = item.strip() if params.get("trim") else item
+        if val and val not in unique:
+            unique[val] = None
+    return {
+        "result": list(unique),
+        "stats": {"original": len(lines), "unique": len(unique), "removed": len(lines) - len(unique)}
+    }
+
+
+def duplicate_line(value: str, count: int, params: Dict) -> str:
+    return f"{value} ({count})" if params.get("showCounts") else value
+
+
+@tool("duplicates", showCounts=True)
+def duplicates(lines: List[str], params: Dict) -> Dict:
+    counts: Dict[str, int] = {}
+    for line in lines:
+        item = line.strip()
+        if item:
+            counts[item] = counts.get(item, 0) + 1
+
+    # Object.entries() lists integer-like keys first
+    result = [duplicate_line(k, v, params) for k, v in js_key_order(list(counts.items())).items() if v > 1]
+    if not result:
+        return {"result": ["(No duplicates)"], "stats": {"duplicates": 0}}
+    return {"result": result, "stats": {"duplicates": len(result)}}
+
+
+@tool("filter", query="", mode="contains")
+def filter_lines(lines: List[str], params: Dict) -> Dict:
+    queries = [q.lower() for q in pattern_list(params.get("query") or "")]
+    if len(queries) > 1:
+        return _filter_multi(lines, queries, params.get("mode"))
+    q = queries[0] if queries else ""
+    mode = params.get("mode")
+    if mode == "contains":
+        res = [item for item in lines if q in item.lower()]
+    elif mode == "not_contains":
+        res = [item for item in lines if q not in item.lower()]
+    elif mode == "starts":
+        res = [item for item in lines if item.lower().startswith(q)]
+    elif mode == "ends":
+        res = [item for item in lines if item.lower().endswith(q)]
+    else:
+        res = list(lines)
+    return {"result": res if res else ["(empty)"], "stats": {"matched": len(res), "removed": len(lines) - len(res)}}
+
+
+@lru_cache(maxsize=64)
+def _any_literal(queries: Tuple[str, ...]) -> "re.Pattern":
+    # Longest first, so that the engine's literal prefix checks fail as early as possible
+    return re.compile("|".join(map(re.escape, sorted(queries, key=len, reverse=True))))
+
+
+def _filter_multi(lines: List[str], queries: List[str], mode: str) -> Dict:
+    """Keeps lines matching any of the queries, checking all of them in one pass per line."""
+    if mode in ("contains", "not_contains"):
+        search = _any_literal(tuple(queries)).search
+        keep = mode == "contains"
+        res = [item for item in lines if (search(item.lower()) is not None) == keep]
+    elif mode == "starts":
+        prefixes = tuple(queries)
+        res = [item for item in lines if item.lower().startswith(prefixes)]
+    elif mode == "ends":
+        suffixes = tuple(queries)
+        res = [item for item in lines if item.lower().endswith(suffixes)]
+    else:
+        res = list(lines)
+    return {"result": res if res else ["(empty)"], "stats": {"matched": len(res), "removed": len(lines) - len(res)}}
+
+
+# --- Order and compare ---
+
+try:
+    import icu  # PyICU: the same collation data browsers use for localeCompare
+except ImportError:
+    icu = None
+
+_NUMBER_RUN = re.compile(r"[0-9]+|[^0-9]")
+
+
+def _strip_accents(s: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFD", s) if not unicodedata.combining(c))
+
+
+# Root collation order of common punctuation and symbols (they all sort before digits and letters)
+_SYMBOL_ORDER = {c: chr(i) for i, c in enumerate("\t \xa0_-–—,;:!?.'\"«»()[]{}@*/\\&#%`^+<=>|~$£€")}
+
+
+def _char_class(c: str) -> str:
+    if c.isdigit():
+        return "\x01"
+    if c.isalpha():
+        return "\x02"
+    return "\x00" + _SYMBOL_ORDER.get(c, chr(len(_SYMBOL_ORDER)))
+
+
+def _primary(s: str, numeric: bool) -> str:
+    if not numeric:
+        return "".join(_char_class(c) + c for c in s)
+    out = []
+    for token in _NUMBER_RUN.findall(s):
+        if token[0] in "0123456789":
+            digits = token.lstrip("0") or "0"
+            out.append("\x01" + chr(len(digits)) + digits)
+        else:
+            out.append(_char_class(token) + token)
+    return "".join(out)
+
+
+def collation_key(case_insensitive: bool, numeric: bool, locale: str = "en") -> Callable[[str], Any]:
+    """Sort key for localeCompare(a, b, locale, {numeric, sensitivity: 'accent' | 'variant'}).
+
+    Exact with PyICU installed; otherwise approximated: base letters first, then accents,
+    then case (lower before upper).
+    """
+    if icu is not None:
+        collator = icu.Collator.createInstance(icu.Locale(locale))
+        collator.setStrength(icu.Collator.SECONDARY if case_insensitive else icu.Collator.TERTIARY)
+        if numeric:
+            collator.setAttribute(icu.UCollAttribute.NUMERIC_COLLATION, icu.UCollAttributeValue.ON)
+        return collator.getSortKey
+
+    def text_key(s: str) -> Any:
+        folded = s.casefold()
+        primary = _primary(_strip_accents(folded), numeric)
+        if case_insensitive:
+            return (primary, unicodedata.normalize("NFD", folded))
+        return (primary, unicodedata.normalize("NFD", folded), s.swapcase())
+    return text_key
+
+
+def sort_order(params: Dict) -> Tuple[Callable[[str], Any], bool]:
+    """(text key, reverse) for the sort tool's params."""
+    key = collation_key(bool(params.get("caseInsensitive")), params.get("mode") == "smart")
+    return key, params.get("direction") != "asc"
+
+
+def sort_partitioned(lines: List[str], params: Dict) -> Tuple[List[str], List[str]]:
+    """The sort tool's order as (numbers, texts); numbers is empty unless mode is numeric."""
+    items = [x for x in lines if x.strip()]
+    key, reverse = sort_order(params)
+    if params.get("mode") != "numeric":
+        items.sort(key=key, reverse=reverse)
+        return [], items
+
+    # Numbers always come first, ordered by value; the rest is compared as text
+    numbers, texts = [], []
+    for item in items:
+        n = js_number(item.strip())
+        (numbers if n is not None else texts).append((n, item))
+    numbers.sort(key=lambda x: x[0], reverse=reverse)
+    texts.sort(key=lambda x: key(x[1]), reverse=reverse)
+    return [item for _, item in numbers], [item for _, item in texts]
+
+
+@tool("sort", mode="text", direction="asc", caseInsensitive=False)
+def sort(lines: List[str], params: Dict) -> Dict:
+    numbers, texts = sort_partitioned(lines, params)
+    return {"result": numbers + texts, "stats": {}}
+
+
+@tool("reverse")
+def reverse(lines: List[str], params: Dict) -> Dict:
+    return {"result": lines[::-1], "stats": {}}
+
+
+@tool("compare", list2="", delimiter="\\n", operation="common", dataset="")
+def compare(lines: List[str], params: Dict) -> Dict:
+    delim = resolve_delimiter(params, "delimiter", "\n")
+    if (params.get("dataset") or "").strip():
+        # The second list is a file on disk instead of list2
+        try:
+            index = datasets.open_index(params["dataset"], delim)
+        except (datasets.DatasetError, OSError) as e:
+            return {"result": [str(e)], "error": True}
+        values = (x for x in (line.strip() for line in lines) if x)
+        result = list(datasets.compare_index(values, index, params.get("operation")))
+        return {"result": result, "stats": {"outputLines": len(result)}}
+
+    set_a = dict.fromkeys(x for x in (line.strip() for line in lines) if x)
+    set_b = dict.fromkeys(x for x in (item.strip() for item in (params.get("list2") or "").split(delim)) if x)
+
+    operation = params.get("operation")
+    if operation == "common":
+        result = [x for x in set_a if x in set_b]
+    elif operation == "diff":
+        result = [x for x in set_a if x not in set_b]
+    else:
+        result = [f"[=] {x}" if x in set_b else f"[-] {x}" for x in set_a]
+        result += [f"[+] {x}" for x in set_b if x not in set_a]
+    return {"result": result, "stats": {"outputLines": len(result)}}
+
+
+SAMPLE_MODES = {"sample", "stratified"}
+
+
+def sample_size(value: Any) -> Tuple[Optional[int], Optional[float]]:
+    """(count, fraction) of a sample size given as "N" lines or "P%"."""
+    text = str(value or "").strip()
+    number = text[:-1].strip() if text.endswith("%") else text
+    n = js_number(number) if number else None
+    if text.endswith("%"):
+        if n is None or not 0 <= n <= 100:
+            raise ValueError(f"Invalid sample size: {value}")
+        return None, n / 100
+    if n is None or n < 0 or not float(n).is_integer():
+        raise ValueError(f"Invalid sample size: {value}")
+    return int(n), None
+
+
+def _stratum_key(params: Dict) -> Callable[[str], str]:
+    try:
+        pattern = js_regex(params.get("keyPattern") or "")
+    except re.error as e:
+        raise ValueError(str(e))
+
+    def key(line: str) -> str:
+        # The first group if the pattern has one, else the whole match; lines without a match share ''
+        m = pattern.search(line)
+        return "" if m is None else (m.group(1) or "" if pattern.groups else m.group(0))
+    return key
+
+
+def sample_lines(lines: Iterable[str], params: Dict, stats: Dict) -> Iterator[str]:
+    """Seeded sample of ``lines`` in input order, holding only the sample in memory.
+
+    A count keeps a reservoir of that many lines (per key of ``keyPattern`` in stratified
+    mode); a percentage keeps each line with that probability. Sets stats['total'] and
+    stats['sampled'] (and stats['strata'] for stratified counts). Raises ValueError for an
+    invalid size or key pattern.
+    """
+    count, fraction = sample_size(params.get("size"))
+    random = mulberry32(js_parse_int(params.get("seed")) or 0)
+    # Checked for percentages too, which keep lines regardless of key, as the browser does
+    key = _stratum_key(params) if params.get("mode") == "stratified" else None
+    if fraction is not None:
+        total = sampled = 0
+        for line in lines:
+            total += 1
+            if random() < fraction:
+                sampled += 1
+                yield line
+        stats.update(total=total, sampled=sampled)
+        return
+
+    reservoirs: Dict[str, List[Tuple[int, str]]] = {}
+    seen: Dict[str, int] = {}
+    total = 0
+    for index, line in enumerate(lines):
+        total += 1
+        stratum = key(line) if key else ""
+        n = seen.get(stratum, 0)
+        seen[stratum] = n + 1
+        reservoir = reservoirs.setdefault(stratum, [])
+        if n < count:
+            reservoir.append((index, line))
+        else:
+            j = int(random() * (n + 1))
+            if j < count:
+                reservoir[j] = (index, line)
+    picked = sorted(chain.from_iterable(reservoirs.values()))
+    stats.update(total=total, sampled=len(picked))
+    if key:
+        stats["strata"] = len(seen)
+    for _, line in picked:
+        yield line
+
+
+@tool("shuffle", seed="", mode="shuffle", size="100", keyPattern="^\\S+")
+def shuffle(lines: List[str], params: Dict) -> Dict:
+    if params.get("mode") in SAMPLE_MODES:
+        stats: Dict = {}
+        try:
+            res = list(sample_lines(lines, params, stats))
+        except ValueError as e:
+            return {"result": [str(e)], "error": True}
+        return {"result": res, "stats": stats}
+    random = mulberry32(js_parse_int(params.get("seed")) or 0)
+    items = list(lines)
+    for i in range(len(items) - 1, 0, -1):
+        j = int(random() * (i + 1))
+        items[i], items[j] = items[j], items[i]
+    return {"result": items, "stats": {}}
+
+
+# --- Text transformation ---
+
+_CAP = re.compile(r"^\s*[A-Za-z0-9_]|[.!?]\s*[A-Za-z0-9_]")
+_WORD_START = re.compile(r"(?<![A-Za-z0-9_])[A-Za-z0-9_]")
+
+
+@tool("case", mode="lower")
+def case(lines: List[str], params: Dict) -> Dict:
+    mode = params.get("mode")
+    if mode == "upper":
+        res = [line.upper() for line in lines]
+    elif mode == "lower":
+        res = [line.lower() for line in lines]
+    elif mode == "cap":
+        res = [_CAP.sub(lambda m: m.group(0).upper(), line) for line in lines]
+    elif mode == "word":
+        res = [_WORD_START.sub(lambda m: m.group(0).upper(), line) for line in lines]
+    else:
+        res = list(lines)
+    return {"result": res, "stats": {}}
+
+
+@tool("wrapper", prefix="", suffix="")
+def wrapper(lines: List[str], params: Dict) -> Dict:
+    prefix = params.get("prefix") or ""
+    suffix = params.get("suffix") or ""
+    return {"result": [prefix + line + suffix for line in lines], "stats": {}}
+
+
+@tool("trim", mode="both")
+def trim(lines: List[str], params: Dict) -> Dict:
+    mode = params.get("mode")
+    strip = str.lstrip if mode == "left" else str.rstrip if mode == "right" else str.strip
+    res = [strip(line) for line in lines]
+    changed = sum(1 for old, new in zip(lines, res) if len(old) != len(new))
+    return {"result": res, "stats": {"lines_changed": changed}}
+
+
+@tool("add_line", startLine="", betweenLines="", endLine="")
+def add_line(lines: List[str], params: Dict) -> Dict:
+    start = params.get("startLine") or ""
+    between = params.get("betweenLines") or ""
+    end = params.get("endLine") or ""
+    res = [start] if start != "" else []
+    for i, line in enumerate(lines):
+        res.append(line)
+        if i < len(lines) - 1 and between != "":
+            res.append(between)
+    if end != "":
+        res.append(end)
+    return {"result": res, "stats": {}}
+
+
+# --- Templates ---
+
+# nunjucks' escape map; markupsafe writes quotes differently and leaves backslashes alone
+_NUNJUCKS_ESCAPES = str.maketrans({"&": "&amp;", '"': "&quot;", "'": "&#39;", "<": "&lt;", ">": "&gt;", "\\": "&#92;"})
+
+TEMPLATE_CACHE_SIZE = 64
+
+
+def _template_output(value: Any) -> str:
+    # Like nunjucks' default environment: autoescaped, empty for null/undefined, JS String() otherwise
+    if value is None or isinstance(value, jinja2.Undefined):
+        return ""
+    if isinstance(value, Markup):
+        return value
+    return (value if isinstance(value, str) else js_string(value)).translate(_NUNJUCKS_ESCAPES)
+
+
+def _template_getattr(env: "jinja2.Environment", obj: Any, attribute: str) -> Any:
+    # JS `.length` of the lines list and of strings (in UTF-16 units, like the browser)
+    if attribute == "length" and isinstance(obj, (str, list, tuple)):
+        return len(obj) if not isinstance(obj, str) or obj.isascii() else utf16_units(obj)
+    return ImmutableSandboxedEnvironment.getattr(env, obj, attribute)
+
+
+@lru_cache(maxsize=1)
+def _template_env() -> "jinja2.Environment":
+    # Templates come with chains (share links, AI agents), so they cannot reach Python internals
+    env = ImmutableSandboxedEnvironment(autoescape=False, finalize=_template_output, keep_trailing_newline=True)
+    env.getattr = partial(_template_getattr, env)
+    return env
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(source: str) -> Tuple[Any, bool, bool]:
+    """(compiled template, whether it reads ``body``, whether it reads ``lines`` once, in order).
+
+    Cached by source, so a chain run over many inputs parses and compiles its template once.
+    """
+    env = _template_env()
+    ast = env.parse(source)
+    names = [node.name for node in ast.find_all(jinja_nodes.Name) if node.ctx == "load"]
+    loops = [loop for loop in ast.find_all(jinja_nodes.For)
+             if isinstance(loop.iter, jinja_nodes.Name) and loop.iter.name == "lines"]
+    # One top-level {% for line in lines %} can take the records as they arrive
+    single_pass = (names.count("lines") == 1 and len(loops) == 1 and "body" not in names
+                   and not any(loops[0] in outer.find_all(jinja_nodes.For) for outer in ast.find_all(jinja_nodes.For)))
+    return env.from_string(ast), "body" in names, single_pass
+
+
+def _watched(lines: Iterable[str], failed: List[BaseException]) -> Iterator[str]:
+    try:
+        yield from lines
+    except Exception as e:
+        failed.append(e)
+        raise
+
+
+def render_lines(lines: Iterable[str], source: str, stats: Dict) -> Iterator[str]:
+    """Renders the template and yields its output split at newlines as it is produced.
+
+    ``lines`` is only read as an iterator when the template loops over it once; otherwise it
+    is listed first. ``body`` is only joined when the template uses it. Sets stats['length'].
+    Raises ValueError when the template does not compile or fails to render, for any reason
+    (also where nunjucks would coerce like JS, e.g. ``'a' + 1`` or ``1 / 0``).
+    """
+    try:
+        template, uses_body, single_pass = compile_template(source)
+    except Exception as e:
+        raise ValueError(str(e))
+    if not single_pass and not isinstance(lines, list):
+        lines = list(lines)
+    failed: List[BaseException] = []
+    if not isinstance(lines, list):
+        lines = _watched(lines, failed)
+    context = {"lines": lines}
+    if uses_body:
+        context["body"] = "\n".join(lines)
+    length = 0
+    pending = ""
+    try:
+        for chunk in template.generate(context):
+            length += len(chunk) if chunk.isascii() else utf16_units(chunk)
+            if "\n" not in chunk:
+                pending += chunk
+                continue
+            parts = chunk.split("\n")
+            parts[0] = pending + parts[0]
+            pending = parts.pop()
+            yield from parts
+    except Exception as e:
+        if failed and e is failed[0]:
+            # Raised by whatever produces the lines, not by the template
+            raise
+        # Like the browser's catch (e): any failure of the template is its error, not the runner's
+        raise ValueError(str(e) or type(e).__name__)
+    yield pending
+    stats["length"] = length
+
+
+@tool("template", tpl="{% for line in lines %}\n- {{ line }}\n{% endfor %}")
+def template(lines: List[str], params: Dict) -> Dict:
+    stats: Dict = {}
+    try:
+        res = list(render_lines(lines, params.get("tpl") or "", stats))
+    except ValueError as e:
+        return {"result": [str(e)], "error": True}
+    return {"result": res, "stats": stats}
+
+
+@tool("debug_view", showSpaces=True, showTabs=True, showLineNumbers=False)
+def debug_view(lines: List[str], params: Dict) -> Dict:
+    # The browser renders an HTML preview; headless runs only pass the lines through
+    return {"result": lines, "stats": {}}
+
+
+# --- Formats ---
+
+@tool("csv", delimiter=";", template="$1 - $2", skipHeader=False)
+def csv(lines: List[str], params: Dict) -> Dict:
+    delim = resolve_delimiter(params, "delimiter", ";")
+    valid = [line for line in lines if line.strip()]
+    template = params.get("template") or ""
+
+    res = []
+    for line in valid[1 if params.get("skipHeader") else 0:]:
+        cols = line.split(delim)
+
+        def column(m, cols=cols):
+            idx = int(m.group(1)) - 1
+            return cols[idx].strip() if 0 <= idx < len(cols) else ""
+
+        res.append(re.sub(r"\$(\d+)", column, template))
+    return {"result": res, "stats": {"rows": len(res)}}
+
+
+def _indent(params: Dict) -> Any:
+    return {"4": 4, "tab": "\t", "0": 0}.get(params.get("indent"), 2)
+
+
+@tool("json_format", indent="2", joinDelim="\\n")
+def json_format(lines: Iterable[str], params: Dict) -> Dict:
+    # Any iterable: the text is decoded as it is read, without joining it first
+    delim = _join_delim(params)
+    records = iter(lines)
+    head, blank = jsonstream.blank_head(records, delim)
+    if blank:
+        return {"result": head, "stats": {"msg": "Empty input"}}
+    try:
+        res = list(jsonstream.format_lines(jsonstream.joined(chain(head, records), delim), _indent(params)))
+    except ValueError as e:
+        return {"result": [str(e)], "error": True}
+    return {"result": res, "stats": {"lines": len(res)}}
+
+
+@tool("json_path", query="$.*", inputMode="combined", joinDelim="\\n", stringify=True)
+def json_path(lines: Iterable[str], params: Dict) -> Dict:
+    def stringify_item(item: Any) -> str:
+        if isinstance(item, (dict, list)) and params.get("stringify"):
+            return json_stringify(item)
+        return js_string(item)
+
+    try:
+        steps = jsonpath.parse(params.get("query") or "$.*")
+    except jsonpath.JSONPathError as e:
+        return {"result": [f"JSONPath error: {e}"], "error": True}
+
+    try:
+        if params.get("inputMode") == "lines":
+            res = []
+            errors = 0
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    res += [stringify_item(item) for item in jsonpath.evaluate(steps, json_parse(line))]
+                except ValueError:
+                    errors += 1
+            stats = {"items": len(res)}
+            if errors > 0:
+                stats["parse_errors"] = errors
+            return {"result": res, "stats": stats}
+
+        delim = _join_delim(params)
+        records = iter(lines)
+        head, blank = jsonstream.blank_head(records, delim)
+        if blank:
+            return {"result": head, "stats": {"msg": "Empty input"}}
+        try:
+            res = [stringify_item(item) for item in jsonstream.query(steps, jsonstream.joined(chain(head, records), delim))]
+        except jsonpath.JSONPathError:
+            raise
+        except ValueError as e:
+            return {"result": [f"JSON parse error: {e}"], "error": True}
+        return {"result": res, "stats": {"items": len(res)}}
+    except jsonpath.JSONPathError as e:
+        return {"result": [f"JSONPath error: {e}"], "error": True}
+
+
+@tool("join", prefix="", delimiter=", ", lastDelimiter=" and ", suffix="")
+def join(lines: List[str], params: Dict) -> Dict:
+    if not lines:
+        return {"result": [""], "stats": {"count": 0}}
+    prefix = params.get("prefix") or ""
+    suffix = params.get("suffix") or ""
+    last = " and " if params.get("lastDelimiter") == " and " else resolve_delimiter(params, "lastDelimiter", "")
+    if len(lines) == 1:
+        return {"result": [prefix + lines[0] + suffix], "stats": {}}
+    head = resolve_delimiter(params, "delimiter", "").join(lines[:-1])
+    return {"result": [prefix + head + last + lines[-1] + suffix], "stats": {}}
+
+
+@tool("split", delimiter=",")
+def split(lines: List[str], params: Dict) -> Dict:
+    delim = resolve_delimiter(params, "delimiter", ",")
+    res = [part for line in lines for part in line.split(delim)]
+    return {"result": res, "stats": {"count": len(res)}}
+
+
+# --- Encoding ---
+
+_ATOB_ALPHABET = re.compile(r"[A-Za-z0-9+/]*")
+_URI_ESCAPES = re.compile(r"(?:%[0-9A-Fa-f]{2})+")
+_ATOB_ERROR = "Failed to execute 'atob' on 'Window': The string to be decoded is not correctly encoded."
+
+
+def _utf8_strict(s: str) -> bytes:
+    try:
+        return s.encode("utf-8")
+    except UnicodeEncodeError:
+        raise ValueError("URI malformed")
+
+
+def _atob(s: str) -> bytes:
+    s = re.sub(r"[\t\n\f\r ]", "", s)
+    if len(s) % 4 == 0 and s.endswith("="):
+        s = s[:-2] if s.endswith("==") else s[:-1]
+    if len(s) % 4 == 1 or not _ATOB_ALPHABET.fullmatch(s):
+        raise ValueError(_ATOB_ERROR)
+    return base64.b64decode(s + "=" * (-len(s) % 4))
+
+
+def _decode_uri_component(s: str) -> str:
+    if re.search(r"%(?![0-9A-Fa-f]{2})", s):
+        raise ValueError("URI malformed")
+
+    def decode(m):
+        try:
+            return bytes.fromhex(m.group(0).replace("%", "")).decode("utf-8")
+        except UnicodeDecodeError:
+            raise ValueError("URI malformed")
+
+    return _URI_ESCAPES.sub(decode, s)
+
+
+_ENCODERS: Dict[str, Callable[[str], str]] = {
+    "b64encode": lambda line: base64.b64encode(_utf8_strict(line)).decode("ascii"),
+    "b64decode": lambda line: _atob(line).decode("utf-8"),
+    "urlencode": lambda line: quote(_utf8_strict(line), safe="-_.!~*'()"),
+    "urldecode": _decode_uri_component,
+}
+
+
+@tool("encode", mode="b64encode")
+def encode(lines: List[str], params: Dict) -> Dict:
+    convert = _ENCODERS.get(params.get("mode"))
+    errors = 0
+    res = []
+    for line in lines:
+        if not line or convert is None:
+            res.append(line)
+            continue
+        try:
+            res.append(convert(line))
+        except UnicodeDecodeError:
+            errors += 1
+            res.append("[Error: URI malformed]")
+        except ValueError as e:
+            errors += 1
+            res.append(f"[Error: {e}]")
+    return {"result": res, "stats": {"errors": errors} if errors > 0 else {}}
+
+
+def _crc32(line: str) -> str:
+    return "%08x" % zlib.crc32(utf8_encode(line))
+
+
+def _hash_constructor(name: str) -> Callable[[bytes], Any]:
+    # hashlib.new() looks the algorithm up on every call
+    return getattr(hashlib, name, None) or partial(hashlib.new, name)
+
+
+def _digest(name: str) -> Callable[[str], str]:
+    new = _hash_constructor(name)
+
+    def digest(line: str) -> str:
+        # CryptoJS parses the string as UTF-8 through encodeURIComponent
+        return new(_utf8_strict(line)).hexdigest()
+    return digest
+
+
+def _digest_batch(name: str) -> Callable[[List[str]], List[str]]:
+    new = _hash_constructor(name)
+
+    def digest(lines: List[str]) -> List[str]:
+        return [h.hexdigest() for h in map(new, map(str.encode, lines))]
+    return digest
+
+
+HASHERS: Dict[str, Callable[[str], str]] = {
+    "crc32": _crc32,
+    "md5": _digest("md5"),
+    "sha1": _digest("sha1"),
+    "sha224": _digest("sha224"),
+    "sha256": _digest("sha256"),
+    "sha384": _digest("sha384"),
+    "sha512": _digest("sha512"),
+    "sha3": lambda line: keccak512(_utf8_strict(line)),
+    "ripemd160": _digest("ripemd160"),
+}
+
+def _crc32_batch(lines: List[str]) -> List[str]:
+    crcs = array("I", map(zlib.crc32, map(str.encode, lines, repeat("utf-8"), repeat("js_replace"))))
+    if not crcs:
+        return []
+    if sys.byteorder == "little":
+        crcs.byteswap()
+    # One hex() call for all of them, split into 8-digit groups
+    return crcs.tobytes().hex(" ", 4).split(" ")
+
+
+# Whole-list versions that stay in native code between lines
+BATCH_HASHERS: Dict[str, Callable[[List[str]], List[str]]] = {
+    "crc32": _crc32_batch,
+    **{name: _digest_batch(name) for name in ("md5", "sha1", "sha224", "sha256", "sha384", "sha512", "ripemd160")},
+}
+
+
+@tool("hash", algorithm="md5")
+def hash_lines(lines: List[str], params: Dict) -> Dict:
+    batch = BATCH_HASHERS.get(params.get("algorithm"))
+    if batch is not None:
+        try:
+            return {"result": batch(lines), "stats": {}}
+        except ValueError:
+            # Lone surrogates (or a hash missing from this OpenSSL): report them line by line
+            pass
+    hasher = HASHERS.get(params.get("algorithm"), lambda line: "")
+    errors = 0
+    res = []
+    for line in lines:
+        try:
+            res.append(hasher(line))
+        except ValueError as e:
+            errors += 1
+            res.append(f"[Error: {e}]")
+    return {"result": res, "stats": {"errors": errors} if errors > 0 else {}}
+
+
+# --- HEX ---
+
+_KOI8R = dict(zip(
+    "ёЁабвгдежзийклмнопрстуфхцчшщъыьэюяАБВГДЕЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ",
+    [0xa3, 0xb3] + list(bytes.fromhex(
+        "c1c2d7c7c4c5d6dac9cacbcccdcecfd0d2d3d4d5c6c8c3dedbdddfd9d8dcc0d1"
+        "e1e2f7e7e4e5f6fae9eaebecedeeeff0f2f3f4f5e6e8e3fefbfdfff9f8fce0f1"
+    ))
+))
+
+
+_WIN1251 = {**{chr(code): code - 0x0350 for code in range(0x0410, 0x0450)}, "Ё": 168, "ё": 184}
+_CP866 = {
+    **{chr(code): code - 0x0390 for code in range(0x0410, 0x0440)},
+    **{chr(code): code - 0x0360 for code in range(0x0440, 0x0450)},
+    "Ё": 0xf0, "ё": 0xf1,
+}
+
+# charCodeAt() sees an astral character as two surrogate halves, each mapped to '?'
+codecs.register_error("js_single_byte", lambda e: (
+    b"".join(b"??" if ord(c) > 0xFFFF else b"?" for c in e.object[e.start:e.end]), e.end
+))
+
+
+def _single_byte_encoder(chars: Dict[str, int]) -> Callable[[str], bytes]:
+    """Encodes ASCII as is, ``chars`` with their byte and everything else as '?'."""
+    table = [chr(code) if code < 128 else "\ufffe" for code in range(256)]
+    for char, code in chars.items():
+        table[code] = char
+    encoding_map = codecs.charmap_build("".join(table))
+    return lambda s: codecs.charmap_encode(s, "js_single_byte", encoding_map)[0]
+
+
+HEX_ENCODERS: Dict[str, Callable[[str], bytes]] = {
+    "utf-8": utf8_encode,
+    "utf-16le": lambda s: s.encode("utf-16-le", "surrogatepass"),
+    "utf-16be": lambda s: s.encode("utf-16-be", "surrogatepass"),
+    "win1251": _single_byte_encoder(_WIN1251),
+    "koi8-r": _single_byte_encoder(_KOI8R),
+    "cp866": _single_byte_encoder(_CP866),
+}
+
+
+def hex_dump(data: bytes, uppercase: bool, show_ascii: bool) -> List[str]:
+    res = []
+    for i in range(0, len(data), 16):
+        chunk = data[i:i + 16]
+        parts = chunk.hex().upper() if uppercase else chunk.hex()
+        hex_str = "".join(parts[j * 2:j * 2 + 2] + ("  " if j == 7 else " ") for j in range(len(chunk)))
+        line = f"{i:08X}: {hex_str.ljust(50)}"
+        if show_ascii:
+            line += " |" + "".join(chr(b) if b >= 32 else "." for b in chunk) + "|"
+        res.append(line)
+    return res
+
+
+@tool("to_hex", encoding="utf-8", format="spaced", uppercase=True)
+def to_hex(lines: List[str], params: Dict) -> Dict:
+    encoder = HEX_ENCODERS.get(params.get("encoding"))
+    uppercase = bool(params.get("uppercase"))
+    fmt = params.get("format")
+    res = []
+    if encoder is None:
+        return {"result": res, "stats": {}}
+    if fmt in ("plain", "spaced"):
+        encoded = map(encoder, lines)
+        hexes = map(bytes.hex, encoded) if fmt == "plain" else (data.hex(" ") for data in encoded)
+        return {"result": [h.upper() for h in hexes] if uppercase else list(hexes), "stats": {}}
+    for line in lines:
+        data = encoder(line)
+        if fmt == "plain":
+            h = data.hex()
+            res.append(h.upper() if uppercase else h)
+        elif fmt == "spaced":
+            h = data.hex(" ")
+            res.append(h.upper() if uppercase else h)
+        else:
+            res += hex_dump(data, uppercase, fmt == "dump_ascii")
+    return {"result": res, "stats": {}}
+
+
+HEX_DECODERS = {
+    "utf-8": "utf-8",
+    "utf-16le": "utf-16-le",
+    "utf-16be": "utf-16-be",
+    "win1251": "cp1251",
+    "koi8-r": "koi8_r",
+    "cp866": "cp866",
+}
+
+
+# ASCII whitespace only: lines with other whitespace take the checked path of from_hex
+_ASCII_WHITESPACE = str.maketrans("", "", " \t\n\r\f\v")
+
+
+def _hex_bytes(lines: List[str]) -> Optional[bytes]:
+    """Decodes well-formed HEX lines in one bytes.fromhex() call; None when a line needs the checks of from_hex."""
+    parts = []
+    for line in lines:
+        if ":" in line:
+            line = line.split(":", 1)[1].split("|")[0]
+        hex_only = line.translate(_ASCII_WHITESPACE)
+        if len(hex_only) % 2:
+            return None
+        parts.append(hex_only)
+    try:
+        return bytes.fromhex("".join(parts))
+    except ValueError:
+        return None
+
+
+@tool("from_hex", encoding="utf-8")
+def from_hex(lines: List[str], params: Dict) -> Dict:
+    data = _hex_bytes(lines)
+    if data is None:
+        # Errors (reported with their line) or non-ASCII whitespace
+        data = bytearray()
+        for i, raw in enumerate(lines):
+            line = raw.strip()
+            if not line:
+                continue
+            h_part = line
+            if ":" in line:
+                h_part = line.split(":", 1)[1].split("|")[0]
+
+            invalid = re.findall(r"[^a-fA-F0-9\s]", h_part)
+            if invalid:
+                return {"result": f"Invalid characters detected in HEX data on line {i + 1}: {' '.join(dict.fromkeys(invalid))}", "error": True}
+
+            hex_only = re.sub(r"\s", "", h_part)
+            if len(hex_only) % 2:
+                return {"result": f"Incomplete byte (odd number of characters) on line {i + 1}", "error": True}
+            data += bytes.fromhex(hex_only)
+
+    if not data:
+        return {"result": 'HEX data not found. Supported formats: "xx yy zz", "xxyyzz" or dump "0000: xx yy zz |ascii|"', "error": True}
+
+    codec = HEX_DECODERS.get(params.get("encoding"))
+    decoded = bytes(data).decode(codec, "replace") if codec else ""
+    # TextDecoder drops a leading byte order mark
+    if codec in ("utf-8", "utf-16-le", "utf-16-be") and decoded.startswith("\ufeff"):
+        decoded = decoded[1:]
+    return {"result": decoded.split("\n"), "stats": {"bytes": len(data)}}
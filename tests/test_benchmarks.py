@@ -0,0 +1,22 @@
+from benchmarks import report
+from benchmarks.__main__ import parse_sizes
+
+
+def entry(name, seconds=None, **metrics):
+    return {"suite": "python", "name": name, "size": 1000, "seconds": seconds, **metrics}
+
+
+def test_compare_flags_slowdowns_over_threshold():
+    baseline = [entry("sort", 1.0), entry("trim", 1.0), {"suite": "proxy", "name": "proxy-json", "size": 8, "rps": 100}]
+    results = [entry("sort", 1.2), entry("trim", 1.05), entry("new", 1.0),
+               {"suite": "proxy", "name": "proxy-json", "size": 8, "rps": 80}]
+    rows = report.compare(results, baseline, threshold=10)
+
+    assert [(r["name"], r["metric"], r["regression"]) for r in rows] == [
+        ("sort", "seconds", True), ("trim", "seconds", False), ("proxy-json", "rps", True)
+    ]
+    assert "2 regression(s)" in report.format_report(rows, 10)
+
+
+def test_parse_sizes():
+    assert parse_sizes("10k,1k,1.5m,7") == [7, 1000, 10000, 1500000]
@@ -0,0 +1,121 @@
+import os
+import sys
+import json
+import time
+import types
+import asyncio
+import threading
+
+import pytest
+
+EX_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ex")
+FIELDS = ["Summary", "Issue Type", "Description"]
+
+
+class StubConfig:
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def get_context(self):
+        return ""
+
+    def get_gemini_config(self):
+        return {"api_key": "k", "model": "stub"}
+
+
+class StubModel:
+    """Answers prompts from a worker thread after a delay, recording how many run at once."""
+
+    def __init__(self, delay=lambda prompt: 0.02):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = self.peak = 0
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.prompts.append(prompt)
+        try:
+            time.sleep(self.delay(prompt))
+            if prompt.startswith("extract:"):
+                return "```json\n" + json.dumps({"Summary": prompt.split(":", 1)[1]}) + "\n```"
+            return f" reply to {prompt} "
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def gemini_client(monkeypatch):
+    # The Jira bot's own modules are not part of this repository
+    monkeypatch.setitem(sys.modules, "config", types.SimpleNamespace(Config=StubConfig))
+    monkeypatch.setitem(sys.modules, "gemini_transport", types.SimpleNamespace(GeminiTransport=lambda **kwargs: None))
+    monkeypatch.setitem(sys.modules, "fields_schema", types.SimpleNamespace(get_field_names=lambda: FIELDS))
+    monkeypatch.syspath_prepend(EX_DIR)
+    monkeypatch.delitem(sys.modules, "gemini_client", raising=False)
+    import gemini_client
+    yield gemini_client
+    sys.modules.pop("gemini_client", None)
+
+
+def make_client(module, model, config=None, **kwargs):
+    client = module.GeminiClient(config or StubConfig({"gemini.extract_prompt": "extract:{user_input}"}), **kwargs)
+    client.transport = model
+    return client
+
+
+def test_batch_keeps_input_order_within_the_concurrency_limit(gemini_client):
+    # Earlier inputs answer last, so completion order differs from input order
+    model = StubModel(lambda prompt: 0.05 if "item0" in prompt else 0.01)
+    client = make_client(gemini_client, model, max_concurrency=2)
+    inputs = [f"item{i}" for i in range(6)]
+
+    results = asyncio.run(client.process_batch(inputs, required_fields=["Issue Type"], concurrency=4))
+
+    assert [r["fields"]["Summary"] for r in results] == inputs
+    assert [r["missing_fields"] for r in results] == [["Issue Type"]] * 6
+    assert results[0]["description"] == "reply to " + client._description_prompt(results[0]["fields"], "item0").strip()
+    assert model.peak == 2 and len(model.prompts) == 6 * 4
+
+
+def test_async_calls_fall_back_like_the_sync_ones(gemini_client):
+    class Broken:
+        def generate_content(self, prompt):
+            if prompt.startswith("extract:"):
+                return "not json"
+            raise RuntimeError("down")
+
+    client = make_client(gemini_client, Broken())
+    fields = {"Summary": "kept"}
+    assert asyncio.run(client.extract_fields_async("x")) == client.extract_fields("x") == dict.fromkeys(FIELDS)
+    assert asyncio.run(client.generate_summary_async(fields)) == client.generate_summary(fields) == "kept"
+    assert asyncio.run(client.ask_clarification_async(["A", "B"], "x")) == "Please provide information for: A, B"
+
+
+def test_semaphore_is_made_per_event_loop(gemini_client):
+    client = make_client(gemini_client, StubModel(), max_concurrency=1)
+    # A semaphore bound to a closed loop would fail in the second run
+    assert asyncio.run(client.generate_summary_async({})).startswith("reply to")
+    assert asyncio.run(client.generate_summary_async({})).startswith("reply to")
+
+
+def test_templates_reload_when_the_config_file_changes(gemini_client, tmp_path):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("v1")
+    config = StubConfig({"gemini.summary_prompt": "first {issue_type}"})
+    model = StubModel(lambda prompt: 0)
+    client = make_client(gemini_client, model, config, config_path=str(config_file))
+    unwatched = make_client(gemini_client, model, config)
+
+    assert client.generate_summary({"Issue Type": "Bug"}) == "reply to first Bug"
+    config.values["gemini.summary_prompt"] = "second {issue_type}"
+    # Cached until the file changes; without a file every call reads config
+    assert client.generate_summary({"Issue Type": "Bug"}) == "reply to first Bug"
+    assert unwatched.generate_summary({"Issue Type": "Bug"}) == "reply to second Bug"
+    os.utime(config_file, ns=(0, time.time_ns() + 10 ** 9))
+    assert client.generate_summary({"Issue Type": "Bug"}) == "reply to second Bug"
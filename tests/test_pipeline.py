@@ -0,0 +1,411 @@
+import io
+import json
+import base64
+
+import pytest
+
+from stringlom import ChainError, SpillBuffer, load_chain, run_chain, format_output, stream_chain, parallel_chain
+from stringlom import chainformat, datasets, external, jsonpath, jsonstream, stream as stream_module, TOOLS
+from stringlom.stream import read_records
+from stringlom.store import ChainStore
+from stringlom.__main__ import main
+from stringlom.jsutil import mulberry32, keccak512, js_string, json_parse, json_stringify
+
+
+def make_chain(*blocks, **settings):
+    return {
+        "blocks": [{"type": "source", "params": {"delimiter": "\\n"}}] + [
+            {"type": t, "params": p, "manualRun": False} for t, p in blocks
+        ],
+        "settings": settings
+    }
+
+
+def test_regex_dedup_and_sort():
+    chain = load_chain(make_chain(
+        ("regex", {"pattern": "(\\w+)@(\\w+)", "replacement": "$2:$1"}),
+        ("deduplicate", {"trim": True}),
+        ("sort", {"mode": "text", "direction": "asc"})
+    ))
+    res = run_chain(chain, "bob@b\nann@a\nbob@b \nann@a")
+
+    assert res["result"] == ["a:ann", "b:bob"]
+    assert res["blocks"][0]["stats"]["matches"] == 4
+    assert res["blocks"][1]["stats"]["removed"] == 2
+
+
+def test_shuffle_matches_browser_prng():
+    rand = mulberry32(42)
+    assert [rand() for _ in range(3)] == [0.6011037519201636, 0.44829055899754167, 0.8524657934904099]
+
+
+def test_sha3_is_keccak_like_cryptojs():
+    assert keccak512(b"abc").startswith("18587dc2ea106b9a")
+
+
+def test_share_payload_and_final_delimiter():
+    payload = base64.b64encode(json.dumps(make_chain(
+        ("case", {"mode": "upper"}), finalDelimiter="custom", finalCustomDelimiter="|"
+    )).encode()).decode()
+    chain = load_chain(f"http://localhost:8000/?chain={payload}")
+
+    assert format_output(chain, run_chain(chain, "a\nb")["result"]) == "A|B"
+
+
+def test_binary_share_links_and_chain_store(tmp_path, capsys):
+    config = make_chain(("regex", {"pattern": "ё(\\d+)", "replacement": "$1"}), ("case", {"mode": "upper"}),
+                        finalDelimiter="custom", finalCustomDelimiter="|")
+    config["blocks"][1]["manualRun"] = True
+    value = chainformat.to_link_value(config)
+    assert chainformat.is_binary_link_value(value) and not chainformat.is_binary_link_value(
+        base64.b64encode(json.dumps(config).encode()).decode()
+    )
+    chain = load_chain(f"http://localhost:8000/?chain={value}")
+    assert chain["blocks"][1:] == config["blocks"][1:] and chain["settings"] == config["settings"]
+    with pytest.raises(ChainError, match="version 2"):
+        load_chain(base64.urlsafe_b64encode(b"\x02" + chainformat.encode_chain(config)[1:]).decode())
+
+    store = ChainStore(str(tmp_path / "chains.sqlite"))
+    first = store.save(config, "emails")
+    second = store.save(make_chain(("trim", {})), "trim")
+    assert store.save(make_chain(("reverse", {})), "emails") == first
+    assert [item["name"] for item in store.list()] == ["emails", "trim"]
+    assert store.load(second)["blocks"][1]["type"] == "trim"
+    assert store.delete(second) and store.load("trim") is None
+    store.close()
+
+    input_file = tmp_path / "in.txt"
+    input_file.write_text("b\na")
+    assert main(["emails", str(input_file), "--store", str(tmp_path / "chains.sqlite")]) == 0
+    assert capsys.readouterr().out == "a\nb"
+
+
+def test_browser_only_tools_are_rejected():
+    with pytest.raises(ChainError, match="browser"):
+        load_chain(make_chain(("llm", {})))
+
+
+def test_template_renders_like_nunjucks_and_streams(monkeypatch):
+    from stringlom.tools import compile_template
+
+    loop = "{% for line in lines %}\n- {{ line }}\n{% endfor %}"
+    res = run_chain(load_chain(make_chain(("template", {"tpl": loop}))), "a\n<b>")
+    assert res["result"] == ["", "- a", "", "- &lt;b&gt;", ""]
+    assert res["blocks"] == [{"type": "template", "stats": {"length": 18}}]
+    whole = run_chain(load_chain(make_chain(("template", {"tpl": "{{ body|upper }}|{{ lines|length }}|{{ x }}{{ true }}"}))), "a\nb")
+    assert whole["result"] == ["A", "B|2|true"]
+    assert compile_template(loop)[1:] == (False, True)
+    assert compile_template("{{ body }}")[1:] == (True, False)
+    assert compile_template(loop) is compile_template(loop)
+
+    rendered = []
+    real = stream_module.render_lines
+    monkeypatch.setattr(stream_module, "render_lines", lambda lines, *a: rendered.append(lines) or real(lines, *a))
+    text = "\n".join(f"r{i}" for i in range(100))
+    chain = make_chain(("template", {"tpl": loop}), ("filter", {"query": "r"}))
+    output, streamed = stream(chain, text, chunk_size=8)
+    expected = run_chain(load_chain(chain), text)
+    assert output == "\n".join(expected["result"]) and streamed["blocks"] == expected["blocks"]
+    # Records reach the template as they are read, not as a list
+    assert not isinstance(rendered[0], list)
+
+    unsafe = run_chain(load_chain(make_chain(("template", {"tpl": "{{ lines.__class__.__mro__ }}"}))), "a")
+    broken = run_chain(load_chain(make_chain(("template", {"tpl": "{% for %}"}))), "a")
+    assert unsafe["error"] and "unsafe" in unsafe["blocks"][0]["error"]
+    assert broken["error"]
+
+    counted = run_chain(load_chain(make_chain(("template", {"tpl": "{{ lines.length }}:{{ body.length }}"}))), "ab\nё😀")
+    assert counted["result"] == ["2:6"]
+    for tpl in ("{{ 'a' + 1 }}", "{{ 1 / 0 }}"):
+        failed = run_chain(load_chain(make_chain(("template", {"tpl": tpl}))), "a")
+        output, streamed = stream(make_chain(("template", {"tpl": tpl})), "a")
+        assert failed["error"] and streamed["error"] and streamed["blocks"] == failed["blocks"]
+    # A failure upstream of a streaming template stays that block's error
+    output, streamed = stream(make_chain(("regex", {"pattern": "("}), ("template", {"tpl": loop})), "a")
+    assert streamed["error"] and [b["type"] for b in streamed["blocks"]] == ["regex"]
+
+
+def test_failing_block_stops_the_chain():
+    res = run_chain(load_chain(make_chain(("json_format", {}), ("case", {}))), "{oops")
+    assert res["error"] and res["result"] == []
+    assert len(res["blocks"]) == 1 and "error" in res["blocks"][0]
+
+
+def test_cli_runs_chain_file(tmp_path, capsys):
+    chain_file = tmp_path / "chain.json"
+    chain_file.write_text(json.dumps(make_chain(("trim", {}), ("wrapper", {"prefix": "[", "suffix": "]"}))))
+    input_file = tmp_path / "in.txt"
+    input_file.write_text(" a \nb ")
+    output_file = tmp_path / "out.txt"
+
+    assert main([str(chain_file), str(input_file), "-o", str(output_file)]) == 0
+    assert output_file.read_text() == "[a]\n[b]"
+    assert main(["not-a-chain"]) == 2
+    assert "Invalid share payload" in capsys.readouterr().err
+
+
+def stream(chain, text, **kwargs):
+    out = io.StringIO()
+    res = stream_chain(load_chain(chain), io.StringIO(text), out, **kwargs)
+    return out.getvalue(), res
+
+
+def test_stream_matches_run_chain():
+    chain = make_chain(
+        ("trim", {}), ("filter", {"query": "a"}), ("case", {"mode": "upper"}),
+        ("shuffle", {"seed": "7"}), ("hash", {"algorithm": "crc32"})
+    )
+    text = "\n".join(f" a{i} " if i % 3 else f"b{i}" for i in range(200))
+    expected = run_chain(load_chain(chain), text)
+
+    output, res = stream(chain, text, memory_budget=100, chunk_size=16)
+    assert output == "\n".join(expected["result"])
+    assert res["blocks"] == expected["blocks"]
+    assert res["lines"] == len(expected["result"])
+
+
+def test_stream_filter_placeholder_only_for_whole_input():
+    output, res = stream(make_chain(("filter", {"query": "zzz"})), "a\nb\nc", chunk_size=1)
+    assert output == "(empty)"
+    assert res["blocks"][0]["stats"] == {"matched": 0, "removed": 3}
+
+
+def test_stream_reports_failing_block():
+    output, res = stream(make_chain(("case", {}), ("regex", {"pattern": "("})), "a")
+    assert res["error"] and output == ""
+    assert res["blocks"][-1]["type"] == "regex" and "error" in res["blocks"][-1]
+
+
+def test_spill_buffer_moves_to_disk():
+    buffer = SpillBuffer(budget=10)
+    buffer.extend(["short", "ё\nmulti\nline", "😀", ""])
+    assert buffer.spilled
+    assert list(buffer) == ["short", "ё\nmulti\nline", "😀", ""]
+    assert buffer[2] == "😀" and len(buffer) == 4
+    buffer.close()
+
+
+def test_read_records_splits_across_reads():
+    source = io.StringIO("ab||cd||||e")
+    assert list(read_records(source, "||", read_size=3)) == "ab||cd||||e".split("||")
+    assert list(read_records(io.StringIO(""), "\n")) == []
+    # Delimiters spanning several reads shorter than themselves
+    assert list(read_records(io.StringIO("a<=>b<=<=>"), "<=>", read_size=1)) == ["a", "b<=", ""]
+
+
+@pytest.mark.parametrize("blocks", [
+    [("regex", {"pattern": "(\\d+)", "replacement": "<$1>"}), ("hash", {"algorithm": "md5"}), ("join", {})],
+    [("trim", {}), ("deduplicate", {"trim": True}), ("sort", {"mode": "numeric", "direction": "desc"})],
+    [("case", {"mode": "upper"}), ("filter", {"query": "zzz"}), ("wrapper", {"prefix": "!"})],
+    [("split", {"delimiter": " "}), ("sort", {"mode": "smart"}), ("reverse", {})],
+])
+def test_parallel_matches_run_chain(blocks):
+    chain = load_chain(make_chain(*blocks))
+    text = "\n".join(f"x{i % 37} {i % 11}" if i % 5 else str(i % 13) for i in range(500))
+    assert parallel_chain(chain, text, workers=2, min_parallel_chars=1) == run_chain(chain, text)
+
+
+def test_parallel_reports_failing_block():
+    chain = load_chain(make_chain(("trim", {}), ("regex", {"pattern": "("})))
+    res = parallel_chain(chain, "a\nb\nc", workers=2, min_parallel_chars=1)
+    assert res == run_chain(chain, "a\nb\nc")
+    assert res["error"] and "error" in res["blocks"][1]
+
+
+@pytest.mark.parametrize("tool_id, params", [
+    ("sort", {"mode": "numeric", "direction": "desc"}),
+    ("sort", {"mode": "smart", "caseInsensitive": True}),
+    ("deduplicate", {"trim": True}),
+    ("deduplicate", {"trim": False}),
+    ("duplicates", {"showCounts": True}),
+])
+def test_external_tools_match_in_memory(monkeypatch, tool_id, params):
+    monkeypatch.setattr(external, "MAX_FAN_IN", 3)
+    lines = [f" {i % 17} " if i % 4 else f"Item{i % 23}" for i in range(400)] + ["", "4294967295", "4294967295"]
+    buffer = SpillBuffer(budget=200)
+    buffer.extend(lines)
+    assert buffer.spilled
+
+    res = stream_module.SPILLED[tool_id](buffer, params)
+    assert {"result": list(res["result"]), "stats": res["stats"]} == TOOLS[tool_id](lines, params)
+    buffer.close()
+
+
+def test_oversized_partitions_are_split_again(monkeypatch):
+    monkeypatch.setattr(external, "MAX_FAN_IN", 3)
+    buffer = SpillBuffer(budget=2000)
+    buffer.extend([f"v{i}" for i in range(40)] + ["same"] * 100)
+    parts = external._partition(buffer, str)
+    assert len(parts) > 3
+    # Only the part of the repeated value, which no hash can split, outgrows the budget
+    oversized = [part for part in parts if part.size > 2000]
+    assert len(oversized) == 1 and sum(entry.endswith("\tsame") for entry in oversized[0]) == 100
+    assert sorted(entry for part in parts for entry in part) == sorted(f"{i}\t{v}" for i, v in enumerate(buffer))
+    for part in parts:
+        part.close()
+    buffer.close()
+
+
+def test_regex_pattern_list_in_one_pass():
+    params = {"pattern": "(\\d)(\\d)\\2\n(a)\\1\n\\w+@\\w+", "replacement": "<$2$1>"}
+    res = TOOLS["regex"](["x 122 aa mail@host 45", "9"], params)
+    # Group references count within each pattern; $2 stays literal when there is no group 2
+    assert res == {"result": ["x <21> <$2a> <$2$1> 45", "9"], "stats": {"matches": 3}}
+
+    only = TOOLS["regex"](["122 mail@host"], {**params, "replacement": "", "onlyMatched": True})
+    assert only["result"] == ["122mail@host"]
+    # A single pattern keeps working with the newline the textarea leaves after it
+    assert TOOLS["regex"](["a1"], {"pattern": "\\d\n", "replacement": "#"})["result"] == ["a#"]
+    assert TOOLS["regex"](["a1"], {"pattern": "\n"})["stats"] == {"msg": "Empty pattern"}
+
+
+def test_filter_query_list():
+    lines = ["ERROR disk", "warn: cpu", "info", "debug error"]
+    assert TOOLS["filter"](lines, {"query": "error\nWARN\n", "mode": "contains"})["result"] == [
+        "ERROR disk", "warn: cpu", "debug error"
+    ]
+    assert TOOLS["filter"](lines, {"query": "info\ndebug", "mode": "starts"})["stats"] == {"matched": 2, "removed": 2}
+    assert TOOLS["filter"](lines, {"query": "info\n", "mode": "ends"})["result"] == ["info"]
+
+
+@pytest.mark.parametrize("text", [
+    '[{"a": 1, "b": [1, 2]}, {"a": "x\\ny"},\n 3.0, [], {"2": 0, "1": 0}]',
+    '{"a": [1, 2, {"a": 3}]}',
+    '[1, 2,\n  ]',
+    '[{"a": 1}\n {"a": 2}]',
+    '[{"a": 1}, {"a": "unterminated]',
+    '[1, 2] [3]',
+    '[NaN]',
+    '[1e400, {"a": -1e400}, 2]',
+])
+def test_json_tools_decode_incrementally(monkeypatch, text):
+    def reference(fn):
+        try:
+            return fn(json_parse(text))
+        except ValueError as e:
+            return str(e)
+
+    monkeypatch.setattr(jsonstream, "READ_SIZE", 4)
+    monkeypatch.setattr(jsonstream, "FORMAT_BATCH", 2)
+    lines = text.split("\n")
+    for query in ("$.*", "$[1:]", "$[-1]", "$..a", "$.length"):
+        res = TOOLS["json_path"](lines, {"query": query, "joinDelim": "\\n", "stringify": True})
+        steps = jsonpath.parse(query)
+        expected = reference(lambda doc: [json_stringify(v) if isinstance(v, (dict, list)) else js_string(v)
+                                          for v in jsonpath.evaluate(steps, doc)])
+        assert res["result"] == (expected if isinstance(expected, list) else [f"JSON parse error: {expected}"])
+    for indent in ("2", "0", "tab"):
+        res = TOOLS["json_format"](lines, {"indent": indent, "joinDelim": "\\n"})
+        expected = reference(lambda doc: json_stringify(doc, {"2": 2, "0": 0, "tab": "\t"}[indent]).split("\n"))
+        assert res["result"] == (expected if isinstance(expected, list) else [expected])
+
+
+def test_out_of_range_numbers_parse_to_infinity_like_js():
+    assert json_parse("[1e400, -1e400, 1e20]") == [float("inf"), float("-inf"), 10 ** 20]
+    assert json_stringify(json_parse('{"a": 1e400, "b": [-1e400]}')) == '{"a":null,"b":[null]}'
+    assert TOOLS["json_format"](["[1e400, -1e400]"], {"indent": "0"})["result"] == ["[null,null]"]
+    assert TOOLS["json_path"](["[1e400, -1e400]"], {"query": "$.*"})["result"] == ["Infinity", "-Infinity"]
+    # One such record does not end a streamed parse
+    output, res = stream(make_chain(("json_path", {"query": "$.a", "inputMode": "lines"})), '{"a": 1}\n{"a": 1e400}\n{"a": 3}')
+    assert output == "1\nInfinity\n3" and not res["error"]
+    output, res = stream(make_chain(("json_format", {"indent": "0", "joinDelim": ","})), "[1, 1e400]", chunk_size=2)
+    assert output == "[1,null]" and not res["error"]
+
+
+def test_json_tools_in_streamed_and_parallel_chains():
+    docs = [json.dumps({"id": i, "tags": ["t"] * (i % 3)}) for i in range(300)]
+    ndjson = load_chain(make_chain(("json_path", {"query": "$.tags.*", "inputMode": "lines"}), ("deduplicate", {})))
+    text = "\n".join(docs[:100] + ["{broken"] + docs[100:])
+    assert parallel_chain(ndjson, text, workers=2, min_parallel_chars=1) == run_chain(ndjson, text)
+
+    chain = make_chain(("json_path", {"query": "$[*].id"}), ("json_format", {"joinDelim": ","}))
+    text = "[" + ",\n".join(docs) + "]"
+    expected = run_chain(load_chain(chain), text)
+    output, res = stream(chain, text, chunk_size=16)
+    assert output == "\n".join(expected["result"]) and res["blocks"] == expected["blocks"]
+
+
+def test_bulk_hash_and_hex_match_per_line_results():
+    lines = ["abc", "Яё😀", "", "x\ud800"]
+    # TextEncoder turns the lone surrogate into U+FFFD; CryptoJS rejects it
+    assert TOOLS["hash"](lines, {"algorithm": "crc32"})["result"][3] == TOOLS["hash"](["x\ufffd"], {"algorithm": "crc32"})["result"][0]
+    res = TOOLS["hash"](lines, {"algorithm": "md5"})
+    assert res["result"][0] == "900150983cd24fb0d6963f7d28e17f72" and res["result"][3] == "[Error: URI malformed]"
+    assert res["stats"] == {"errors": 1}
+
+    assert TOOLS["to_hex"](["Яё😀é a"], {"encoding": "win1251", "format": "spaced", "uppercase": True})["result"] == [
+        "DF B8 3F 3F 3F 20 61"
+    ]
+    assert TOOLS["from_hex"](["0000: 41 42 |AB|", "", "43 44"], {"encoding": "utf-8"})["result"] == ["ABCD"]
+    assert TOOLS["from_hex"](["41", "4 2 x"], {"encoding": "utf-8"})["result"] == (
+        "Invalid characters detected in HEX data on line 2: x"
+    )
+
+
+def test_compare_against_dataset_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(datasets, "_config", dict(datasets._config))
+    monkeypatch.setattr(datasets, "_open", {})
+    datasets.configure(str(tmp_path), str(tmp_path / "indexes"), allow_paths=False)
+    list2 = [" b ", "c", "", "d", "b", "ё😀"]
+    (tmp_path / "known.txt").write_text("\n".join(list2), encoding="utf-8")
+    lines = ["a", "b", " a", "ё😀", "e", "b", ""]
+
+    for operation in ("common", "diff", "all"):
+        expected = TOOLS["compare"](lines, {"list2": "\n".join(list2), "operation": operation})
+        params = {"dataset": "known", "operation": operation}
+        assert TOOLS["compare"](lines, params) == expected
+        output, res = stream(make_chain(("compare", params)), "\n".join(lines * 50), memory_budget=10)
+        assert output == "\n".join(expected["result"]) and res["blocks"][0]["stats"] == expected["stats"]
+
+    (tmp_path / "known.txt").write_text("a\n", encoding="utf-8")
+    assert TOOLS["compare"](lines, {"dataset": "known", "operation": "common"})["result"] == ["a"]
+    assert len(list((tmp_path / "indexes").iterdir())) == 1
+    assert TOOLS["compare"](lines, {"dataset": str(tmp_path / "known.txt")}) == {
+        "result": [f"Unknown dataset: {tmp_path / 'known.txt'}"], "error": True
+    }
+
+
+def test_shuffle_sampling_modes_are_seeded_and_stream():
+    text = "\n".join(f"{'abc'[i % 3]} {i}" for i in range(300))
+    sample = make_chain(("shuffle", {"mode": "sample", "size": "10", "seed": "5"}))
+    res = run_chain(load_chain(sample), text)
+    assert len(res["result"]) == 10 and res["result"] == run_chain(load_chain(sample), text)["result"]
+    assert res["blocks"][0]["stats"] == {"total": 300, "sampled": 10}
+    assert [int(line.split()[1]) for line in res["result"]] == sorted(int(line.split()[1]) for line in res["result"])
+
+    res = run_chain(load_chain(make_chain(("shuffle", {"mode": "stratified", "size": "4", "seed": "5"}))), text)
+    assert sorted(line[0] for line in res["result"]) == list("aaaabbbbcccc")
+    assert res["blocks"][0]["stats"]["strata"] == 3
+
+    percent = make_chain(("trim", {}), ("shuffle", {"mode": "sample", "size": "20%", "seed": "9"}), ("case", {"mode": "upper"}))
+    expected = run_chain(load_chain(percent), text)
+    output, streamed = stream(percent, text, memory_budget=100, chunk_size=16)
+    assert output == "\n".join(expected["result"]) and streamed["blocks"] == expected["blocks"]
+
+    output, streamed = stream(make_chain(("shuffle", {"mode": "sample", "size": "ten"})), text)
+    assert streamed["error"] and streamed["blocks"][0]["error"] == "Invalid sample size: ten"
+
+    # An invalid key pattern fails for percentages too, as in the browser
+    for size in ("4", "20%"):
+        broken = make_chain(("shuffle", {"mode": "stratified", "size": size, "keyPattern": "("}))
+        output, streamed = stream(broken, text)
+        assert run_chain(load_chain(broken), text)["error"] and streamed["error"]
+
+
+def test_indexed_text_windows_and_search(tmp_path):
+    from stringlom.lineindex import IndexWriter, IndexedText, build_index
+
+    path = str(tmp_path / "result.txt")
+    with IndexWriter(path, ", ") as out:
+        out.extend(["a", "ёж", "", "b, c", "a"])
+    with IndexedText(path, ", ") as text:
+        assert (tmp_path / "result.txt").read_text() == "a, ёж, , b, c, a"
+        assert len(text) == 5 and text.window(1, 3) == ["ёж", "", "b, c"] and text.window(4, 10) == ["a"]
+        # 'a, ' straddles records 0 and 1, so only records containing it match
+        assert text.search("a") == ([0, 4], None) and text.search("a, ") == ([], None)
+        assert text.search(", c") == ([3], None) and text.search("a", 0, 1) == ([0], 1)
+
+    (tmp_path / "source.txt").write_text("x\n\ny\n")
+    assert build_index(str(tmp_path / "source.txt")) == 4
+    with IndexedText(str(tmp_path / "source.txt")) as text:
+        assert text.window(0, 10) == "x\n\ny\n".split("\n")
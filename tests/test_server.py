@@ -0,0 +1,682 @@
+import os
+import sys
+import time
+import subprocess
+import json
+import asyncio
+import importlib
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    # server.py parses argv and reads ~/config.json at import time
+    home = tmp_path_factory.mktemp("home")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("HOME", str(home))
+        mp.setattr(sys, "argv", ["server.py"])
+        sys.modules.pop("server", None)
+        module = importlib.import_module("server")
+    yield module
+    sys.modules.pop("server", None)
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(server, monkeypatch):
+    # Single attempts unless a test is about retries
+    monkeypatch.setattr(server.args, "max_retries", 0)
+    monkeypatch.setattr(server.args, "retry_base_delay", 0.001)
+    monkeypatch.setattr(server.args, "retry_max_delay", 1.0)
+
+
+def make_client(server, handler):
+    server.qwen_provider.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    server.qwen_provider.limiters.clear()
+    server.qwen_provider.recent_gets.clear()
+    return TestClient(server.app, client=("127.0.0.1", 50000))
+
+
+def proxy_url(server, target):
+    return f"/{server.API_UUID}/proxy?url={target}"
+
+
+def test_proxy_forwards_json(server):
+    seen = []
+
+    def handler(request: httpx.Request):
+        seen.append(request)
+        return httpx.Response(200, json={"echo": request.read().decode()})
+
+    with make_client(server, handler) as client:
+        r = client.post(proxy_url(server, "https://api.example.com/v1/chat"), json={"a": 1},
+                        headers={"Authorization": "Bearer t", "Origin": "http://localhost"})
+
+    assert r.status_code == 200
+    assert r.json() == {"echo": '{"a":1}'}
+    assert seen[0].headers["host"] == "api.example.com"
+    assert seen[0].headers["authorization"] == "Bearer t"
+    assert "origin" not in seen[0].headers
+
+
+def test_proxy_reuses_pooled_client(server):
+    clients = set()
+
+    def handler(request: httpx.Request):
+        return httpx.Response(200, json={"ok": True})
+
+    with make_client(server, handler) as client:
+        for _ in range(3):
+            client.get(proxy_url(server, "https://api.example.com/v1/models"))
+            clients.add(id(server.qwen_provider.client))
+
+    assert len(clients) == 1
+    # The lifespan closes the pool on shutdown
+    assert server.qwen_provider.client is None
+
+
+def test_proxy_upstream_error_is_502(server):
+    def handler(request: httpx.Request):
+        raise httpx.ConnectError("boom", request=request)
+
+    with make_client(server, handler) as client:
+        r = client.get(proxy_url(server, "https://api.example.com/v1/models"))
+
+    assert r.status_code == 502
+    assert "boom" in r.json()["error"]
+
+
+def test_proxy_retries_only_unsent_posts(server, monkeypatch):
+    monkeypatch.setattr(server.args, "max_retries", 2)
+    monkeypatch.setattr(server.args, "breaker_threshold", 100)
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(request.method)
+        error = httpx.ConnectError if request.url.path.endswith("connect") else httpx.ReadTimeout
+        raise error("boom", request=request)
+
+    with make_client(server, handler) as client:
+        client.post(proxy_url(server, "https://api.example.com/v1/read"), json={"a": 1})
+        sent_posts = len(calls)
+        client.post(proxy_url(server, "https://api.example.com/v1/connect"), json={"a": 1})
+        unsent_posts = len(calls) - sent_posts
+        client.get(proxy_url(server, "https://api.example.com/v1/read"))
+
+    # A POST that may have reached the upstream is not repeated
+    assert sent_posts == 1 and unsent_posts == 3
+    assert calls[4:] == ["GET"] * 3
+
+
+def test_proxy_retries_rate_limits_and_opens_circuit(server, monkeypatch):
+    monkeypatch.setattr(server.args, "max_retries", 3)
+    monkeypatch.setattr(server.args, "breaker_threshold", 2)
+    monkeypatch.setattr(server.args, "rpm", 6000)
+    statuses = iter([429, 503, 200, 500, 500, 500, 500, 500, 500])
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(request)
+        status = next(statuses)
+        return httpx.Response(status, json={"n": len(calls)}, headers={"Retry-After": "0"} if status == 429 else {})
+
+    with make_client(server, handler) as client:
+        first = client.post(proxy_url(server, "https://api.example.com/v1/chat"), json={"a": 1})
+        limiter = server.qwen_provider.limiters["api.example.com"]
+        # The 429 halved the rate, the 503 counted towards the breaker and the 200 reset it and added one request/minute
+        assert first.json() == {"n": 3} and limiter.rpm == 3001 and limiter.failures == 0
+        failing = client.post(proxy_url(server, "https://api.example.com/v1/chat"), json={"a": 1})
+        rejected = client.post(proxy_url(server, "https://api.example.com/v1/chat"), json={"a": 1})
+
+    # Two 500s open the circuit; the retry after them is rejected without reaching upstream
+    assert failing.status_code == 503 and "paused" in failing.json()["error"]
+    assert rejected.status_code == 503 and int(rejected.headers["retry-after"]) > 0
+    assert len(calls) == 5
+
+
+def test_cancelled_probe_reopens_the_half_open_circuit(server, monkeypatch):
+    monkeypatch.setattr(server.args, "breaker_threshold", 1)
+    provider = server.qwen_provider
+
+    async def cancelled_while(wait):
+        provider.client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+        provider.limiters.clear()
+        provider.host_limits.clear()
+        limiter = provider.limiter("api.example.com")
+        limiter.failures, limiter.open_until = 1, 0.0
+        if wait == "budget":
+            limiter.paused_until = server.time.monotonic() + 5
+        else:
+            host_limit = provider.host_limit("api.example.com")
+            while not host_limit.locked():
+                await host_limit.acquire()
+        task = asyncio.ensure_future(provider.send("POST", "https://api.example.com/v1/chat", {}, {}))
+        await asyncio.sleep(0.05)
+        assert limiter.probing
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await provider.client.aclose()
+        return limiter.probing
+
+    # The client left while the probe waited, so the next request may probe
+    assert not asyncio.run(cancelled_while("budget"))
+    assert not asyncio.run(cancelled_while("host slot"))
+    provider.host_limits.clear()
+
+
+def test_token_bucket_and_retry_after(server):
+    bucket = server.TokenBucket(rate=10)
+    assert bucket.reserve(bucket.capacity()) == 0
+    assert 0.45 < bucket.reserve(5) <= 0.5
+    assert server.retry_after_seconds(httpx.Headers({"Retry-After": "3"})) == 3
+    assert server.retry_after_seconds(httpx.Headers({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0
+    assert server.retry_after_seconds(httpx.Headers({})) is None
+
+
+def test_unauthorized_without_uuid(server):
+    with make_client(server, lambda request: httpx.Response(200)) as client:
+        r = client.get("/not-the-uuid/proxy?url=https://api.example.com")
+    assert r.status_code == 401
+
+
+def test_proxy_relays_event_stream(server):
+    events = [b'data: {"choices":[{"delta":{"content":"a"}}]}\n\n', b"data: [DONE]\n\n"]
+
+    async def stream():
+        for event in events:
+            yield event
+
+    def handler(request: httpx.Request):
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=stream())
+
+    with make_client(server, handler) as client:
+        with client.stream("POST", proxy_url(server, "https://api.example.com/v1/chat"), json={"stream": True}) as r:
+            chunks = list(r.iter_bytes())
+
+    assert r.headers["content-type"].startswith("text/event-stream")
+    assert b"".join(chunks) == b"".join(events)
+    assert server.qwen_provider.host_limit("api.example.com")._value == server.args.max_connections_per_host
+
+
+def test_llm_batch_keeps_order_and_sums_usage(server):
+    import asyncio
+    import json
+
+    state = {"active": 0, "peak": 0}
+
+    async def handler(request: httpx.Request):
+        payload = json.loads(request.read())
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        # Later batches finish first to prove results are re-ordered
+        await asyncio.sleep(0.05 if "a" in payload["messages"][1]["content"] else 0.01)
+        state["active"] -= 1
+        content = payload["messages"][1]["content"].upper()
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": content}}],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 2}
+        })
+
+    body = {
+        "url": "https://api.example.com/v1/chat/completions",
+        "model": "m",
+        "systemPrompt": "sys",
+        "promptTemplate": "<{{ line }}>",
+        "lines": ["a", "b", "c", "d", "e"],
+        "batchSize": 2,
+        "concurrency": 3
+    }
+    with make_client(server, handler) as client:
+        r = client.post(f"/{server.API_UUID}/llm/batch", json=body)
+
+    data = r.json()
+    assert r.status_code == 200
+    assert data["result"] == ["<A>", "<B>", "<C>", "<D>", "<E>"]
+    assert [b["index"] for b in data["batches"]] == [0, 1, 2]
+    assert data["usage"] == {"prompt_tokens": 9, "completion_tokens": 6, "total_tokens": 15}
+    assert state["peak"] == 3
+
+
+def test_llm_batch_fills_prompts_like_string_replace(server):
+    import json
+
+    def handler(request: httpx.Request):
+        content = json.loads(request.read())["messages"][1]["content"]
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    body = {"url": "https://api.example.com/v1/chat/completions", "promptTemplate": "<{{ line }}|{{ line }}>",
+            "lines": ["a$&b", "$$", "x$'y", "$1"], "batchSize": 1}
+    with make_client(server, handler) as client:
+        r = client.post(f"/{server.API_UUID}/llm/batch", json=body)
+
+    # What params.promptTemplate.replace('{{ line }}', line) gives in the browser
+    assert r.json()["result"] == ["<a{{ line }}b|{{ line }}>", "<$|{{ line }}>", "<x|{{ line }}>y|{{ line }}>", "<$1|{{ line }}>"]
+
+
+def test_llm_batch_reports_failed_batch(server):
+    def handler(request: httpx.Request):
+        if b"bad" in request.read():
+            return httpx.Response(404, json={"error": {"message": "no such model"}})
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    body = {"url": "https://api.example.com/v1/chat/completions", "lines": ["good", "bad"]}
+    with make_client(server, handler) as client:
+        r = client.post(f"/{server.API_UUID}/llm/batch", json=body)
+        invalid = client.post(f"/{server.API_UUID}/llm/batch", json={**body, "batchSize": "two"})
+
+    # Not the upstream 404, which the page takes for a proxy without this route
+    assert r.status_code == 502
+    assert r.json()["error"] == {"message": "Batch 2: no such model", "status": 404}
+    assert r.json()["batches"][0]["result"] == ["ok"]
+    assert invalid.status_code == 400
+
+
+@pytest.fixture
+def cache(server, tmp_path):
+    cache = server.ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=10_000, max_entries=2, ttl=60)
+    server.qwen_provider.cache = cache
+    yield cache
+    server.qwen_provider.cache = None
+    cache.close()
+
+
+def test_proxy_cache_serves_identical_completions(server, cache):
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(request)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "hi"}}]})
+
+    url = proxy_url(server, "https://api.example.com/v1/chat/completions")
+    payload = {"model": "m", "messages": [{"role": "user", "content": "x"}], "temperature": 0}
+    with make_client(server, handler) as client:
+        first = client.post(url, json=payload)
+        second = client.post(url, json={**payload, "stream": False})
+        client.post(url, json={**payload, "temperature": 1})
+        stats = client.get(f"/{server.API_UUID}/cache/stats").json()
+
+    assert first.json() == second.json()
+    assert second.headers["x-cache"] == "HIT"
+    assert len(calls) == 2
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["entries"] == 2
+    key = server.ResponseCache.make_key
+    target = "https://api.example.com/v1/chat/completions"
+    assert key(target, {**payload, "max_tokens": 10}) != key(target, {**payload, "max_tokens": 20})
+    assert key(target, {**payload, "tools": []}) != key(target, payload)
+    assert key(target, {"temperature": 0, **payload, "stream": False}) == key(target, payload)
+
+
+def test_response_cache_evicts_least_recently_used(cache):
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.put("c", {"v": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_response_cache_expires_entries(cache):
+    cache.ttl = 0
+    cache.put("a", {"v": 1})
+    assert cache.get("a") is None
+
+
+def test_chain_run_route(server):
+    chain = {"blocks": [{"type": "source", "params": {}}, {"type": "case", "params": {"mode": "upper"}}]}
+    with make_client(server, lambda request: httpx.Response(200)) as client:
+        ok = client.post(f"/{server.API_UUID}/chain/run", json={"chain": chain, "text": "a\nb"})
+        bad = client.post(f"/{server.API_UUID}/chain/run", json={"chain": {"blocks": []}})
+
+    assert ok.json()["output"] == "A\nB"
+    assert ok.json()["blocks"] == [{"type": "case", "stats": {}}]
+    assert bad.status_code == 400
+
+
+def test_paged_source_result_search_and_download(server, monkeypatch, tmp_path):
+    monkeypatch.setattr(server.args, "results_dir", str(tmp_path))
+    chain = {"blocks": [{"type": "source", "params": {}}, {"type": "filter", "params": {"query": "7"}},
+                        {"type": "case", "params": {"mode": "upper"}}],
+             "settings": {"finalDelimiter": "custom", "finalCustomDelimiter": ", "}}
+    text = "\n".join(f"line {i}" for i in range(1000))
+    with make_client(server, lambda request: httpx.Response(200)) as client:
+        base = f"/{server.API_UUID}"
+        source = client.post(f"{base}/source", content=text.encode()).json()
+        page = client.get(f"{base}/source/{source['id']}", params={"offset": 998, "limit": 10}).json()
+        run = client.post(f"{base}/chain/run", json={"chain": chain, "source": source["id"]}).json()
+        window = client.get(f"{base}/result/{run['result']}", params={"offset": 1, "limit": 2}).json()
+        found = client.get(f"{base}/result/{run['result']}/search", params={"q": "77", "limit": 3}).json()
+        rest = client.get(f"{base}/result/{run['result']}/search", params={"q": "77", "start": found["next"]}).json()
+        download = client.get(f"{base}/result/{run['result']}/download")
+        unknown = client.get(f"{base}/result/{source['id']}")
+        traversal = client.get(f"{base}/result/..%2Fconfig")
+        missing = client.post(f"{base}/chain/run", json={"chain": chain, "source": "0" * 32})
+
+    assert source["lines"] == 1000 and page == {"offset": 998, "total": 1000, "lines": ["line 998", "line 999"]}
+    expected = [line.upper() for line in text.split("\n") if "7" in line]
+    assert run["lines"] == len(expected) and run["blocks"][0]["stats"]["matched"] == len(expected)
+    assert window["lines"] == expected[1:3] and window["total"] == len(expected)
+    hits = [i for i, line in enumerate(expected) if "77" in line]
+    assert found["matches"] == hits[:3] and rest == {"matches": hits[3:], "next": None}
+    assert download.text == ", ".join(expected) and "attachment" in download.headers["content-disposition"]
+    assert unknown.status_code == traversal.status_code == missing.status_code == 404
+
+
+def test_paged_texts_evict_results_first_and_clean_up_failed_runs(server, monkeypatch, tmp_path):
+    import os
+    import stringlom.stream
+    from stringlom import load_chain
+
+    monkeypatch.setattr(server.args, "results_dir", str(tmp_path))
+    chain = load_chain({"blocks": [{"type": "source", "params": {}}, {"type": "filter", "params": {"query": "9"}}]})
+
+    def add_source(text):
+        text_id = server.uuid.uuid4().hex
+        with open(server.text_path(text_id), "w") as f:
+            f.write(text)
+        server.save_text_meta(text_id, {"kind": "source", "delimiter": "\n"})
+        return text_id
+
+    def size(text_id):
+        return sum(os.path.getsize(path) for path in server.text_files(text_id) if os.path.exists(path))
+
+    old_source = add_source("\n".join(f"old {i}" for i in range(500)))
+    old_result = server.run_paged(chain, old_source)["result"]
+    source = add_source("\n".join(f"new {i}" for i in range(500)))
+    result = server.run_paged(chain, source)["result"]
+    for age, text_id in enumerate([old_source, old_result, source, result]):
+        for path in server.text_files(text_id):
+            if os.path.exists(path):
+                os.utime(path, (age, age))
+
+    # The older source could be run again, but its result goes first
+    total = sum(size(text_id) for text_id in (old_source, old_result, source, result))
+    monkeypatch.setattr(server.args, "results_max_mb", (total - size(old_result)) / 1024 / 1024)
+    server.evict_texts(result)
+    assert size(old_result) == 0 and size(old_source) > 0
+    # The kept result's source stays whatever the budget
+    monkeypatch.setattr(server.args, "results_max_mb", 0)
+    server.evict_texts(result)
+    assert size(old_source) == 0 and size(source) > 0 and size(result) > 0
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("disk full")
+
+    files = sorted(os.listdir(tmp_path))
+    monkeypatch.setattr(stringlom.stream, "stream_records", fail)
+    with pytest.raises(RuntimeError):
+        server.run_paged(chain, source)
+    assert sorted(os.listdir(tmp_path)) == files
+
+
+def test_chain_evaluate_runs_candidates_in_sandboxes(server, monkeypatch):
+    monkeypatch.setattr(server.args, "eval_timeout", 1.5)
+    source = {"type": "source", "params": {}}
+    candidates = [
+        {"chain": {"blocks": [source, {"type": "case", "params": {"mode": "upper"}}, {"type": "sort", "params": {}}]}},
+        {"chain": {"blocks": [source, {"type": "regex", "params": {"pattern": "(a+)+$", "replacement": "x"}}]},
+         "inputs": ["a" * 40 + "b"]},
+        {"chain": {"blocks": [source, {"type": "my_custom_block"}]}},
+        {"chain": {"blocks": [source, {"type": "trim", "params": {}}]}, "text": " c \n d "},
+    ]
+    with make_client(server, lambda request: httpx.Response(200)) as client:
+        started = time.perf_counter()
+        r = client.post(f"/{server.API_UUID}/chain/evaluate", json={"candidates": candidates, "inputs": ["b", "a"], "timeout": 30})
+        elapsed = time.perf_counter() - started
+        again = client.post(f"/{server.API_UUID}/chain/evaluate", json={"candidates": candidates[:1], "inputs": ["z"]})
+        bad = client.post(f"/{server.API_UUID}/chain/evaluate", json={"candidates": []})
+        # Lone surrogates cross the worker's pipe escaped instead of failing to encode
+        surrogate = server.get_sandbox_pool().evaluate(candidates[0], ["\ud800a"])
+        instant = client.post(f"/{server.API_UUID}/chain/evaluate", json={"candidates": candidates[:1], "timeout": -1})
+
+    upper, runaway, custom, trimmed = r.json()["results"]
+    assert upper["status"] == "ok" and upper["final_output"] == ["A", "B"]
+    assert [(e["type"], e["status"], e["output"]) for e in upper["log"]] == [("case", "ok", ["B", "A"]), ("sort", "ok", ["A", "B"])]
+    assert all(e["ms"] >= 0 for e in upper["log"])
+    # Killed at the server's limit, which a request cannot raise
+    assert runaway["status"] == "timeout" and elapsed < 10
+    assert custom["status"] == "invalid" and "my_custom_block" in custom["error"]
+    assert trimmed["final_output"] == ["c", "d"]
+    # The worker killed for the runaway candidate was replaced
+    assert again.json()["results"][0]["final_output"] == ["Z"]
+    assert bad.status_code == instant.status_code == 400
+    assert surrogate["final_output"] == ["\ud800A"]
+    assert not server.sandbox_pool.workers
+
+
+def test_chain_evaluate_reports_a_failing_candidate_alone(server, monkeypatch):
+    from stringlom.sandbox import SandboxPool
+
+    pool = SandboxPool(2)
+
+    def evaluate(candidate, inputs=None, timeout=10.0):
+        if candidate.get("garbled"):
+            raise ValueError("Expecting value: line 1 column 1 (char 0)")
+        return {"status": "ok", "final_output": inputs}
+
+    monkeypatch.setattr(pool, "evaluate", evaluate)
+    monkeypatch.setattr(server, "sandbox_pool", pool)
+    with make_client(server, lambda request: httpx.Response(200)) as client:
+        r = client.post(f"/{server.API_UUID}/chain/evaluate", json={"candidates": [{}, {"garbled": True}, {}], "inputs": ["a"]})
+
+    assert r.status_code == 200
+    ok, failed, also_ok = r.json()["results"]
+    assert ok == also_ok == {"status": "ok", "final_output": ["a"]}
+    assert failed["status"] == "error" and failed["error"].startswith("ValueError")
+
+
+def test_metrics_and_trace_log(server, monkeypatch, tmp_path):
+    trace_log = server.TraceLog(str(tmp_path / "trace.jsonl"))
+    monkeypatch.setattr(server, "trace_log", trace_log)
+    monkeypatch.setattr(server, "metrics", server.Metrics())
+
+    def handler(request: httpx.Request):
+        return httpx.Response(200, json={"choices": [], "usage": {"prompt_tokens": 7, "completion_tokens": 3, "total_tokens": 10}})
+
+    with make_client(server, handler) as client:
+        r = client.post(proxy_url(server, "https://api.example.com/v1/chat"), json={"model": "m1", "messages": []})
+        text = client.get(f"/{server.API_UUID}/metrics").text
+    trace_log.close()
+
+    assert 'stringlom_requests_total{method="POST",route="/proxy",status="200"} 1' in text
+    assert 'stringlom_upstream_tokens_total{host="api.example.com",kind="prompt",model="m1"} 7' in text
+    assert 'stringlom_upstream_duration_seconds_bucket{host="api.example.com",le="+Inf"} 1' in text
+    assert 'stringlom_requests_in_flight{route="/proxy"} 0' in text
+
+    trace = json.loads((tmp_path / "trace.jsonl").read_text().splitlines()[0])
+    assert trace["id"] == r.headers["x-request-id"] and trace["route"] == "/proxy" and trace["status"] == 200
+    assert trace["upstream"] == "api.example.com" and trace["model"] == "m1" and trace["usage"]["total_tokens"] == 10
+    assert trace["bytes_out"] == len(r.content) and trace["total_ms"] >= trace["upstream_ms"] + trace["queue_ms"]
+
+
+def test_oauth_flow_refreshes_and_attaches_tokens(server, monkeypatch, tmp_path):
+    provider = server.qwen_provider
+    monkeypatch.setattr(provider, "tokens", server.OAuthTokens(str(tmp_path / "oauth.json"), provider.token_url, provider.client_id))
+    monkeypatch.setattr(provider, "pkce_store", server.PKCEStore())
+    forms, upstream = [], []
+
+    def handler(request: httpx.Request):
+        if request.url.host == "chat.qwen.ai":
+            form = dict(httpx.QueryParams(request.read().decode()))
+            forms.append(form)
+            if request.url.path.endswith("/device/code"):
+                return httpx.Response(200, json={"device_code": "dc", "verification_uri": "https://v", "expires_in": 600})
+            if form["grant_type"] == "refresh_token":
+                return httpx.Response(200, json={"access_token": "a2", "expires_in": 3600})
+            return httpx.Response(200, json={"access_token": "a1", "refresh_token": "r1", "expires_in": 10, "resource_url": "portal.qwen.ai"})
+        upstream.append(request.headers.get("authorization"))
+        return httpx.Response(200, json={"ok": True})
+
+    with make_client(server, handler) as client:
+        client.post(f"/{server.API_UUID}/auth/device_code", json={"challenge": "c", "verifier": "v"})
+        assert len(provider.pkce_store) == 1
+        poll = client.post(f"/{server.API_UUID}/auth/poll", json={"device_code": "dc"})
+        assert poll.json()["access_token"] == "a1" and len(provider.pkce_store) == 0
+        assert client.get(f"/{server.API_UUID}/auth/status").json()["authorized"]
+
+        # a1 expires within the refresh margin: one refresh, then a2 replaces tokens the proxy issued
+        client.post(proxy_url(server, "https://portal.qwen.ai/v1/chat/completions"), json={}, headers={"Authorization": "Bearer a1"})
+        client.get(proxy_url(server, "https://portal.qwen.ai/v1/models"), headers={"Authorization": "Bearer "})
+        client.get(proxy_url(server, "https://api.deepseek.com/models"), headers={"Authorization": "Bearer sk-user"})
+        client.get(proxy_url(server, "https://api.deepseek.com/models"))
+
+    assert forms[1]["code_verifier"] == "v"
+    assert [form.get("grant_type") for form in forms].count("refresh_token") == 1
+    assert upstream == ["Bearer a2", "Bearer a2", "Bearer sk-user", None]
+    assert json.loads((tmp_path / "oauth.json").read_text())["refresh_token"] == "r1"
+
+
+def test_pkce_store_expires_and_is_bounded(server, monkeypatch):
+    store = server.PKCEStore(ttl=60, max_entries=2)
+    for code in ("a", "b", "c"):
+        store.put(code, code.upper())
+    assert store.get("a") is None and store.get("c") == "C"
+    monkeypatch.setattr(server.time, "monotonic", lambda: 1e12)
+    assert store.get("c") is None and len(store) == 0
+
+
+def test_identical_requests_share_one_upstream_call(server):
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    calls = []
+    events = [b"data: 1\n\n", b"data: 2\n\n", b"data: [DONE]\n\n"]
+
+    async def stream():
+        for event in events:
+            await asyncio.sleep(0.05)
+            yield event
+
+    async def handler(request: httpx.Request):
+        calls.append(request.url.path)
+        if request.url.path.endswith("/stream"):
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=stream())
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json={"data": [{"id": "m1"}]})
+
+    def post(client, path, payload):
+        with client.stream("POST", proxy_url(server, f"https://api.example.com{path}"), json=payload) as r:
+            return b"".join(r.iter_bytes())
+
+    with make_client(server, handler) as client, ThreadPoolExecutor(6) as pool:
+        same = list(pool.map(lambda _: post(client, "/v1/chat", {"q": 1}), range(3)))
+        streams = list(pool.map(lambda _: post(client, "/v1/stream", {"q": 1}), range(3)))
+        other = post(client, "/v1/chat", {"q": 2})
+        models = [client.get(proxy_url(server, "https://api.example.com/v1/models")) for _ in range(2)]
+
+    assert len(set(same)) == 1 and streams == [b"".join(events)] * 3 and other == same[0]
+    assert models[1].headers["x-cache"] == "HIT" and models[1].json() == models[0].json()
+    assert calls == ["/v1/chat", "/v1/stream", "/v1/chat", "/v1/models"]
+    assert not server.qwen_provider.flights
+    assert server.qwen_provider.host_limit("api.example.com")._value == server.args.max_connections_per_host
+
+
+def test_shared_stream_keeps_only_unread_chunks(server, monkeypatch):
+    tees, held = [], []
+
+    class RecordedTee(server.StreamTee):
+        def __init__(self, *args):
+            super().__init__(*args)
+            tees.append(self)
+
+    async def stream():
+        for i in range(200):
+            if tees:
+                held.append(len(tees[0].chunks))
+            yield b"data: %d\n\n" % i
+
+    monkeypatch.setattr(server, "StreamTee", RecordedTee)
+    with make_client(server, lambda request: httpx.Response(200, headers={"content-type": "text/event-stream"}, content=stream())) as client:
+        with client.stream("POST", proxy_url(server, "https://api.example.com/v1/long"), json={"stream": True}) as r:
+            body = b"".join(r.iter_bytes())
+        again = client.post(proxy_url(server, "https://api.example.com/v1/long"), json={"stream": True})
+
+    assert body == b"".join(b"data: %d\n\n" % i for i in range(200)) and again.content == body
+    # Relayed chunks are dropped instead of piling up for readers that can no longer join
+    assert len(held) >= 199 and max(held) <= 1
+    assert len(tees) == 2 and not server.qwen_provider.flights
+
+
+def test_stream_closes_when_its_only_waiter_leaves(server):
+    closed = []
+
+    class Events(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            yield b"data: 1\n\n"
+
+        async def aclose(self):
+            closed.append(True)
+
+    async def handler(request: httpx.Request):
+        await asyncio.sleep(0.1)
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=Events())
+
+    async def scenario():
+        provider = server.qwen_provider
+        provider.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        provider.limiters.clear()
+        # The client goes away before the first byte
+        waiter = asyncio.ensure_future(provider.proxy_request("https://api.example.com/v1/abort", "POST", {}, {"q": 1}))
+        await asyncio.sleep(0.02)
+        waiter.cancel()
+        await asyncio.sleep(0.3)
+        return provider
+
+    provider = asyncio.run(scenario())
+    assert closed and not provider.flights and not provider.waiting
+    assert provider.host_limit("api.example.com")._value == server.args.max_connections_per_host
+
+
+def test_workers_split_the_upstream_budgets(server, monkeypatch, caplog):
+    monkeypatch.setattr(server.args, "rpm", 120)
+    monkeypatch.setattr(server.args, "tpm", 0)
+    server.split_budgets(4)
+    assert server.args.rpm == 30 and server.args.tpm == 0
+    assert server.UpstreamLimiter("api.example.com").max_rpm == 30
+
+    monkeypatch.setattr(server.args, "rpm", 3)
+    with caplog.at_level("WARNING"):
+        server.split_budgets(8)
+    # A share below one request per minute is raised to one, with a warning
+    assert server.args.rpm == 1 and "below 1 per worker" in caplog.text
+
+
+def test_port_is_assigned_once_and_kept(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "CONFIG_FILE", str(tmp_path / "config.json"))
+    assert server.load_config()[0] is None
+
+    sock = server.bind_socket(None)
+    port = sock.getsockname()[1]
+    server.save_config(port, "u")
+    assert server.load_config() == (port, "u")
+    # Taken by the first socket, so the OS assigns another
+    other = server.bind_socket(port)
+    assert other.getsockname()[1] != port
+    sock.close(), other.close()
+    assert server.bind_socket(port).getsockname()[1] == port
+
+
+def test_workers_share_one_socket_and_config(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "HOME": str(tmp_path)}
+    process = subprocess.Popen([sys.executable, os.path.join(root, "server.py"), "--workers", "2"], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        config = tmp_path / "config.json"
+        for _ in range(1000):
+            if config.exists():
+                break
+            time.sleep(0.01)
+        saved = json.loads(config.read_text())
+        r = httpx.get(f"http://127.0.0.1:{saved['port']}/", timeout=30)
+        children = open(f"/proc/{process.pid}/task/{process.pid}/children").read().split()
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    assert r.json()["base_url"] == f"http://127.0.0.1:{saved['port']}/{saved['uuid']}"
+    assert len(children) == 2
@@ -174,3 +174,40 @@ def test_tool_js_function(page: Page, app_url: str):
     page.locator(".process-block textarea").fill("return line * 2")
 
     expect(page.locator("#final-output-box")).to_have_text("10")
+
+
+def test_block_cache_reuses_unchanged_blocks(page: Page, app_url: str):
+    page.goto(app_url)
+    page.evaluate("localStorage.clear()")
+    page.reload()
+    page.evaluate("i18n.setLocale('en')")
+
+    page.locator(".block.source-block textarea").fill("Hello 123 World")
+    add_tool(page, "regex")
+    add_tool(page, "case")
+
+    # Rerunning without changes serves every block from the cache
+    page.evaluate("app.runChain()")
+    hit_text = page.evaluate("`${i18n.t('block_cache')} ${i18n.t('block_cache_hit')}`")
+    expect(page.locator(".process-block .cache-badge")).to_have_text([hit_text, hit_text])
+    expect(page.locator("#final-output-box")).to_have_text("hello  world")
+
+    # Changing the source invalidates all blocks downstream of it
+    page.locator(".block.source-block textarea").fill("Bye 1")
+    miss_text = page.evaluate("`${i18n.t('block_cache')} ${i18n.t('block_cache_miss')}`")
+    expect(page.locator(".process-block .cache-badge")).to_have_text([miss_text, miss_text])
+    expect(page.locator("#final-output-box")).to_have_text("bye ")
+
+
+@pytest.mark.parametrize("size", ["4", "20%"])
+def test_tool_shuffle_key_pattern_errors_match_python(page: Page, app_url: str, size: str):
+    from stringlom import TOOLS
+
+    page.goto(app_url)
+    params = {"mode": "stratified", "size": size, "seed": "5", "keyPattern": "("}
+    lines = ["a 1", "b 2", "a 3"]
+    browser = page.evaluate("([lines, params]) => TOOLS.find(t => t.id === 'shuffle').process(lines, params)", [lines, params])
+    python = TOOLS["shuffle"](lines, params)
+
+    # The engines word regex errors differently; both must fail
+    assert browser.get("error") is True and python.get("error") is True